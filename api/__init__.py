@@ -1,13 +1,50 @@
 """
 API 蓝图模块
 """
+import orjson
 from flask import Flask
+from flask.json.provider import JSONProvider
 
+# 视为真值的字符串，包含常见大小写形式以免多数情况下调用 lower()
+_TRUE_STRINGS = frozenset(('true', '1', 'yes', 'on', 'True', 'TRUE', 'Yes', 'YES', 'On', 'ON'))
+
+
+def parse_bool(value, default=False):
+    """解析请求中的布尔值，供各蓝图共用"""
+    if value is True or value is False:
+        return value
+    if isinstance(value, str):
+        return value in _TRUE_STRINGS or value.lower() in _TRUE_STRINGS
+    return default
+
+
+# 蓝图模块会导入 parse_bool，须在其定义之后再导入
 from api.tasks import tasks_bp
 from api.status import status_bp
 
 
+class OrjsonProvider(JSONProvider):
+    """基于 orjson 的 Flask JSON 提供器，请求解析与响应序列化均走 orjson"""
+    
+    option = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # 直接输出 bytes，省去 str 编解码的往返
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype='application/json'
+        )
+
+
 def register_blueprints(app: Flask):
     """注册所有 API 蓝图"""
     app.register_blueprint(tasks_bp, url_prefix='/api')
     app.register_blueprint(status_bp, url_prefix='/api')
+    app.json = OrjsonProvider(app)
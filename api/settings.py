@@ -3,13 +3,19 @@
 处理 OpenList 配置等系统设置
 """
 
-import json
+import atexit
 import logging
+import os
 import posixpath
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, Tuple
 from flask import Blueprint, jsonify, request
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from core.webdav_client import WebDavClient
 
@@ -21,6 +27,24 @@ SYSTEM_CONFIG_PATH = Path('config/system.json')
 
 settings_bp = Blueprint('settings', __name__)
 
+# OpenList 连接测试共用的 HTTP 会话，重复测试时复用连接
+_HTTP = requests.Session()
+_HTTP.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+_HTTP.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+# 连接超时 / 读取超时（秒）
+_HTTP_TIMEOUT = (3, 10)
+
+# 连接测试在独立线程池中执行，限制单次请求占用的时间
+_PROBE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='openlist-probe')
+_PROBE_TIMEOUT = sum(_HTTP_TIMEOUT) + 2
+
+
+@atexit.register
+def _close_probe_resources():
+    """进程退出时释放共享的连接池和探测线程"""
+    _PROBE_POOL.shutdown(wait=False, cancel_futures=True)
+    _HTTP.close()
+
 # 全局变量，由 init_settings_bp 初始化
 _is_docker = False
 
@@ -37,48 +61,120 @@ def init_settings_bp(is_docker: bool):
     SYSTEM_CONFIG_PATH.parent.mkdir(exist_ok=True)
 
 
-def load_openlist_config() -> dict:
-    """加载 OpenList 配置"""
-    if OPENLIST_CONFIG_PATH.exists():
+class _JsonConfig:
+    """
+    JSON 配置文件读写
+    
+    读取时按 (mtime, size) 缓存解析结果，写入时先写临时文件再原子替换。
+    路径通过 path_getter 延迟获取，以便运行时修改模块级配置路径。
+    """
+    
+    __slots__ = ('_path_getter', '_default_factory', '_label', '_cache', '_lock')
+    
+    def __init__(self, path_getter: Callable[[], Path], default_factory: Callable[[], dict], label: str):
+        """
+        Args:
+            path_getter: 返回配置文件路径的函数
+            default_factory: 文件不存在或解析失败时返回默认配置的函数
+            label: 日志中使用的配置名称
+        """
+        self._path_getter = path_getter
+        self._default_factory = default_factory
+        self._label = label
+        self._cache: Optional[Tuple[Path, Tuple[int, int], dict]] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def path(self) -> Path:
+        return self._path_getter()
+    
+    def load(self) -> dict:
+        """加载配置，返回的字典与缓存共享，调用方不应直接修改"""
+        path = self.path
         try:
-            with open(OPENLIST_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            st = path.stat()
+        except OSError:
+            return self._default_factory()
+        key = (st.st_mtime_ns, st.st_size)
+        
+        with self._lock:
+            cached = self._cache
+            if cached and cached[0] == path and cached[1] == key:
+                return cached[2]
+            try:
+                config = orjson.loads(path.read_bytes())
+            except Exception as e:
+                logging.error(f"加载{self._label}配置失败: {e}")
+                return self._default_factory()
+            self._cache = (path, key, config)
+            return config
+    
+    def save(self, config: dict) -> bool:
+        """保存配置并刷新缓存"""
+        path = self.path
+        try:
+            data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+            with self._lock:
+                tmp = path.with_suffix(path.suffix + '.tmp')
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+                st = path.stat()
+                self._cache = (path, (st.st_mtime_ns, st.st_size), config)
+            return True
         except Exception as e:
-            logging.error(f"加载 OpenList 配置失败: {e}")
-    return {}
+            logging.error(f"保存{self._label}配置失败: {e}")
+            return False
+
+
+def _default_extensions_config() -> dict:
+    """默认文件扩展名配置"""
+    return {
+        'subtitle': '.srt,.ass,.ssa,.sub,.vtt',
+        'image': '.jpg,.jpeg,.png,.bmp,.gif,.webp',
+        'nfo': '.nfo',
+        'other': ''
+    }
+
+
+def _default_system_config() -> dict:
+    """默认系统通用配置"""
+    return {
+        'sync_retry_count': 3
+    }
+
+
+OPENLIST_CONFIG = _JsonConfig(lambda: OPENLIST_CONFIG_PATH, dict, ' OpenList ')
+WEBDAV_CONFIG = _JsonConfig(lambda: WEBDAV_CONFIG_PATH, dict, ' WebDAV ')
+EXTENSIONS_CONFIG = _JsonConfig(lambda: EXTENSIONS_CONFIG_PATH, _default_extensions_config, '文件扩展名')
+SYSTEM_CONFIG = _JsonConfig(lambda: SYSTEM_CONFIG_PATH, _default_system_config, '系统')
+
+
+def load_openlist_config() -> dict:
+    """加载 OpenList 配置"""
+    return OPENLIST_CONFIG.load()
 
 
 def save_openlist_config(config: dict) -> bool:
     """保存 OpenList 配置"""
-    try:
-        with open(OPENLIST_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logging.error(f"保存 OpenList 配置失败: {e}")
-        return False
+    return OPENLIST_CONFIG.save(config)
 
 
 def load_webdav_config() -> dict:
     """加载 WebDAV 配置"""
-    if WEBDAV_CONFIG_PATH.exists():
-        try:
-            with open(WEBDAV_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logging.error(f"加载 WebDAV 配置失败: {e}")
-    return {}
+    return WEBDAV_CONFIG.load()
 
 
 def save_webdav_config(config: dict) -> bool:
     """保存 WebDAV 配置"""
-    try:
-        with open(WEBDAV_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logging.error(f"保存 WebDAV 配置失败: {e}")
-        return False
+    return WEBDAV_CONFIG.save(config)
+
+
+def _pick(data: dict, *keys: str) -> dict:
+    """按顺序取出多个字符串字段并去除首尾空白，缺失或为 None 时视为空字符串"""
+    return {key: (data.get(key) or '').strip() for key in keys}
 
 
 def create_webdav_client(config: dict) -> WebDavClient:
@@ -96,12 +192,14 @@ def create_webdav_client(config: dict) -> WebDavClient:
 def get_openlist_config():
     """获取 OpenList 配置"""
     config = load_openlist_config()
-    # 不返回密码
-    if 'password' in config:
-        config_copy = config.copy()
-        config_copy['password'] = ''
-        return jsonify({'success': True, 'config': config_copy})
-    return jsonify({'success': True, 'config': config})
+    # 按公开字段构建响应，不返回密码，也不修改缓存中的配置
+    return jsonify({'success': True, 'config': {
+        'url': config.get('url', ''),
+        'username': config.get('username', ''),
+        'password': '',
+        'token': config.get('token', ''),
+        'public_url': config.get('public_url', '')
+    }})
 
 
 @settings_bp.route('/settings/openlist', methods=['POST'])
@@ -112,20 +210,14 @@ def save_openlist_config_api():
         if not data:
             return jsonify({'success': False, 'error': '无效的请求数据'}), 400
         
+        # 构建配置对象
+        config = _pick(data, 'url', 'username', 'password', 'token', 'public_url')
+        
         # 验证必需字段
-        url = data.get('url', '').strip()
+        url = config['url']
         if not url:
             return jsonify({'success': False, 'error': '服务器地址不能为空'}), 400
         
-        # 构建配置对象
-        config = {
-            'url': url,
-            'username': data.get('username', '').strip(),
-            'password': data.get('password', '').strip(),
-            'token': data.get('token', '').strip(),
-            'public_url': data.get('public_url', '').strip()
-        }
-        
         # 如果没有提供新密码，保留旧密码
         if not config['password']:
             old_config = load_openlist_config()
@@ -152,17 +244,18 @@ def test_openlist_connection():
         if not data:
             return jsonify({'success': False, 'error': '无效的请求数据'}), 400
         
-        url = data.get('url', '').strip()
-        username = data.get('username', '').strip()
-        password = data.get('password', '').strip()
-        token = data.get('token', '').strip()
+        fields = _pick(data, 'url', 'username', 'password', 'token')
+        url = fields['url']
+        username = fields['username']
+        password = fields['password']
+        token = fields['token']
         
         if not url:
             return jsonify({'success': False, 'error': '服务器地址不能为空'}), 400
         
         # 优先级：如果提供了 token，直接测试 token（即使也提供了用户名密码）
         if token:
-            test_result = _test_with_token(url, token)
+            test_result = _run_probe(_test_with_token, url, token)
             if test_result['success']:
                 return jsonify({'success': True, 'message': 'Token 验证成功'})
             else:
@@ -170,7 +263,7 @@ def test_openlist_connection():
         
         # 如果没有 token 但提供了用户名和密码，尝试登录获取 token
         elif username and password:
-            login_result = _login_openlist(url, username, password)
+            login_result = _run_probe(_login_openlist, url, username, password)
             if login_result['success']:
                 return jsonify({'success': True, 'message': '用户名密码验证成功'})
             else:
@@ -272,12 +365,22 @@ def api_webdav_directories():
         return jsonify({'success': False, 'error': str(e), 'current_path': path, 'directories': []})
 
 
+def _run_probe(func, *args) -> dict:
+    """在探测线程池中执行连接测试，超时返回错误结果"""
+    future = _PROBE_POOL.submit(func, *args)
+    try:
+        return future.result(timeout=_PROBE_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        return {'success': False, 'error': '连接超时'}
+
+
 def _test_with_token(url: str, token: str) -> dict:
     """使用 token 测试连接"""
     try:
         # 测试 /api/me 接口
         headers = {'Authorization': f'Bearer {token}'}
-        response = requests.get(f"{url}/api/me", headers=headers, timeout=10)
+        response = _HTTP.get(f"{url}/api/me", headers=headers, timeout=_HTTP_TIMEOUT, stream=False)
         
         if response.status_code == 200:
             data = response.json()
@@ -306,7 +409,7 @@ def _login_openlist(url: str, username: str, password: str) -> dict:
             'password': password
         }
         
-        response = requests.post(login_url, json=payload, timeout=10)
+        response = _HTTP.post(login_url, json=payload, timeout=_HTTP_TIMEOUT, stream=False)
         
         if response.status_code == 200:
             data = response.json()
@@ -331,32 +434,17 @@ def _login_openlist(url: str, username: str, password: str) -> dict:
 
 # ========== 文件扩展名设置 ==========
 
+# 匹配逗号分隔列表中第一个不以点开头的非空扩展名
+_BAD_EXT_RE = re.compile(r'(?:^|,)\s*([^.,\s][^,]*?)\s*(?=,|$)')
+
 def load_extensions_config() -> dict:
     """加载文件扩展名配置"""
-    if EXTENSIONS_CONFIG_PATH.exists():
-        try:
-            with open(EXTENSIONS_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logging.error(f"加载文件扩展名配置失败: {e}")
-    # 返回默认配置
-    return {
-        'subtitle': '.srt,.ass,.ssa,.sub,.vtt',
-        'image': '.jpg,.jpeg,.png,.bmp,.gif,.webp',
-        'nfo': '.nfo',
-        'other': ''
-    }
+    return EXTENSIONS_CONFIG.load()
 
 
 def save_extensions_config(config: dict) -> bool:
     """保存文件扩展名配置"""
-    try:
-        with open(EXTENSIONS_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logging.error(f"保存文件扩展名配置失败: {e}")
-        return False
+    return EXTENSIONS_CONFIG.save(config)
 
 
 @settings_bp.route('/settings/extensions', methods=['GET'])
@@ -375,23 +463,17 @@ def save_extensions_config_api():
             return jsonify({'success': False, 'error': '无效的请求数据'}), 400
         
         # 构建配置对象
-        config = {
-            'subtitle': data.get('subtitle', '').strip(),
-            'image': data.get('image', '').strip(),
-            'nfo': data.get('nfo', '').strip(),
-            'other': data.get('other', '').strip()
-        }
+        config = _pick(data, 'subtitle', 'image', 'nfo', 'other')
         
         # 验证扩展名格式
         for key, value in config.items():
             if value and key != 'other':  # other 可以为空
-                exts = [e.strip() for e in value.split(',') if e.strip()]
-                for ext in exts:
-                    if not ext.startswith('.'):
-                        return jsonify({
-                            'success': False, 
-                            'error': f'扩展名格式错误: "{ext}" 必须以点开头'
-                        }), 400
+                bad = _BAD_EXT_RE.search(value)
+                if bad:
+                    return jsonify({
+                        'success': False, 
+                        'error': f'扩展名格式错误: "{bad.group(1)}" 必须以点开头'
+                    }), 400
         
         # 保存配置
         if save_extensions_config(config):
@@ -409,27 +491,12 @@ def save_extensions_config_api():
 
 def load_system_config() -> dict:
     """加载系统通用配置"""
-    if SYSTEM_CONFIG_PATH.exists():
-        try:
-            with open(SYSTEM_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            logging.error(f"加载系统配置失败: {e}")
-    # 返回默认配置
-    return {
-        'sync_retry_count': 3
-    }
+    return SYSTEM_CONFIG.load()
 
 
 def save_system_config(config: dict) -> bool:
     """保存系统通用配置"""
-    try:
-        with open(SYSTEM_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logging.error(f"保存系统配置失败: {e}")
-        return False
+    return SYSTEM_CONFIG.save(config)
 
 
 @settings_bp.route('/settings/system', methods=['GET'])
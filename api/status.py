@@ -1,13 +1,33 @@
 """
 状态与系统信息 API 蓝图
 """
+import heapq
+import os
+import stat
+import threading
+import time
+from collections import Counter
+from typing import Optional
 import psutil
 from datetime import datetime
 from pathlib import Path
-from flask import Blueprint, jsonify
+import orjson
+from flask import Blueprint, Response, jsonify
+
+from core.models import TaskStatus
 
 status_bp = Blueprint('status', __name__)
 
+# 系统资源信息缓存，避免频繁轮询时重复采样
+SYSTEM_INFO_TTL = 1.5  # 秒
+_SYS_CACHE = {'ts': 0.0, 'data': None}
+_SYS_CACHE_LOCK = threading.Lock()
+
+# CPU 使用率由后台线程定期采样，请求线程只读取最近一次结果
+CPU_SAMPLE_INTERVAL = 2.0  # 秒
+_cpu_percent = 0.0
+_cpu_sampler: Optional[threading.Thread] = None
+
 
 def init_status_bp(scheduler, config_path: str, is_docker: bool, version: str):
     """初始化状态蓝图，注入依赖"""
@@ -15,63 +35,128 @@ def init_status_bp(scheduler, config_path: str, is_docker: bool, version: str):
     status_bp.config_path = config_path
     status_bp.is_docker = is_docker
     status_bp.version = version
+    
+    # 与请求无关的不变字段，在初始化时计算一次
+    status_bp.config_path_obj = Path(config_path)
+    status_bp.config_dir_obj = status_bp.config_path_obj.parent
+    status_bp.static_response_base = {
+        'config_path': str(config_path),
+        'is_docker': is_docker,
+        'version': version
+    }
+    
+    _start_cpu_sampler()
+
+
+def _start_cpu_sampler():
+    """启动 CPU 采样线程（幂等）"""
+    global _cpu_sampler
+    if _cpu_sampler is not None and _cpu_sampler.is_alive():
+        return
+    # 预热：interval=None 的首次调用总是返回 0
+    psutil.cpu_percent(interval=None)
+    _cpu_sampler = threading.Thread(target=_sample_cpu_loop, daemon=True, name="CpuSampler")
+    _cpu_sampler.start()
+
+
+def _sample_cpu_loop():
+    """每隔 CPU_SAMPLE_INTERVAL 秒记录一次 CPU 使用率"""
+    global _cpu_percent
+    while True:
+        time.sleep(CPU_SAMPLE_INTERVAL)
+        try:
+            _cpu_percent = psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+
+
+def _safe_stat(path: Path) -> Optional[os.stat_result]:
+    """stat 路径，不存在或不可访问时返回 None"""
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _get_system_info() -> dict:
+    """获取系统资源信息（带短期缓存）"""
+    now = time.monotonic()
+    with _SYS_CACHE_LOCK:
+        if _SYS_CACHE['data'] is not None and now - _SYS_CACHE['ts'] < SYSTEM_INFO_TTL:
+            return _SYS_CACHE['data']
+        
+        memory = psutil.virtual_memory()
+        disk_usage = psutil.disk_usage('/')
+        data = {
+            'cpu_percent': _cpu_percent,
+            'memory_total': memory.total,
+            'memory_used': memory.used,
+            'memory_percent': memory.percent,
+            'memory_available': memory.available,
+            'disk_total': disk_usage.total,
+            'disk_used': disk_usage.used,
+            'disk_free': disk_usage.free,
+            'disk_percent': disk_usage.percent
+        }
+        _SYS_CACHE['ts'] = now
+        _SYS_CACHE['data'] = data
+        return data
 
 
 @status_bp.route('/status', methods=['GET'])
 def api_status():
     """获取系统状态"""
     scheduler = status_bp.scheduler
-    config_path = status_bp.config_path
-    is_docker = status_bp.is_docker
-    version = status_bp.version
     
-    # 获取系统资源信息
-    memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    disk_usage = psutil.disk_usage('/')
+    # 统计任务状态（单次遍历）
+    total = 0
+    enabled = 0
+    status_counts = Counter()
+    for t in scheduler.tasks.values():
+        total += 1
+        if t.enabled:
+            enabled += 1
+        status_counts[t.status] += 1
     
-    # 统计任务状态
     task_stats = {
-        'total': len(scheduler.tasks),
-        'enabled': sum(1 for t in scheduler.tasks.values() if t.enabled),
-        'disabled': sum(1 for t in scheduler.tasks.values() if not t.enabled),
-        'idle': sum(1 for t in scheduler.tasks.values() if t.status.value == 'IDLE'),
-        'running': sum(1 for t in scheduler.tasks.values() if t.status.value == 'RUNNING'),
-        'queued': sum(1 for t in scheduler.tasks.values() if t.status.value == 'QUEUED'),
-        'error': sum(1 for t in scheduler.tasks.values() if t.status.value == 'ERROR')
+        'total': total,
+        'enabled': enabled,
+        'disabled': total - enabled,
+        'idle': status_counts.get(TaskStatus.IDLE, 0),
+        'running': status_counts.get(TaskStatus.RUNNING, 0),
+        'queued': status_counts.get(TaskStatus.QUEUED, 0),
+        'error': status_counts.get(TaskStatus.ERROR, 0)
     }
     
     # 获取最近执行任务
-    recent_tasks = sorted(
-        [t for t in scheduler.tasks.values() if t.last_run_time],
-        key=lambda x: x.last_run_time or '',
-        reverse=True
-    )[:5]
+    recent_tasks = heapq.nlargest(
+        5,
+        (t for t in scheduler.tasks.values() if t.last_run_time),
+        key=lambda x: x.last_run_time
+    )
     
-    # 配置文件信息
+    # 配置文件信息：文件与所在目录各 stat 一次，其余状态由 st_mode 推导
+    file_st = _safe_stat(status_bp.config_path_obj)
+    dir_st = _safe_stat(status_bp.config_dir_obj)
     config_stat = None
-    config_path_obj = Path(config_path)
-    if config_path_obj.exists():
-        stat = config_path_obj.stat()
+    if file_st is not None:
         config_stat = {
-            'size': stat.st_size,
-            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()
+            'size': file_st.st_size,
+            'modified': datetime.fromtimestamp(file_st.st_mtime).isoformat()
         }
     
-    return jsonify({
+    response = dict(status_bp.static_response_base)
+    response.update({
         'running': scheduler.is_running,
         'queue_size': scheduler.get_queue_size(),
-        'task_count': len(scheduler.tasks),
-        'config_path': str(config_path),
-        'is_docker': is_docker,
-        'version': version,
+        'task_count': total,
         
         # 配置健康状态
         'config_health': {
-            'exists': config_path_obj.exists(),
-            'dir_exists': config_path_obj.parent.exists(),
-            'dir_writable': config_path_obj.parent.exists() and config_path_obj.parent.is_dir(),
-            'file_writable': config_path_obj.is_file() if config_path_obj.exists() else None,
+            'exists': file_st is not None,
+            'dir_exists': dir_st is not None,
+            'dir_writable': dir_st is not None and stat.S_ISDIR(dir_st.st_mode),
+            'file_writable': stat.S_ISREG(file_st.st_mode) if file_st is not None else None,
             'file_stat': config_stat
         },
         
@@ -89,18 +174,9 @@ def api_status():
         ],
         
         # 系统资源
-        'system': {
-            'cpu_percent': cpu_percent,
-            'memory_total': memory.total,
-            'memory_used': memory.used,
-            'memory_percent': memory.percent,
-            'memory_available': memory.available,
-            'disk_total': disk_usage.total,
-            'disk_used': disk_usage.used,
-            'disk_free': disk_usage.free,
-            'disk_percent': disk_usage.percent
-        }
+        'system': _get_system_info()
     })
+    return jsonify(response)
 
 
 @status_bp.route('/scheduler/start', methods=['POST'])
@@ -123,24 +199,37 @@ def api_stop_scheduler():
 
 @status_bp.route('/queue', methods=['GET'])
 def api_queue():
-    """获取当前任务队列信息"""
+    """获取当前任务队列信息（流式输出，内存占用与队列长度无关）"""
     scheduler = status_bp.scheduler
-    queue_tasks = []
     
-    # 获取队列中的任务（不移除）
-    with scheduler.task_queue.mutex:
-        queue_list = list(scheduler.task_queue.queue)
+    # 获取队列中的任务（不移除）：deque.copy() 是原子操作，序列化在快照上进行
+    queue_list = scheduler.task_queue.copy()
     
-    for task_id in queue_list:
-        task = scheduler.get_task(task_id)
-        if task:
+    def generate():
+        yield b'{"queue":['
+        first = True
+        for queue_item in queue_list:
+            # 队列项为 (system_key, task_id)，兼容旧版本只有 task_id
+            if isinstance(queue_item, tuple) and len(queue_item) == 2:
+                system_key, task_id = queue_item
+            else:
+                system_key, task_id = 'sync', queue_item
+            
+            if system_key == 'strm':
+                task = scheduler.strm_tasks.get(task_id)
+            else:
+                task = scheduler.get_task(task_id)
+            if not task:
+                continue
+            
             data = task.to_dict()
             # 添加下次执行时间
-            next_run_time = scheduler.get_next_run_time(task.id)
-            if next_run_time:
-                data['next_run_time'] = next_run_time.isoformat()
-            else:
-                data['next_run_time'] = None
-            queue_tasks.append(data)
+            next_run_time = scheduler.get_next_run_time(task.id, system_key)
+            data['next_run_time'] = next_run_time.isoformat() if next_run_time else None
+            
+            chunk = orjson.dumps(data)
+            yield chunk if first else b',' + chunk
+            first = False
+        yield b']}'
     
-    return jsonify({'queue': queue_tasks})
+    return Response(generate(), mimetype='application/json')
@@ -1,16 +1,27 @@
 """
 STRM 任务管理 API 蓝图
 """
+import atexit
 import logging
 import threading
-from typing import Dict
-from flask import Blueprint, jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import orjson
+from flask import Blueprint, Response, jsonify, request
 
-from core.models import StrmTask
+from api import parse_bool
+from core.models import StrmTask, TaskStatus, parse_schedule_type, parse_strm_mode
+from core.scheduler import validate_cron
 from core.strm_generator import StrmGenerator
 
 strm_bp = Blueprint('strm', __name__)
 
+# 全量覆盖 / 缓存重构共用的后台线程池，排队数量有上限
+_STRM_BG_WORKERS = 4
+_STRM_BG_MAX_PENDING = 32
+_STRM_BG = ThreadPoolExecutor(max_workers=_STRM_BG_WORKERS, thread_name_prefix='strm-bg')
+_STRM_BG_SLOTS = threading.BoundedSemaphore(_STRM_BG_WORKERS + _STRM_BG_MAX_PENDING)
+
 
 def init_strm_bp(scheduler, log_handler):
     """初始化 STRM 任务蓝图，注入依赖"""
@@ -18,21 +29,35 @@ def init_strm_bp(scheduler, log_handler):
     strm_bp.log_handler = log_handler
 
 
-def _task_to_dict(task: StrmTask) -> dict:
-    """将 STRM 任务对象转换为字典"""
+# 用于区分“未传入 job”与“已知没有 job（None）”
+_UNSET = object()
+
+
+def _task_to_dict(task: StrmTask, job_map: Optional[Dict[str, object]] = None, job=_UNSET) -> dict:
+    """
+    将 STRM 任务对象转换为字典
+    
+    Args:
+        task: STRM 任务
+        job_map: job_id -> job 映射，批量转换时预先取出，避免逐个查询 jobstore
+        job: 调用方已持有的 APScheduler job（可为 None），传入时不再查询
+    """
     scheduler = strm_bp.scheduler
     data = task.to_dict()
     
     # 添加下次执行时间
-    job_id = f"strm_{task.id}"
-    job = scheduler.scheduler.get_job(job_id)
+    if job is _UNSET:
+        if job_map is not None:
+            job = job_map.get(task.job_id)
+        else:
+            job = scheduler.scheduler.get_job(task.job_id)
     if job and job.next_run_time:
         data['next_run_time'] = job.next_run_time.isoformat()
     else:
         data['next_run_time'] = None
     
     # 添加任务进度（如果正在执行）
-    if task.status.value == 'RUNNING' and task.id in scheduler.task_progress:
+    if task.status is TaskStatus.RUNNING and task.id in scheduler.task_progress:
         data['progress'] = scheduler.task_progress[task.id]
     
     # 添加最终统计信息（如果有）
@@ -42,13 +67,113 @@ def _task_to_dict(task: StrmTask) -> dict:
     return data
 
 
-def _parse_bool(value, default=False):
-    """解析布尔值"""
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, str):
-        return value.lower() in {'true', '1', 'yes', 'on'}
-    return default
+def _submit_background(func) -> bool:
+    """提交后台任务，线程池已满时返回 False"""
+    if not _STRM_BG_SLOTS.acquire(blocking=False):
+        return False
+    try:
+        future = _STRM_BG.submit(func)
+    except RuntimeError:
+        # 线程池已关闭（进程退出中）
+        _STRM_BG_SLOTS.release()
+        return False
+    future.add_done_callback(lambda _: _STRM_BG_SLOTS.release())
+    return True
+
+
+@atexit.register
+def _shutdown_background():
+    _STRM_BG.shutdown(wait=False)
+
+
+def _identity(value):
+    return value
+
+
+# 创建 STRM 任务时的通用字段：(字段名, 解析函数, 默认值)
+_STRM_FIELD_SPEC = (
+    ('enabled', parse_bool, True),
+    ('openlist_url', _identity, None),
+    ('openlist_username', _identity, None),
+    ('openlist_password', _identity, None),
+    ('openlist_token', _identity, None),
+    ('openlist_public_url', _identity, None),
+    ('mode', _identity, 'AlistURL'),
+    ('flatten_mode', parse_bool, False),
+    ('subtitle', parse_bool, False),
+    ('image', parse_bool, False),
+    ('nfo', parse_bool, False),
+    ('overwrite', parse_bool, False),
+    ('other_ext', _identity, None),
+    ('max_workers', int, 50),
+    ('max_downloaders', int, 5),
+    ('wait_time', float, 0),
+    ('sync_server', parse_bool, False),
+    ('sync_local_delete', parse_bool, False),
+    ('sync_ignore', _identity, None),
+    ('suffix_mode', _identity, 'NONE'),
+    # 以下两项为空时由 StrmTask 生成默认值，避免共享可变默认对象
+    ('suffix_list', _identity, None),
+    ('smart_protection', _identity, None),
+)
+
+
+def _build_strm_kwargs(data: dict) -> dict:
+    """根据请求数据构造 StrmTask 的通用参数（不含调度相关字段）"""
+    kwargs = {
+        'name': data['name'],
+        'source_dir': data['source_dir'],
+        'target_dir': data['target_dir'],
+    }
+    for key, parser, default in _STRM_FIELD_SPEC:
+        value = data.get(key, default)
+        if parser is parse_bool:
+            kwargs[key] = parse_bool(value, default)
+        else:
+            kwargs[key] = parser(value)
+    return kwargs
+
+
+def _parse_suffix_list(value) -> list:
+    """与 StrmTask 初始化保持一致：小写并去掉前导点"""
+    return [s.lower().lstrip(".") for s in value] if value else []
+
+
+# 更新 STRM 任务时允许修改的字段：(字段名, 解析函数)
+_STRM_PUT_FIELDS = (
+    ('name', _identity),
+    ('source_dir', _identity),
+    ('target_dir', _identity),
+    ('interval', int),
+    ('schedule_type', parse_schedule_type),
+    ('cron_expression', _identity),
+    ('enabled', lambda v: parse_bool(v, True)),
+    # OpenList 配置
+    ('openlist_url', _identity),
+    ('openlist_username', _identity),
+    ('openlist_password', _identity),
+    ('openlist_token', _identity),
+    ('openlist_public_url', _identity),
+    # STRM 配置
+    ('mode', parse_strm_mode),
+    ('flatten_mode', parse_bool),
+    ('subtitle', parse_bool),
+    ('image', parse_bool),
+    ('nfo', parse_bool),
+    ('overwrite', parse_bool),
+    ('other_ext', _identity),
+    # 性能配置
+    ('max_workers', int),
+    ('max_downloaders', int),
+    ('wait_time', float),
+    # 同步配置
+    ('sync_server', parse_bool),
+    ('sync_local_delete', parse_bool),
+    ('sync_ignore', _identity),
+    ('suffix_mode', lambda v: (v or "NONE").upper()),
+    ('suffix_list', _parse_suffix_list),
+    ('smart_protection', _identity),
+)
 
 
 @strm_bp.route('/strm/tasks', methods=['GET', 'POST'])
@@ -57,8 +182,10 @@ def api_strm_tasks():
     scheduler = strm_bp.scheduler
     
     if request.method == 'GET':
-        tasks = [_task_to_dict(t) for t in scheduler.strm_tasks.values()]
-        return jsonify({'tasks': tasks})
+        jobs = {job.id: job for job in scheduler.scheduler.get_jobs()}
+        tasks = [_task_to_dict(t, jobs) for t in scheduler.strm_tasks.values()]
+        # 任务列表可能较大，直接用 orjson 输出紧凑、不排序的 bytes
+        return Response(orjson.dumps({'tasks': tasks}), mimetype='application/json')
     
     # POST - 创建新任务
     data = request.get_json(silent=True) or {}
@@ -71,6 +198,8 @@ def api_strm_tasks():
     schedule_type = data.get('schedule_type', 'INTERVAL')
     
     try:
+        kwargs = _build_strm_kwargs(data)
+        
         if schedule_type == 'CRON':
             # Cron 调度
             cron_expression = data.get('cron_expression', '').strip()
@@ -78,40 +207,13 @@ def api_strm_tasks():
                 return jsonify({'success': False, 'error': 'Cron 表达式不能为空'}), 400
             
             # 验证 cron 表达式格式
-            parts = cron_expression.split()
-            if len(parts) != 5:
-                return jsonify({'success': False, 'error': 'Cron 表达式格式错误，应为 5 个字段：分 时 日 月 星期'}), 400
+            error = validate_cron(cron_expression)
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
             
-            task = StrmTask(
-                name=data['name'],
-                source_dir=data['source_dir'],
-                target_dir=data['target_dir'],
-                schedule_type='CRON',
-                cron_expression=cron_expression,
-                interval=3600,  # cron 模式下 interval 不使用，但 need 默认值
-                enabled=_parse_bool(data.get('enabled', True), True),
-                openlist_url=data.get('openlist_url'),
-                openlist_username=data.get('openlist_username'),
-                openlist_password=data.get('openlist_password'),
-                openlist_token=data.get('openlist_token'),
-                openlist_public_url=data.get('openlist_public_url'),
-                mode=data.get('mode', 'AlistURL'),
-                flatten_mode=_parse_bool(data.get('flatten_mode', False), False),
-                subtitle=_parse_bool(data.get('subtitle', False), False),
-                image=_parse_bool(data.get('image', False), False),
-                nfo=_parse_bool(data.get('nfo', False), False),
-                overwrite=_parse_bool(data.get('overwrite', False), False),
-                other_ext=data.get('other_ext'),
-                max_workers=int(data.get('max_workers', 50)),
-                max_downloaders=int(data.get('max_downloaders', 5)),
-                wait_time=float(data.get('wait_time', 0)),
-                sync_server=_parse_bool(data.get('sync_server', False), False),
-                sync_local_delete=_parse_bool(data.get('sync_local_delete', False), False),
-                sync_ignore=data.get('sync_ignore'),
-                suffix_mode=data.get('suffix_mode', 'NONE'),
-                suffix_list=data.get('suffix_list', []),
-                smart_protection=data.get('smart_protection', {"threshold": 100, "grace_scans": 3})
-            )
+            kwargs['schedule_type'] = 'CRON'
+            kwargs['cron_expression'] = cron_expression
+            kwargs['interval'] = 3600  # cron 模式下 interval 不使用，但 need 默认值
         else:
             # 间隔调度
             try:
@@ -122,55 +224,29 @@ def api_strm_tasks():
             if interval < 60:
                 return jsonify({'success': False, 'error': '同步间隔需大于等于 60 秒'}), 400
             
-            task = StrmTask(
-                name=data['name'],
-                source_dir=data['source_dir'],
-                target_dir=data['target_dir'],
-                schedule_type='INTERVAL',
-                interval=interval,
-                enabled=_parse_bool(data.get('enabled', True), True),
-                openlist_url=data.get('openlist_url'),
-                openlist_username=data.get('openlist_username'),
-                openlist_password=data.get('openlist_password'),
-                openlist_token=data.get('openlist_token'),
-                openlist_public_url=data.get('openlist_public_url'),
-                mode=data.get('mode', 'AlistURL'),
-                flatten_mode=_parse_bool(data.get('flatten_mode', False), False),
-                subtitle=_parse_bool(data.get('subtitle', False), False),
-                image=_parse_bool(data.get('image', False), False),
-                nfo=_parse_bool(data.get('nfo', False), False),
-                overwrite=_parse_bool(data.get('overwrite', False), False),
-                other_ext=data.get('other_ext'),
-                max_workers=int(data.get('max_workers', 50)),
-                max_downloaders=int(data.get('max_downloaders', 5)),
-                wait_time=float(data.get('wait_time', 0)),
-                sync_server=_parse_bool(data.get('sync_server', False), False),
-                sync_local_delete=_parse_bool(data.get('sync_local_delete', False), False),
-                sync_ignore=data.get('sync_ignore'),
-                suffix_mode=data.get('suffix_mode', 'NONE'),
-                suffix_list=data.get('suffix_list', []),
-                smart_protection=data.get('smart_protection', {"threshold": 100, "grace_scans": 3})
-            )
+            kwargs['schedule_type'] = 'INTERVAL'
+            kwargs['interval'] = interval
+        
+        task = StrmTask(**kwargs)
         
         # 添加到调度器
         scheduler.strm_tasks[task.id] = task
         
         # 如果任务启用且调度器已运行，则添加定时任务
+        job = None
         if task.enabled and scheduler.is_running:
-            scheduler._schedule_task(task, system_key='strm')
+            job = scheduler._schedule_task(task, system_key='strm')
         
         # 保存配置
-        scheduler.save_strm_tasks()
+        scheduler._request_save_strm_tasks()
         
         if strm_bp.log_handler:
             strm_bp.log_handler(f"✓ STRM 任务添加完成: {task.name}")
         
-        return jsonify({'success': True, 'task': _task_to_dict(task)})
+        return jsonify({'success': True, 'task': _task_to_dict(task, job=job)})
         
     except Exception as e:
-        logging.error(f"创建 STRM 任务失败: {e}")
-        import traceback
-        logging.error(traceback.format_exc())
+        logging.exception(f"创建 STRM 任务失败: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -191,7 +267,7 @@ def api_strm_task(task_id: str):
         task = scheduler.strm_tasks[task_id]
         
         # 从调度器中移除
-        job_id = f"strm_{task_id}"
+        job_id = task.job_id
         if scheduler.scheduler.get_job(job_id):
             scheduler.scheduler.remove_job(job_id)
         
@@ -199,7 +275,7 @@ def api_strm_task(task_id: str):
         del scheduler.strm_tasks[task_id]
         
         # 保存配置
-        scheduler.save_strm_tasks()
+        scheduler._request_save_strm_tasks()
         
         if strm_bp.log_handler:
             strm_bp.log_handler(f"✓ STRM 任务已移除: {task.name}")
@@ -216,72 +292,25 @@ def api_strm_task(task_id: str):
         old_cron = task.cron_expression
         old_schedule_type = task.schedule_type
         
+        cron_expression = data.get('cron_expression')
+        if isinstance(cron_expression, str) and cron_expression.strip():
+            error = validate_cron(cron_expression.strip())
+            if error:
+                return jsonify({'success': False, 'error': error}), 400
+        
+        # 先解析全部字段，任一字段非法时直接返回 400，任务保持不变
+        updates = {}
+        for key, parser in _STRM_PUT_FIELDS:
+            if key in data:
+                try:
+                    updates[key] = parser(data[key])
+                except (TypeError, ValueError) as e:
+                    return jsonify({'success': False, 'error': f"字段 {key} 无效: {e}"}), 400
+        
         try:
             # 更新字段
-            if 'name' in data:
-                task.name = data['name']
-            if 'source_dir' in data:
-                task.source_dir = data['source_dir']
-            if 'target_dir' in data:
-                task.target_dir = data['target_dir']
-            if 'interval' in data:
-                task.interval = int(data['interval'])
-            if 'schedule_type' in data:
-                task.schedule_type = data['schedule_type']
-            if 'cron_expression' in data:
-                task.cron_expression = data['cron_expression']
-            if 'enabled' in data:
-                task.enabled = _parse_bool(data['enabled'], True)
-            
-            # OpenList 配置
-            if 'openlist_url' in data:
-                task.openlist_url = data['openlist_url']
-            if 'openlist_username' in data:
-                task.openlist_username = data['openlist_username']
-            if 'openlist_password' in data:
-                task.openlist_password = data['openlist_password']
-            if 'openlist_token' in data:
-                task.openlist_token = data['openlist_token']
-            if 'openlist_public_url' in data:
-                task.openlist_public_url = data['openlist_public_url']
-            
-            # STRM 配置
-            if 'mode' in data:
-                task.mode = data['mode']
-            if 'flatten_mode' in data:
-                task.flatten_mode = _parse_bool(data['flatten_mode'], False)
-            if 'subtitle' in data:
-                task.subtitle = _parse_bool(data['subtitle'], False)
-            if 'image' in data:
-                task.image = _parse_bool(data['image'], False)
-            if 'nfo' in data:
-                task.nfo = _parse_bool(data['nfo'], False)
-            if 'overwrite' in data:
-                task.overwrite = _parse_bool(data['overwrite'], False)
-            if 'other_ext' in data:
-                task.other_ext = data['other_ext']
-            
-            # 性能配置
-            if 'max_workers' in data:
-                task.max_workers = int(data['max_workers'])
-            if 'max_downloaders' in data:
-                task.max_downloaders = int(data['max_downloaders'])
-            if 'wait_time' in data:
-                task.wait_time = float(data['wait_time'])
-            
-            # 同步配置
-            if 'sync_server' in data:
-                task.sync_server = _parse_bool(data['sync_server'], False)
-            if 'sync_local_delete' in data:
-                task.sync_local_delete = _parse_bool(data['sync_local_delete'], False)
-            if 'sync_ignore' in data:
-                task.sync_ignore = data['sync_ignore']
-            if 'suffix_mode' in data:
-                task.suffix_mode = data['suffix_mode']
-            if 'suffix_list' in data:
-                task.suffix_list = data['suffix_list']
-            if 'smart_protection' in data:
-                task.smart_protection = data['smart_protection']
+            for key, value in updates.items():
+                setattr(task, key, value)
             
             # 如果间隔、启用状态或调度类型改变，重新调度
             schedule_changed = (
@@ -291,26 +320,33 @@ def api_strm_task(task_id: str):
                 task.cron_expression != old_cron
             )
             
+            job = _UNSET
             if schedule_changed and scheduler.is_running:
-                job_id = f"strm_{task_id}"
-                if scheduler.scheduler.get_job(job_id):
-                    scheduler.scheduler.remove_job(job_id)
-                
-                if task.enabled:
-                    scheduler._schedule_task(task, system_key='strm')
+                job_id = task.job_id
+                job = scheduler.scheduler.get_job(job_id)
+                if job and task.enabled:
+                    # 任务保持启用：原地替换 trigger，不重建 job
+                    trigger = scheduler._build_trigger(task)
+                    if trigger is not None:
+                        job = scheduler.scheduler.reschedule_job(job_id, trigger=trigger)
+                    else:
+                        scheduler.scheduler.remove_job(job_id)
+                        job = None
+                else:
+                    if job:
+                        scheduler.scheduler.remove_job(job_id)
+                    job = scheduler._schedule_task(task, system_key='strm') if task.enabled else None
             
             # 保存配置
-            scheduler.save_strm_tasks()
+            scheduler._request_save_strm_tasks()
             
             if strm_bp.log_handler:
                 strm_bp.log_handler(f"✓ STRM 任务已更新: {task.name}")
             
-            return jsonify({'success': True, 'task': _task_to_dict(task)})
+            return jsonify({'success': True, 'task': _task_to_dict(task, job=job)})
             
         except Exception as e:
-            logging.error(f"更新 STRM 任务失败: {e}")
-            import traceback
-            logging.error(traceback.format_exc())
+            logging.exception(f"更新 STRM 任务失败: {e}")
             return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -324,7 +360,7 @@ def api_trigger_strm_task(task_id: str):
     
     task = scheduler.strm_tasks[task_id]
     
-    if task.status.value != 'IDLE':
+    if task.status is not TaskStatus.IDLE:
         return jsonify({'success': False, 'error': f'任务状态非空闲，无法立即执行 (状态: {task.status.value})'}), 400
     
     # 手动触发
@@ -348,7 +384,7 @@ def api_toggle_strm_task(task_id: str):
     task.enabled = not task.enabled
     
     # 更新调度
-    job_id = f"strm_{task_id}"
+    job_id = task.job_id
     if scheduler.is_running:
         if scheduler.scheduler.get_job(job_id):
             scheduler.scheduler.remove_job(job_id)
@@ -357,7 +393,7 @@ def api_toggle_strm_task(task_id: str):
             scheduler._schedule_task(task, system_key='strm')
     
     # 保存配置
-    scheduler.save_strm_tasks()
+    scheduler._request_save_strm_tasks()
     
     status_text = "启用" if task.enabled else "禁用"
     if strm_bp.log_handler:
@@ -376,7 +412,7 @@ def api_strm_full_overwrite(task_id: str):
         return jsonify({'success': False, 'error': '任务不存在'}), 404
     
     task = scheduler.strm_tasks[task_id]
-    if task.status.value != 'IDLE':
+    if task.status is not TaskStatus.IDLE:
         return jsonify({'success': False, 'error': '任务状态非空闲，无法执行'}), 400
     
     def run_full_overwrite():
@@ -389,7 +425,8 @@ def api_strm_full_overwrite(task_id: str):
         except Exception as e:
             log_handler(f"❌ 任务「{task.name}」执行失败: {e}")
             
-    threading.Thread(target=run_full_overwrite, daemon=True).start()
+    if not _submit_background(run_full_overwrite):
+        return jsonify({'success': False, 'error': '后台任务过多，请稍后再试'}), 429
     return jsonify({'success': True, 'message': '任务已启动'})
 
 
@@ -403,7 +440,7 @@ def api_strm_reconstruct(task_id: str):
         return jsonify({'success': False, 'error': '任务不存在'}), 404
     
     task = scheduler.strm_tasks[task_id]
-    if task.status.value != 'IDLE':
+    if task.status is not TaskStatus.IDLE:
         return jsonify({'success': False, 'error': '任务状态非空闲，无法执行'}), 400
     
     def run_reconstruction():
@@ -415,5 +452,6 @@ def api_strm_reconstruct(task_id: str):
         except Exception as e:
             log_handler(f"❌ 任务「{task.name}」缓存重构失败: {e}")
             
-    threading.Thread(target=run_reconstruction, daemon=True).start()
+    if not _submit_background(run_reconstruction):
+        return jsonify({'success': False, 'error': '后台任务过多，请稍后再试'}), 429
     return jsonify({'success': True, 'message': '缓存重构已在后台启动'})
@@ -4,57 +4,122 @@
 import os
 import threading
 import random
-import requests
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Optional
-from flask import Blueprint, jsonify, request
-from apscheduler.triggers.cron import CronTrigger
+import orjson
+from flask import Blueprint, Response, jsonify, request
 
-from core.models import COPY_MODES, TARGET_TYPES, SyncTask
+from api import parse_bool
+from core.models import COPY_MODES, TARGET_TYPES, SyncTask, TaskStatus, normalize_suffix_list
+from core.scheduler import build_cron_trigger, validate_cron
 from core.worker import FileSyncer
 
 tasks_bp = Blueprint('tasks', __name__)
 
 
-def init_tasks_bp(scheduler, log_handler, is_docker: bool, task_logs, log_lock):
-    """初始化任务蓝图，注入依赖"""
+def init_tasks_bp(scheduler, log_handler, is_docker: bool, task_logs):
+    """
+    初始化任务蓝图，注入依赖
+    
+    task_logs 为 task_id -> deque 的映射，deque 自身保证 append/clear 线程安全
+    """
     tasks_bp.scheduler = scheduler
     tasks_bp.log_handler = log_handler
     tasks_bp.is_docker = is_docker
     tasks_bp.task_logs = task_logs
-    tasks_bp.log_lock = log_lock
 
 
-def _task_to_dict(task: SyncTask) -> dict:
-    """将任务对象转换为字典"""
+def _tasks_to_dicts(tasks) -> list:
+    """批量将任务对象转换为字典，调度器属性只查找一次"""
     scheduler = tasks_bp.scheduler
-    data = task.to_dict()
-    # 添加下次执行时间
-    next_run_time = scheduler.get_next_run_time(task.id)
-    if next_run_time:
-        data['next_run_time'] = next_run_time.isoformat()
-    else:
-        data['next_run_time'] = None
+    get_next_run_time = scheduler.get_next_run_time
+    task_progress = scheduler.task_progress
+    task_stats = scheduler.task_stats
+    running = TaskStatus.RUNNING
     
-    # 添加任务进度（如果正在执行）
-    if task.status.value == 'RUNNING' and task.id in scheduler.task_progress:
-        data['progress'] = scheduler.task_progress[task.id]
+    result = []
+    for task in tasks:
+        task_id = task.id
+        data = task.to_dict()
+        # 添加下次执行时间
+        next_run_time = get_next_run_time(task_id)
+        data['next_run_time'] = next_run_time.isoformat() if next_run_time else None
+        
+        # 添加任务进度（如果正在执行）
+        if task.status is running and task_id in task_progress:
+            data['progress'] = task_progress[task_id]
+        
+        # 添加最终统计信息（如果有）
+        if task_id in task_stats:
+            data['stats'] = task_stats[task_id]
+        result.append(data)
+    return result
+
+
+def _task_to_dict(task: SyncTask) -> dict:
+    """将任务对象转换为字典"""
+    return _tasks_to_dicts((task,))[0]
+
+
+# 固定错误信息的响应体缓存：message -> bytes
+_ERROR_BODIES: Dict[str, bytes] = {}
+
+
+def _error(message: str, status: int = 400) -> Response:
+    """
+    构造固定错误信息的 JSON 响应
     
-    # 添加最终统计信息（如果有）
-    if task.id in scheduler.task_stats:
-        data['stats'] = scheduler.task_stats[task.id]
+    只用于字面量错误信息：响应体按信息缓存，之后直接复用 bytes，不再序列化。
+    每次仍创建新的 Response，避免跨请求共享可变的响应对象。
+    """
+    body = _ERROR_BODIES.get(message)
+    if body is None:
+        body = _ERROR_BODIES[message] = orjson.dumps({'success': False, 'error': message})
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _json_body() -> dict:
+    """
+    读取 JSON 请求体
     
-    return data
+    解析由应用安装的 OrjsonProvider 完成（直接解析 bytes）；
+    请求体缺失、格式错误或不是 JSON 对象时返回空字典
+    """
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+# 创建同步任务时的布尔字段：(字段名, 默认值)
+_SYNC_BOOL_FIELDS = (
+    ('enabled', True),
+    ('overwrite_existing', False),
+    ('rule_not_exists', False),
+    ('rule_size_diff', False),
+    ('rule_mtime_newer', False),
+    ('is_slow_storage', False),
+)
+
 
+def _intern_table(*values) -> dict:
+    """为枚举字符串的常见写法（原样/小写/首字母大写）建立到标准大写形式的映射"""
+    table = {}
+    for value in values:
+        for variant in (value, value.lower(), value.capitalize()):
+            table[variant] = value
+    return table
 
-def _parse_bool(value, default=False):
-    """解析布尔值"""
-    if isinstance(value, bool):
-        return value
-    if isinstance(value, str):
-        return value.lower() in {'true', '1', 'yes', 'on'}
-    return default
+
+_SUFFIX_MODES = _intern_table('NONE', 'INCLUDE', 'EXCLUDE')
+_DELETE_TIME_BASES = _intern_table('SYNC_COMPLETE', 'FILE_CREATE')
+
+
+def _upper_choice(table: dict, value, default: str) -> str:
+    """转为大写枚举字符串，空值取 default；常见写法直接查表，其余回退到 upper()"""
+    if not value:
+        return default
+    return table.get(value) or value.upper()
 
 
 def _parse_copy_mode(value):
@@ -71,29 +136,26 @@ def _parse_target_type(value):
 
 def _validate_paths_for_request(source_path: str, target_path: str, target_type: str = "LOCAL"):
     """校验源/目标路径可用性，并在需要时创建目标目录"""
-    source = Path(source_path)
-    
-    if not source.exists():
-        return False, f"源目录不存在: {source}"
-    if not source.is_dir():
-        return False, f"源路径不是目录: {source}"
-    if not os.access(source, os.R_OK):
-        return False, f"没有读取源目录的权限: {source}"
+    # os.path.isdir 一次 stat 同时确认存在与类型，仅失败时再区分原因
+    if not os.path.isdir(source_path):
+        if not os.path.exists(source_path):
+            return False, f"源目录不存在: {source_path}"
+        return False, f"源路径不是目录: {source_path}"
+    if not os.access(source_path, os.R_OK):
+        return False, f"没有读取源目录的权限: {source_path}"
 
     if target_type == "WEBDAV":
         if not target_path or not str(target_path).strip():
             return False, "WebDAV 远端目录不能为空"
         return True, None
 
-    target = Path(target_path)
-    
     try:
-        if not target.exists():
-            target.mkdir(parents=True, exist_ok=True)
-        if not target.is_dir():
-            return False, f"目标路径不是目录: {target}"
-        if not os.access(target, os.W_OK):
-            return False, f"没有写入目标目录的权限: {target}"
+        if not os.path.isdir(target_path):
+            if os.path.exists(target_path):
+                return False, f"目标路径不是目录: {target_path}"
+            os.makedirs(target_path, exist_ok=True)
+        if not os.access(target_path, os.W_OK):
+            return False, f"没有写入目标目录的权限: {target_path}"
     except PermissionError as e:
         return False, f"无法创建/访问目标目录: {e}"
     except Exception as e:
@@ -102,16 +164,98 @@ def _validate_paths_for_request(source_path: str, target_path: str, target_type:
     return True, None
 
 
+def _keep(value, task):
+    return value
+
+
+def _bool_field(key):
+    """布尔字段：无法解析时沿用任务当前值"""
+    def parse(value, task):
+        return parse_bool(value, getattr(task, key, False))
+    return parse
+
+
+def _int_field(error, minimum=None, floor=None, empty=...):
+    """
+    整数字段，解析失败或小于 minimum 时以 error 抛出 ValueError
+    
+    小于 floor 时取 floor；empty 不为 ... 时，None 和空字符串解析为 empty
+    """
+    def parse(value, task):
+        if empty is not ... and value in (None, ''):
+            return empty
+        try:
+            result = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(error)
+        if minimum is not None and result < minimum:
+            raise ValueError(error)
+        if floor is not None and result < floor:
+            return floor
+        return result
+    return parse
+
+
+def _choice_field(parser, error):
+    """枚举类字段：parser 返回 None 时以 error 抛出 ValueError"""
+    def parse(value, task):
+        result = parser(value)
+        if not result:
+            raise ValueError(error)
+        return result
+    return parse
+
+
+def _parse_delete_delay_days(value, task):
+    if value in (None, ''):
+        return None
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('删除延迟天数必须是整数')
+    if days < 0:
+        raise ValueError('删除延迟天数不能为负数')
+    return days
+
+
+# 更新同步任务时允许修改的字段：(字段名, 解析函数(value, task))
+# 解析函数以 ValueError 报告面向用户的错误信息
+_TASK_PUT_FIELDS = (
+    ('name', _keep),
+    ('source_path', _keep),
+    ('target_path', _keep),
+    ('target_type', _choice_field(_parse_target_type, '目标类型无效')),
+    ('interval', _int_field('同步间隔必须是数字')),
+    ('enabled', _bool_field('enabled')),
+    ('overwrite_existing', _bool_field('overwrite_existing')),
+    ('thread_count', _int_field('线程数必须是数字', floor=1)),
+    ('rule_not_exists', _bool_field('rule_not_exists')),
+    ('rule_size_diff', _bool_field('rule_size_diff')),
+    ('rule_mtime_newer', _bool_field('rule_mtime_newer')),
+    ('is_slow_storage', _bool_field('is_slow_storage')),
+    ('size_min_bytes', _keep),
+    ('size_max_bytes', _keep),
+    ('suffix_mode', lambda value, task: _upper_choice(_SUFFIX_MODES, value, 'NONE')),
+    ('suffix_list', lambda value, task: normalize_suffix_list(value)),
+    ('delete_source', _bool_field('delete_source')),
+    ('delete_delay_days', _parse_delete_delay_days),
+    ('delete_time_base', lambda value, task: _upper_choice(_DELETE_TIME_BASES, value, 'SYNC_COMPLETE')),
+    ('delete_parent', _bool_field('delete_parent')),
+    ('delete_parent_levels', _int_field('删除目录层级必须是非负整数', minimum=0, empty=0)),
+    ('delete_parent_force', _bool_field('delete_parent_force')),
+    ('copy_mode', _choice_field(_parse_copy_mode, '复制方式无效')),
+)
+
+
 @tasks_bp.route('/tasks', methods=['GET', 'POST'])
 def api_tasks():
     """获取所有任务或创建新任务"""
     scheduler = tasks_bp.scheduler
     
     if request.method == 'GET':
-        tasks = [_task_to_dict(t) for t in scheduler.get_all_tasks()]
-        return jsonify({'tasks': tasks})
+        return jsonify({'tasks': _tasks_to_dicts(scheduler.get_all_tasks())})
 
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     required_fields = ['name', 'source_path', 'target_path']
     missing = [f for f in required_fields if f not in data]
     if missing:
@@ -121,7 +265,7 @@ def api_tasks():
     target_path = data['target_path']
     target_type = _parse_target_type(data.get('target_type', 'LOCAL'))
     if not target_type:
-        return jsonify({'success': False, 'error': '目标类型无效'}), 400
+        return _error('目标类型无效')
     ok, err = _validate_paths_for_request(source_path, target_path, target_type)
     if not ok:
         return jsonify({'success': False, 'error': err}), 400
@@ -130,114 +274,90 @@ def api_tasks():
     schedule_type = data.get('schedule_type', 'INTERVAL')
     
     # 删除源文件配置
-    delete_source = _parse_bool(data.get('delete_source', False), False)
+    delete_source = parse_bool(data.get('delete_source', False), False)
     delete_delay_days = None
     if 'delete_delay_days' in data and data.get('delete_delay_days') not in (None, ''):
         try:
             delete_delay_days = int(data.get('delete_delay_days'))
         except (TypeError, ValueError):
-            return jsonify({'success': False, 'error': '删除延迟天数必须是整数'}), 400
+            return _error('删除延迟天数必须是整数')
         if delete_delay_days < 0:
-            return jsonify({'success': False, 'error': '删除延迟天数不能为负数'}), 400
-    delete_time_base = (data.get('delete_time_base', 'SYNC_COMPLETE') or 'SYNC_COMPLETE').upper()
-    delete_parent = _parse_bool(data.get('delete_parent', False), False)
+            return _error('删除延迟天数不能为负数')
+    delete_time_base = _upper_choice(_DELETE_TIME_BASES, data.get('delete_time_base'), 'SYNC_COMPLETE')
+    delete_parent = parse_bool(data.get('delete_parent', False), False)
     # 删除目录层级：从文件所在目录向上最多尝试删除的层级数（0 表示不删目录）
     delete_parent_levels = 0
     if 'delete_parent_levels' in data and data.get('delete_parent_levels') not in (None, ''):
         try:
             delete_parent_levels = int(data.get('delete_parent_levels'))
         except (TypeError, ValueError):
-            return jsonify({'success': False, 'error': '删除目录层级必须是非负整数'}), 400
+            return _error('删除目录层级必须是非负整数')
         if delete_parent_levels < 0:
-            return jsonify({'success': False, 'error': '删除目录层级必须是非负整数'}), 400
+            return _error('删除目录层级必须是非负整数')
     # 强制删除非空目录：就算目录下有未同步的元数据或者其他文件也删除（仍会保护未到期文件）
-    delete_parent_force = _parse_bool(data.get('delete_parent_force', False), False)
+    delete_parent_force = parse_bool(data.get('delete_parent_force', False), False)
     copy_mode = _parse_copy_mode(data.get('copy_mode', 'COPY'))
     if not copy_mode:
-        return jsonify({'success': False, 'error': '复制方式无效'}), 400
+        return _error('复制方式无效')
     if target_type == 'WEBDAV' and copy_mode != 'COPY':
-        return jsonify({'success': False, 'error': 'WebDAV 目标只支持复制文件'}), 400
+        return _error('WebDAV 目标只支持复制文件')
     if copy_mode == 'SYMLINK' and delete_source:
-        return jsonify({'success': False, 'error': '软链接模式不能同时删除源文件'}), 400
+        return _error('软链接模式不能同时删除源文件')
+    
+    common = {
+        'name': data['name'],
+        'source_path': source_path,
+        'target_path': target_path,
+        'thread_count': int(data.get('thread_count', 1)),
+        'size_min_bytes': data.get('size_min_bytes'),
+        'size_max_bytes': data.get('size_max_bytes'),
+        'suffix_mode': _upper_choice(_SUFFIX_MODES, data.get('suffix_mode'), 'NONE'),
+        'suffix_list': data.get('suffix_list'),
+        'delete_source': delete_source,
+        'delete_delay_days': delete_delay_days,
+        'delete_time_base': delete_time_base,
+        'delete_parent': delete_parent,
+        'delete_parent_levels': delete_parent_levels,
+        'delete_parent_force': delete_parent_force,
+        'copy_mode': copy_mode,
+        'target_type': target_type
+    }
+    for key, default in _SYNC_BOOL_FIELDS:
+        common[key] = parse_bool(data.get(key, default), default)
     
     if schedule_type == 'CRON':
         # Cron 调度
         cron_expression = data.get('cron_expression', '').strip()
         if not cron_expression:
-            return jsonify({'success': False, 'error': 'Cron 表达式不能为空'}), 400
+            return _error('Cron 表达式不能为空')
         
-        # 验证 cron 表达式格式
-        parts = cron_expression.split()
-        if len(parts) != 5:
-            return jsonify({'success': False, 'error': 'Cron 表达式格式错误，应为 5 个字段：分 时 日 月 星期'}), 400
+        # 验证 cron 表达式（结果按表达式缓存）
+        error = validate_cron(cron_expression)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        task = SyncTask(
-            name=data['name'],
-            source_path=source_path,
-            target_path=target_path,
+        common.update(
             schedule_type='CRON',
             cron_expression=cron_expression,
-            interval=300,  # cron 模式下 interval 不使用，但需要默认值
-            enabled=_parse_bool(data.get('enabled', True), True),
-            overwrite_existing=_parse_bool(data.get('overwrite_existing', False), False),
-            thread_count=int(data.get('thread_count', 1)),
-            rule_not_exists=_parse_bool(data.get('rule_not_exists', False), False),
-            rule_size_diff=_parse_bool(data.get('rule_size_diff', False), False),
-            rule_mtime_newer=_parse_bool(data.get('rule_mtime_newer', False), False),
-            is_slow_storage=_parse_bool(data.get('is_slow_storage', False), False),
-            size_min_bytes=data.get('size_min_bytes'),
-            size_max_bytes=data.get('size_max_bytes'),
-            suffix_mode=data.get('suffix_mode', 'NONE'),
-            suffix_list=data.get('suffix_list'),
-            delete_source=delete_source,
-            delete_delay_days=delete_delay_days,
-            delete_time_base=delete_time_base,
-            delete_parent=delete_parent,
-            delete_parent_levels=delete_parent_levels,
-            delete_parent_force=delete_parent_force,
-            copy_mode=copy_mode,
-            target_type=target_type
+            interval=300  # cron 模式下 interval 不使用，但需要默认值
         )
     else:
         # 间隔调度
         try:
             interval = int(data.get('interval', 300))
         except ValueError:
-            return jsonify({'success': False, 'error': '同步间隔必须是数字'}), 400
+            return _error('同步间隔必须是数字')
 
         if interval < 5:
-            return jsonify({'success': False, 'error': '同步间隔需大于等于 5 秒'}), 400
-
-        task = SyncTask(
-            name=data['name'],
-            source_path=source_path,
-            target_path=target_path,
-            schedule_type='INTERVAL',
-            interval=interval,
-            enabled=_parse_bool(data.get('enabled', True), True),
-            overwrite_existing=_parse_bool(data.get('overwrite_existing', False), False),
-            thread_count=int(data.get('thread_count', 1)),
-            rule_not_exists=_parse_bool(data.get('rule_not_exists', False), False),
-            rule_size_diff=_parse_bool(data.get('rule_size_diff', False), False),
-            rule_mtime_newer=_parse_bool(data.get('rule_mtime_newer', False), False),
-            is_slow_storage=_parse_bool(data.get('is_slow_storage', False), False),
-            size_min_bytes=data.get('size_min_bytes'),
-            size_max_bytes=data.get('size_max_bytes'),
-            suffix_mode=data.get('suffix_mode', 'NONE'),
-            suffix_list=data.get('suffix_list'),
-            delete_source=delete_source,
-            delete_delay_days=delete_delay_days,
-            delete_time_base=delete_time_base,
-            delete_parent=delete_parent,
-            delete_parent_levels=delete_parent_levels,
-            delete_parent_force=delete_parent_force,
-            copy_mode=copy_mode,
-            target_type=target_type
-        )
+            return _error('同步间隔需大于等于 5 秒')
+
+        common.update(schedule_type='INTERVAL', interval=interval)
+
+    task = SyncTask(**common)
 
     if scheduler.add_task(task):
         return jsonify({'success': True, 'task': _task_to_dict(task)})
-    return jsonify({'success': False, 'error': '添加任务失败'}), 500
+    return _error('添加任务失败', 500)
 
 
 @tasks_bp.route('/tasks/<task_id>', methods=['PUT', 'DELETE'])
@@ -246,102 +366,30 @@ def api_task_detail(task_id: str):
     scheduler = tasks_bp.scheduler
     task = scheduler.get_task(task_id)
     if not task:
-        return jsonify({'success': False, 'error': '任务不存在'}), 404
+        return _error('任务不存在', 404)
 
     if request.method == 'DELETE':
         if scheduler.remove_task(task_id):
             return jsonify({'success': True})
-        return jsonify({'success': False, 'error': '删除任务失败'}), 500
-
-    data = request.get_json(silent=True) or {}
-    updates: Dict[str, Optional[object]] = {}
-
-    if 'name' in data:
-        updates['name'] = data['name']
-    if 'source_path' in data:
-        updates['source_path'] = data['source_path']
-    if 'target_path' in data:
-        updates['target_path'] = data['target_path']
-    if 'target_type' in data:
-        target_type = _parse_target_type(data.get('target_type'))
-        if not target_type:
-            return jsonify({'success': False, 'error': '目标类型无效'}), 400
-        updates['target_type'] = target_type
-    if 'interval' in data:
-        try:
-            updates['interval'] = int(data['interval'])
-        except ValueError:
-            return jsonify({'success': False, 'error': '同步间隔必须是数字'}), 400
-    if 'enabled' in data:
-        updates['enabled'] = _parse_bool(data['enabled'], task.enabled)
-    if 'overwrite_existing' in data:
-        updates['overwrite_existing'] = _parse_bool(data['overwrite_existing'], task.overwrite_existing)
-    if 'thread_count' in data:
-        try:
-            updates['thread_count'] = max(1, int(data['thread_count']))
-        except ValueError:
-            return jsonify({'success': False, 'error': '线程数必须是数字'}), 400
-    if 'rule_not_exists' in data:
-        updates['rule_not_exists'] = _parse_bool(data['rule_not_exists'], task.rule_not_exists)
-    if 'rule_size_diff' in data:
-        updates['rule_size_diff'] = _parse_bool(data['rule_size_diff'], task.rule_size_diff)
-    if 'rule_mtime_newer' in data:
-        updates['rule_mtime_newer'] = _parse_bool(data['rule_mtime_newer'], task.rule_mtime_newer)
-    if 'is_slow_storage' in data:
-        updates['is_slow_storage'] = _parse_bool(data['is_slow_storage'], task.is_slow_storage)
-    if 'size_min_bytes' in data:
-        updates['size_min_bytes'] = data['size_min_bytes']
-    if 'size_max_bytes' in data:
-        updates['size_max_bytes'] = data['size_max_bytes']
-    if 'suffix_mode' in data:
-        updates['suffix_mode'] = (data['suffix_mode'] or 'NONE').upper()
-    if 'suffix_list' in data:
-        updates['suffix_list'] = data['suffix_list']
-    if 'delete_source' in data:
-        updates['delete_source'] = _parse_bool(data['delete_source'], getattr(task, 'delete_source', False))
-    if 'delete_delay_days' in data:
-        raw_delay = data['delete_delay_days']
-        if raw_delay in (None, ''):
-            updates['delete_delay_days'] = None
-        else:
-            try:
-                delay_val = int(raw_delay)
-            except (TypeError, ValueError):
-                return jsonify({'success': False, 'error': '删除延迟天数必须是整数'}), 400
-            if delay_val < 0:
-                return jsonify({'success': False, 'error': '删除延迟天数不能为负数'}), 400
-            updates['delete_delay_days'] = delay_val
-    if 'delete_time_base' in data:
-        updates['delete_time_base'] = (data['delete_time_base'] or 'SYNC_COMPLETE').upper()
-    if 'delete_parent' in data:
-        updates['delete_parent'] = _parse_bool(data['delete_parent'], getattr(task, 'delete_parent', False))
-    if 'delete_parent_levels' in data:
-        raw_levels = data['delete_parent_levels']
-        if raw_levels in (None, ''):
-            updates['delete_parent_levels'] = 0
-        else:
+        return _error('删除任务失败', 500)
+
+    data = _json_body()
+    updates: dict = {}
+
+    for key, parse in _TASK_PUT_FIELDS:
+        if key in data:
             try:
-                levels_val = int(raw_levels)
-            except (TypeError, ValueError):
-                return jsonify({'success': False, 'error': '删除目录层级必须是非负整数'}), 400
-            if levels_val < 0:
-                return jsonify({'success': False, 'error': '删除目录层级必须是非负整数'}), 400
-            updates['delete_parent_levels'] = levels_val
-    if 'delete_parent_force' in data:
-        updates['delete_parent_force'] = _parse_bool(data['delete_parent_force'], getattr(task, 'delete_parent_force', False))
-    if 'copy_mode' in data:
-        copy_mode = _parse_copy_mode(data.get('copy_mode'))
-        if not copy_mode:
-            return jsonify({'success': False, 'error': '复制方式无效'}), 400
-        updates['copy_mode'] = copy_mode
+                updates[key] = parse(data[key], task)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
 
     effective_copy_mode = updates.get('copy_mode', getattr(task, 'copy_mode', 'COPY'))
     effective_delete_source = updates.get('delete_source', getattr(task, 'delete_source', False))
     effective_target_type = updates.get('target_type', getattr(task, 'target_type', 'LOCAL'))
     if effective_target_type == 'WEBDAV' and effective_copy_mode != 'COPY':
-        return jsonify({'success': False, 'error': 'WebDAV 目标只支持复制文件'}), 400
+        return _error('WebDAV 目标只支持复制文件')
     if effective_copy_mode == 'SYMLINK' and effective_delete_source:
-        return jsonify({'success': False, 'error': '软链接模式不能同时删除源文件'}), 400
+        return _error('软链接模式不能同时删除源文件')
 
     # 路径更新时校验并创建目标目录
     if 'source_path' in updates or 'target_path' in updates or 'target_type' in updates:
@@ -353,12 +401,12 @@ def api_task_detail(task_id: str):
             return jsonify({'success': False, 'error': err}), 400
 
     if 'interval' in updates and updates['interval'] is not None and updates['interval'] < 5:
-        return jsonify({'success': False, 'error': '同步间隔需大于等于 5 秒'}), 400
+        return _error('同步间隔需大于等于 5 秒')
 
     if scheduler.update_task(task_id, **updates):
         updated = scheduler.get_task(task_id)
         return jsonify({'success': True, 'task': _task_to_dict(updated)})
-    return jsonify({'success': False, 'error': '更新任务失败'}), 500
+    return _error('更新任务失败', 500)
 
 
 @tasks_bp.route('/tasks/<task_id>/trigger', methods=['POST'])
@@ -367,7 +415,7 @@ def api_trigger_task(task_id: str):
     scheduler = tasks_bp.scheduler
     if scheduler.trigger_task_now(task_id):
         return jsonify({'success': True})
-    return jsonify({'success': False, 'error': '任务状态非空闲或不存在'}), 400
+    return _error('任务状态非空闲或不存在')
 
 
 @tasks_bp.route('/tasks/<task_id>/full-overwrite', methods=['POST'])
@@ -378,42 +426,41 @@ def api_full_overwrite_task(task_id: str):
     
     task = scheduler.get_task(task_id)
     if not task:
-        return jsonify({'success': False, 'error': '任务不存在'}), 404
+        return _error('任务不存在', 404)
     
-    if task.status.value != 'IDLE':
-        return jsonify({'success': False, 'error': '任务状态非空闲，无法执行'}), 400
+    # 提前拒绝忙碌任务，免得无谓改动覆盖设置；能否入队仍以 trigger_task_now 的原子切换为准
+    if task.status is not TaskStatus.IDLE:
+        return _error('任务状态非空闲，无法执行')
     
-    # 临时设置为覆盖模式
+    # 临时设置为覆盖模式，本次执行结束后恢复原始设置
     original_overwrite = task.overwrite_existing
     task.overwrite_existing = True
     
-    log_handler(f"🔥 开始执行全量覆盖: {task.name}")
+    def restore_overwrite():
+        # 执行期间用户修改过该设置时保留用户的新值
+        if task.overwrite_existing is True:
+            task.overwrite_existing = original_overwrite
     
-    success = scheduler.trigger_task_now(task_id)
+    # 先注册再触发，避免任务在注册前就已执行完
+    scheduler.on_task_complete(task_id, restore_overwrite)
     
-    if success:
-        # 在后台恢复原始设置
-        def reset_overwrite():
-            import time
-            time.sleep(1)
-            task.overwrite_existing = original_overwrite
-        threading.Thread(target=reset_overwrite, daemon=True).start()
-        
+    log_handler(f"🔥 开始执行全量覆盖: {task.name}")
+    
+    if scheduler.trigger_task_now(task_id):
         return jsonify({'success': True})
-    else:
-        task.overwrite_existing = original_overwrite
-        return jsonify({'success': False, 'error': '触发任务失败'}), 500
+    # 未能入队：立即执行回调恢复设置
+    scheduler.run_completion_callbacks(task_id)
+    return _error('触发任务失败', 500)
 
 
 @tasks_bp.route('/logs', methods=['GET'])
 def api_logs():
     """获取日志"""
     task_logs = tasks_bp.task_logs
-    log_lock = tasks_bp.log_lock
     
     task_id = request.args.get('task_id', 'general')
-    with log_lock:
-        logs = list(task_logs.get(task_id, []))
+    # list(deque) 在 C 层一次性完成拷贝，不会与写入交错
+    logs = list(task_logs.get(task_id, ()))
     return jsonify({'logs': logs})
 
 
@@ -421,136 +468,148 @@ def api_logs():
 def api_clear_logs():
     """清除日志"""
     task_logs = tasks_bp.task_logs
-    log_lock = tasks_bp.log_lock
     
     task_id = request.args.get('task_id', 'general')
-    with log_lock:
-        if task_id in task_logs:
-            task_logs[task_id] = []
+    logs = task_logs.get(task_id)
+    if logs is not None:
+        logs.clear()
     return jsonify({'success': True})
 
 
+def _resolve_target(path: str, is_docker: bool):
+    """
+    确定要列出的目录，请求目录不存在时回退到父目录或默认目录
+    
+    Returns:
+        (target_path, fallback_reason, error)，error 非空表示目录状态异常（可能是挂载已断开）
+    """
+    target_path = Path(path)
+    try:
+        target_exists = target_path.exists()
+    except (OSError, ValueError) as e:
+        return target_path, None, f'目录状态异常，可能是挂载已断开: {e}'
+
+    if target_exists:
+        return target_path, None, None
+
+    fallback_reason = None
+    parent = target_path.parent
+    try:
+        parent_available = parent.exists() and parent.is_dir()
+    except OSError as e:
+        parent_available = False
+        fallback_reason = f'父目录状态异常，可能是挂载已断开: {e}'
+
+    if parent_available:
+        return parent, f'请求目录不存在，已显示父目录: {target_path}', None
+    fallback_reason = fallback_reason or f'请求目录不存在: {target_path}'
+    return (Path('/') if is_docker else Path.home()), fallback_reason, None
+
+
+def _list_children(target_path: Path):
+    """
+    列出目录下的子目录（按名称排序）
+    
+    Returns:
+        (dirs, skipped_errors)；读取目录本身失败时抛出 OSError
+    """
+    dirs = []
+    skipped_errors = []
+    if not target_path.is_dir():
+        return dirs, skipped_errors
+
+    parent_str = str(target_path)
+    # scandir 的 DirEntry 自带文件类型，is_dir() 通常无需额外 stat
+    with os.scandir(parent_str) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # 探测一次，挂载断开的目录在此处抛出 OSError
+                    entry.stat()
+                    dirs.append({
+                        'name': entry.name,
+                        'path': entry.path,
+                        'parent': parent_str
+                    })
+            except OSError as e:
+                skipped_errors.append(f'{entry.name}: {e}')
+    dirs.sort(key=itemgetter('name'))
+    return dirs, skipped_errors
+
+
+def _directory_error(requested_path: str, current_path: str, error: str, mount_error: bool = False):
+    """目录列表失败响应"""
+    payload = {
+        'success': False,
+        'error': error,
+        'requested_path': requested_path,
+        'current_path': current_path,
+        'directories': []
+    }
+    if mount_error:
+        payload['mount_error'] = True
+    return jsonify(payload)
+
+
 @tasks_bp.route('/directories', methods=['GET'])
 def api_list_directories():
     """列出指定路径下的目录"""
-    is_docker = tasks_bp.is_docker
-    path = request.args.get('path', '/')
-    requested_path = path
+    requested_path = request.args.get('path', '/')
+    target_path, fallback_reason, error = _resolve_target(requested_path, tasks_bp.is_docker)
+    current_path = str(target_path)
+    if error:
+        return _directory_error(requested_path, current_path, error, mount_error=True)
+
+    # 只列出目录
     try:
-        # 安全检查：确保路径存在
-        target_path = Path(path)
-        try:
-            target_exists = target_path.exists()
-        except OSError as e:
-            return jsonify({
-                'success': False,
-                'error': f'目录状态异常，可能是挂载已断开: {e}',
-                'requested_path': requested_path,
-                'current_path': str(target_path),
-                'directories': [],
-                'mount_error': True
-            })
-
-        fallback_reason = None
-        if not target_exists:
-            parent = target_path.parent
-            try:
-                parent_available = parent.exists() and parent.is_dir()
-            except OSError as e:
-                parent_available = False
-                fallback_reason = f'父目录状态异常，可能是挂载已断开: {e}'
-
-            if parent_available:
-                fallback_reason = f'请求目录不存在，已显示父目录: {target_path}'
-                target_path = parent
-            else:
-                fallback_reason = fallback_reason or f'请求目录不存在: {target_path}'
-                target_path = Path('/') if is_docker else Path.home()
-        
-        # 只列出目录
-        dirs = []
-        skipped_errors = []
-        if target_path.is_dir():
-            try:
-                for item in sorted(target_path.iterdir()):
-                    try:
-                        if item.is_dir():
-                            item.stat()
-                            dirs.append({
-                                'name': item.name,
-                                'path': str(item),
-                                'parent': str(item.parent)
-                            })
-                    except (PermissionError, OSError) as e:
-                        skipped_errors.append(f'{item.name}: {e}')
-                        continue
-            except PermissionError:
-                return jsonify({
-                    'success': False,
-                    'error': '没有权限访问此目录',
-                    'requested_path': requested_path,
-                    'current_path': str(target_path),
-                    'directories': []
-                })
-            except OSError as e:
-                return jsonify({
-                    'success': False,
-                    'error': f'读取目录失败，可能是挂载已断开: {e}',
-                    'requested_path': requested_path,
-                    'current_path': str(target_path),
-                    'directories': [],
-                    'mount_error': True
-                })
-
-        if skipped_errors and not dirs:
-            return jsonify({
-                'success': False,
-                'error': f'目录项无法访问，可能是挂载已断开: {skipped_errors[0]}',
-                'requested_path': requested_path,
-                'current_path': str(target_path),
-                'directories': [],
-                'mount_error': True
-            })
-        
-        return jsonify({
-            'success': True,
-            'requested_path': requested_path,
-            'current_path': str(target_path),
-            'parent_path': str(target_path.parent) if target_path.parent != target_path else None,
-            'directories': dirs,
-            'fallback': fallback_reason is not None,
-            'warning': fallback_reason
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'requested_path': requested_path,
-            'current_path': path,
-            'directories': []
-        })
+        dirs, skipped_errors = _list_children(target_path)
+    except PermissionError:
+        return _directory_error(requested_path, current_path, '没有权限访问此目录')
+    except OSError as e:
+        return _directory_error(requested_path, current_path, f'读取目录失败，可能是挂载已断开: {e}', mount_error=True)
+
+    if skipped_errors and not dirs:
+        return _directory_error(
+            requested_path, current_path,
+            f'目录项无法访问，可能是挂载已断开: {skipped_errors[0]}',
+            mount_error=True
+        )
+    
+    return jsonify({
+        'success': True,
+        'requested_path': requested_path,
+        'current_path': current_path,
+        'parent_path': str(target_path.parent) if target_path.parent != target_path else None,
+        'directories': dirs,
+        'fallback': fallback_reason is not None,
+        'warning': fallback_reason
+    })
+
+
+# Cron 表达式预设（内容固定，导入时序列化一次）
+_CRON_PRESETS = [
+    {'name': '每 5 分钟', 'expression': '*/5 * * * *', 'description': '每 5 分钟执行一次'},
+    {'name': '每 10 分钟', 'expression': '*/10 * * * *', 'description': '每 10 分钟执行一次'},
+    {'name': '每 15 分钟', 'expression': '*/15 * * * *', 'description': '每 15 分钟执行一次'},
+    {'name': '每 30 分钟', 'expression': '*/30 * * * *', 'description': '每 30 分钟执行一次'},
+    {'name': '每小时', 'expression': '0 * * * *', 'description': '每小时整点执行'},
+    {'name': '每 2 小时', 'expression': '0 */2 * * *', 'description': '每 2 小时执行一次'},
+    {'name': '每 6 小时', 'expression': '0 */6 * * *', 'description': '每 6 小时执行一次'},
+    {'name': '每 12 小时', 'expression': '0 */12 * * *', 'description': '每 12 小时执行一次'},
+    {'name': '每天凌晨 2 点', 'expression': '0 2 * * *', 'description': '每天凌晨 2:00 执行'},
+    {'name': '每天凌晨 3 点', 'expression': '0 3 * * *', 'description': '每天凌晨 3:00 执行'},
+    {'name': '每天早上 8 点', 'expression': '0 8 * * *', 'description': '每天早上 8:00 执行'},
+    {'name': '每周一凌晨 2 点', 'expression': '0 2 * * 1', 'description': '每周一凌晨 2:00 执行'},
+    {'name': '每月 1 号凌晨 2 点', 'expression': '0 2 1 * *', 'description': '每月 1 号凌晨 2:00 执行'},
+    {'name': '工作日早上 9 点', 'expression': '0 9 * * 1-5', 'description': '周一到周五早上 9:00 执行'},
+]
+_CRON_PRESETS_BYTES = orjson.dumps({'presets': _CRON_PRESETS})
 
 
 @tasks_bp.route('/cron/presets', methods=['GET'])
 def api_cron_presets():
     """获取 Cron 表达式预设"""
-    presets = [
-        {'name': '每 5 分钟', 'expression': '*/5 * * * *', 'description': '每 5 分钟执行一次'},
-        {'name': '每 10 分钟', 'expression': '*/10 * * * *', 'description': '每 10 分钟执行一次'},
-        {'name': '每 15 分钟', 'expression': '*/15 * * * *', 'description': '每 15 分钟执行一次'},
-        {'name': '每 30 分钟', 'expression': '*/30 * * * *', 'description': '每 30 分钟执行一次'},
-        {'name': '每小时', 'expression': '0 * * * *', 'description': '每小时整点执行'},
-        {'name': '每 2 小时', 'expression': '0 */2 * * *', 'description': '每 2 小时执行一次'},
-        {'name': '每 6 小时', 'expression': '0 */6 * * *', 'description': '每 6 小时执行一次'},
-        {'name': '每 12 小时', 'expression': '0 */12 * * *', 'description': '每 12 小时执行一次'},
-        {'name': '每天凌晨 2 点', 'expression': '0 2 * * *', 'description': '每天凌晨 2:00 执行'},
-        {'name': '每天凌晨 3 点', 'expression': '0 3 * * *', 'description': '每天凌晨 3:00 执行'},
-        {'name': '每天早上 8 点', 'expression': '0 8 * * *', 'description': '每天早上 8:00 执行'},
-        {'name': '每周一凌晨 2 点', 'expression': '0 2 * * 1', 'description': '每周一凌晨 2:00 执行'},
-        {'name': '每月 1 号凌晨 2 点', 'expression': '0 2 1 * *', 'description': '每月 1 号凌晨 2:00 执行'},
-        {'name': '工作日早上 9 点', 'expression': '0 9 * * 1-5', 'description': '周一到周五早上 9:00 执行'},
-    ]
-    return jsonify({'presets': presets})
+    return Response(_CRON_PRESETS_BYTES, mimetype='application/json')
 
 
 @tasks_bp.route('/cron/random', methods=['GET'])
@@ -588,34 +647,23 @@ def api_cron_random():
 @tasks_bp.route('/cron/validate', methods=['POST'])
 def api_cron_validate():
     """验证 Cron 表达式"""
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     expression = data.get('expression', '').strip()
     
     if not expression:
         return jsonify({'valid': False, 'error': 'Cron 表达式不能为空'})
     
-    parts = expression.split()
-    if len(parts) != 5:
-        return jsonify({'valid': False, 'error': 'Cron 表达式应包含 5 个字段：分 时 日 月 星期'})
+    error = validate_cron(expression)
+    if error:
+        return jsonify({'valid': False, 'error': error})
     
-    try:
-        minute, hour, day, month, day_of_week = parts
-        trigger = CronTrigger(
-            minute=minute,
-            hour=hour,
-            day=day,
-            month=month,
-            day_of_week=day_of_week
-        )
-        # 获取下次执行时间
-        next_run = trigger.get_next_fire_time(None, datetime.now())
-        return jsonify({
-            'valid': True,
-            'next_run': next_run.isoformat() if next_run else None,
-            'description': f"下次执行: {next_run.strftime('%Y-%m-%d %H:%M:%S')}" if next_run else '无法计算'
-        })
-    except Exception as e:
-        return jsonify({'valid': False, 'error': f'验证失败: {str(e)}'})
+    # 获取下次执行时间
+    next_run = build_cron_trigger(expression).get_next_fire_time(None, datetime.now())
+    return jsonify({
+        'valid': True,
+        'next_run': next_run.isoformat() if next_run else None,
+        'description': f"下次执行: {next_run.strftime('%Y-%m-%d %H:%M:%S')}" if next_run else '无法计算'
+    })
 
 
 # ==================== 历史记录 API ====================
@@ -643,7 +691,7 @@ def api_file_history():
     path = request.args.get('path')
     
     if not task_id or not path:
-        return jsonify({'success': False, 'error': '缺少 task_id 或 path'}), 400
+        return _error('缺少 task_id 或 path')
     
     try:
         history = scheduler.db.get_file_history(task_id, path)
@@ -660,12 +708,12 @@ def api_reconstruct_task(task_id: str):
     
     task = scheduler.get_task(task_id)
     if not task:
-        return jsonify({'success': False, 'error': '任务不存在'}), 404
+        return _error('任务不存在', 404)
     
-    if task.status.value != 'IDLE':
-        return jsonify({'success': False, 'error': '任务状态非空闲，无法执行'}), 400
+    if task.status is not TaskStatus.IDLE:
+        return _error('任务状态非空闲，无法执行')
     if getattr(task, 'target_type', 'LOCAL') == 'WEBDAV':
-        return jsonify({'success': False, 'error': 'WebDAV 任务暂不支持缓存重构'}), 400
+        return _error('WebDAV 任务暂不支持缓存重构')
     
     def run_reconstruction():
         try:
@@ -3,14 +3,126 @@
 使用 SQLite 存储删除队列和目录树等大数据结构
 """
 
+import os
+import queue
 import sqlite3
 import json
 import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union, Iterable, Iterator, Tuple
 from datetime import datetime
 from contextlib import contextmanager
 
+# 只读连接池大小：与 CPU 核数相当即可，上限 4
+READ_POOL_SIZE = max(1, min(os.cpu_count() or 1, 4))
+
+# 每个连接打开后执行的 PRAGMA
+_CONNECTION_PRAGMAS = """
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-20000;
+    PRAGMA mmap_size=268435456;
+"""
+
+# 写连接额外执行的 PRAGMA：
+# WAL 模式下读写互不阻塞，synchronous=NORMAL 避免每次提交都 fsync 两次；
+# 注意 WAL 会在数据库文件旁生成 -wal / -shm 两个辅助文件。
+# 忙等待时间由 sqlite3.connect 的 timeout 参数控制，这里不再单独设置 busy_timeout
+_WRITER_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+"""
+
+# 删除队列热点语句：文本保持不变，以命中 sqlite3 连接内的预编译语句缓存
+_DELETE_QUEUE_COLUMNS = "id, task_id, source_path, delete_at, delete_parent, time_base"
+
+_SQL_ADD_DELETE = """
+    INSERT INTO delete_queue (task_id, source_path, delete_at, delete_parent, time_base)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(source_path) DO UPDATE SET
+        task_id = excluded.task_id,
+        delete_at = excluded.delete_at,
+        delete_parent = excluded.delete_parent,
+        time_base = excluded.time_base,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+_SQL_GET_EXPIRED = f"""
+    SELECT {_DELETE_QUEUE_COLUMNS}
+    FROM delete_queue
+    WHERE task_id = ? AND delete_at <= ?
+    ORDER BY delete_at ASC
+"""
+
+_SQL_GET_PENDING = f"""
+    SELECT {_DELETE_QUEUE_COLUMNS}
+    FROM delete_queue
+    WHERE task_id = ? AND delete_at > ?
+    ORDER BY delete_at ASC
+"""
+
+_SQL_GET_PENDING_UNDER = f"""
+    SELECT {_DELETE_QUEUE_COLUMNS}
+    FROM delete_queue
+    WHERE task_id = ? AND delete_at > ? AND source_path >= ? AND source_path < ?
+    ORDER BY delete_at ASC
+"""
+
+_SQL_GET_ALL_FOR_TASK = f"""
+    SELECT {_DELETE_QUEUE_COLUMNS}
+    FROM delete_queue
+    WHERE task_id = ?
+    ORDER BY delete_at ASC
+"""
+
+_SQL_GET_ALL = f"""
+    SELECT {_DELETE_QUEUE_COLUMNS}
+    FROM delete_queue
+    ORDER BY delete_at ASC
+"""
+
+_SQL_REMOVE_DELETE = "DELETE FROM delete_queue WHERE source_path = ?"
+
+_SQL_REMOVE_DELETE_BY_ID = "DELETE FROM delete_queue WHERE id = ?"
+
+_SQL_MIGRATE_DELETE = """
+    INSERT OR IGNORE INTO delete_queue 
+    (task_id, source_path, delete_at, delete_parent, time_base)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+_SQL_CREATE_DELETE_QUEUE = """
+    CREATE TABLE IF NOT EXISTS delete_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id TEXT NOT NULL,
+        source_path TEXT NOT NULL UNIQUE,
+        delete_at INTEGER NOT NULL,
+        delete_parent INTEGER DEFAULT 0,
+        time_base TEXT DEFAULT 'SYNC_COMPLETE',
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# 删除时间可以是 datetime、ISO 格式字符串或毫秒时间戳
+TimeValue = Union[datetime, str, int, float]
+
+
+def _to_epoch_ms(value: TimeValue) -> int:
+    """将时间统一为毫秒时间戳；不带时区的时间按本地时间处理"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def _row_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """创建按列名取值的游标；连接默认返回元组，计数等标量查询无需构造 Row"""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    return cursor
+
 
 class Database:
     """SQLite 数据库管理类"""
@@ -23,65 +135,97 @@ class Database:
             db_path: 数据库文件路径
         """
         self.db_path = Path(db_path)
-        self._local = threading.local()
+        # 读操作从固定大小的只读连接池借用连接；写操作统一走唯一的写连接，并在应用层串行化
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=READ_POOL_SIZE)
+        self._write_lock = threading.Lock()
         
         # 确保数据库目录存在
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # 写连接在启动时创建并常驻，同时负责把数据库切换到 WAL 模式
+        self._writer_conn = self._open_connection()
+        
         # 初始化数据库结构
         self._init_database()
+        
+        # 只读连接要求数据库文件已存在，因此在建表之后预先打开
+        for _ in range(READ_POOL_SIZE):
+            self._read_pool.put(self._open_connection(read_only=True))
     
-    @contextmanager
-    def get_connection(self):
-        """获取线程本地的数据库连接（上下文管理器）"""
-        if not hasattr(self._local, 'conn'):
-            self._local.conn = sqlite3.connect(
+    def _open_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """打开并配置一个数据库连接"""
+        if read_only:
+            conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                # 只读连接不需要隐式事务，避免长时间持有旧快照
+                isolation_level=None,
+                check_same_thread=False,
+                timeout=30.0,
+                cached_statements=256
+            )
+        else:
+            # 写连接使用自动提交：单条写语句由 SQLite 隐式事务包裹，
+            # 多条语句的写操作显式 BEGIN IMMEDIATE / COMMIT
+            conn = sqlite3.connect(
                 str(self.db_path),
+                isolation_level=None,
                 check_same_thread=False,
-                timeout=30.0
+                timeout=30.0,
+                cached_statements=256
             )
-            self._local.conn.row_factory = sqlite3.Row
-        
+            conn.executescript(_WRITER_PRAGMAS)
+        conn.executescript(_CONNECTION_PRAGMAS)
+        return conn
+    
+    @contextmanager
+    def get_connection(self):
+        """从连接池借用一个只读数据库连接（上下文管理器），用完归还"""
+        conn = self._read_pool.get()
         try:
-            yield self._local.conn
+            yield conn
         except Exception:
-            self._local.conn.rollback()
+            conn.rollback()
             raise
+        finally:
+            self._read_pool.put(conn)
+    
+    @contextmanager
+    def write_connection(self):
+        """获取共享的写连接并持有全局写锁（上下文管理器）"""
+        with self._write_lock:
+            try:
+                yield self._writer_conn
+            except Exception:
+                self._writer_conn.rollback()
+                raise
     
     def _init_database(self):
         """初始化数据库表结构"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             
-            # 创建删除队列表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS delete_queue (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    task_id TEXT NOT NULL,
-                    source_path TEXT NOT NULL UNIQUE,
-                    delete_at TEXT NOT NULL,
-                    delete_parent INTEGER DEFAULT 0,
-                    time_base TEXT DEFAULT 'SYNC_COMPLETE',
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+            # 创建删除队列表（delete_at 为毫秒时间戳）
+            cursor.execute(_SQL_CREATE_DELETE_QUEUE)
+            self._migrate_delete_at_to_epoch_ms(conn)
             
             # 创建索引
+            # 按任务过滤并按删除时间排序的查询共用复合索引，无需额外排序；
+            # 原单列 task_id 索引是其前缀，已冗余
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_delete_queue_task_id 
-                ON delete_queue(task_id)
+                CREATE INDEX IF NOT EXISTS idx_delete_queue_task_deleteat 
+                ON delete_queue(task_id, delete_at)
             """)
             
+            cursor.execute("DROP INDEX IF EXISTS idx_delete_queue_task_id")
+            
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_delete_queue_delete_at 
                 ON delete_queue(delete_at)
             """)
             
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_delete_queue_source_path 
-                ON delete_queue(source_path)
-            """)
+            # source_path 的 UNIQUE 约束已自带索引，单独建立的同列索引只会增加写入与扫描开销
+            cursor.execute("DROP INDEX IF EXISTS idx_delete_queue_source_path")
             
             # 创建目录树表（为未来扩展准备）
             cursor.execute("""
@@ -167,12 +311,40 @@ class Database:
                 CREATE INDEX IF NOT EXISTS idx_sync_history_timestamp 
                 ON sync_history(timestamp)
             """)
-            
-            conn.commit()
+    
+    def _migrate_delete_at_to_epoch_ms(self, conn: sqlite3.Connection):
+        """旧版本以 ISO 文本存储 delete_at，重建删除队列表并转换为毫秒时间戳"""
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(delete_queue)")}
+        if columns.get('delete_at', '').upper() != 'TEXT':
+            return
+        
+        rows = []
+        for row in conn.execute("""
+            SELECT id, task_id, source_path, delete_at, delete_parent, time_base, created_at, updated_at
+            FROM delete_queue
+        """):
+            try:
+                delete_at = _to_epoch_ms(row[3])
+            except (TypeError, ValueError):
+                print(f"迁移删除记录失败，时间格式无效: {row[2]} - {row[3]}")
+                continue
+            rows.append(row[:3] + (delete_at,) + row[4:])
+        
+        # 旧表连同其索引一起删除，索引随后按新表重建
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ALTER TABLE delete_queue RENAME TO delete_queue_legacy")
+        conn.execute(_SQL_CREATE_DELETE_QUEUE)
+        conn.executemany("""
+            INSERT INTO delete_queue
+            (id, task_id, source_path, delete_at, delete_parent, time_base, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.execute("DROP TABLE delete_queue_legacy")
+        conn.commit()
     
     # ==================== 删除队列操作 ====================
     
-    def add_delete_record(self, task_id: str, source_path: str, delete_at: str,
+    def add_delete_record(self, task_id: str, source_path: str, delete_at: TimeValue,
                          delete_parent: bool = False, time_base: str = "SYNC_COMPLETE"):
         """
         添加或更新删除记录
@@ -180,81 +352,79 @@ class Database:
         Args:
             task_id: 任务ID
             source_path: 源文件路径
-            delete_at: 删除时间（ISO格式）
+            delete_at: 删除时间（datetime、ISO 格式字符串或毫秒时间戳）
             delete_parent: 是否删除上级目录
             time_base: 时间基准类型
         """
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO delete_queue (task_id, source_path, delete_at, delete_parent, time_base)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(source_path) DO UPDATE SET
-                    task_id = excluded.task_id,
-                    delete_at = excluded.delete_at,
-                    delete_parent = excluded.delete_parent,
-                    time_base = excluded.time_base,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (task_id, source_path, delete_at, int(delete_parent), time_base))
+            cursor.execute(_SQL_ADD_DELETE, (task_id, source_path, _to_epoch_ms(delete_at), int(delete_parent), time_base))
+    
+    def add_delete_records(self, records: Iterable[Tuple[str, str, TimeValue, bool, str]]) -> int:
+        """
+        批量添加或更新删除记录（单个事务）
+        
+        Args:
+            records: (task_id, source_path, delete_at, delete_parent, time_base) 元组序列
+            
+        Returns:
+            写入的记录数量
+        """
+        rows = [
+            (task_id, source_path, _to_epoch_ms(delete_at), int(delete_parent), time_base)
+            for task_id, source_path, delete_at, delete_parent, time_base in records
+        ]
+        if not rows:
+            return 0
+        
+        with self.write_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_SQL_ADD_DELETE, rows)
             conn.commit()
+        return len(rows)
     
-    def get_expired_records(self, task_id: str, current_time: str) -> List[Dict[str, Any]]:
+    def get_expired_records(self, task_id: str, current_time: TimeValue) -> List[sqlite3.Row]:
         """
         获取指定任务的已到期删除记录
         
         Args:
             task_id: 任务ID
-            current_time: 当前时间（ISO格式）
+            current_time: 当前时间（datetime、ISO 格式字符串或毫秒时间戳）
             
         Returns:
-            到期记录列表
+            到期记录列表（sqlite3.Row，支持按列名取值，delete_at 为毫秒时间戳）
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, task_id, source_path, delete_at, delete_parent, time_base
-                FROM delete_queue
-                WHERE task_id = ? AND delete_at <= ?
-                ORDER BY delete_at ASC
-            """, (task_id, current_time))
+            cursor = _row_cursor(conn)
+            cursor.execute(_SQL_GET_EXPIRED, (task_id, _to_epoch_ms(current_time)))
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
     
-    def get_pending_records(self, task_id: str, current_time: str, 
-                           base_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_pending_records(self, task_id: str, current_time: TimeValue, 
+                           base_dir: Optional[str] = None) -> List[sqlite3.Row]:
         """
         获取指定任务的未到期删除记录
         
         Args:
             task_id: 任务ID
-            current_time: 当前时间（ISO格式）
+            current_time: 当前时间（datetime、ISO 格式字符串或毫秒时间戳）
             base_dir: 可选的目录过滤（检查记录是否在该目录下）
             
         Returns:
-            未到期记录列表
+            未到期记录列表（sqlite3.Row，支持按列名取值，delete_at 为毫秒时间戳）
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = _row_cursor(conn)
             
             if base_dir:
-                # 使用 LIKE 模糊匹配子目录
-                cursor.execute("""
-                    SELECT id, task_id, source_path, delete_at, delete_parent, time_base
-                    FROM delete_queue
-                    WHERE task_id = ? AND delete_at > ? AND source_path LIKE ?
-                    ORDER BY delete_at ASC
-                """, (task_id, current_time, f"{base_dir}%"))
+                # 以 base_dir 为前缀的半开区间 [base_dir, upper)，可直接走索引范围扫描，
+                # 且不受 base_dir 中 % / _ 等通配字符影响
+                upper = base_dir[:-1] + chr(ord(base_dir[-1]) + 1)
+                cursor.execute(_SQL_GET_PENDING_UNDER, (task_id, _to_epoch_ms(current_time), base_dir, upper))
             else:
-                cursor.execute("""
-                    SELECT id, task_id, source_path, delete_at, delete_parent, time_base
-                    FROM delete_queue
-                    WHERE task_id = ? AND delete_at > ?
-                    ORDER BY delete_at ASC
-                """, (task_id, current_time))
+                cursor.execute(_SQL_GET_PENDING, (task_id, _to_epoch_ms(current_time)))
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
     
     def remove_delete_record(self, source_path: str):
         """
@@ -263,10 +433,9 @@ class Database:
         Args:
             source_path: 源文件路径
         """
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM delete_queue WHERE source_path = ?", (source_path,))
-            conn.commit()
+            cursor.execute(_SQL_REMOVE_DELETE, (source_path,))
     
     def remove_delete_records_by_id(self, record_ids: List[int]):
         """
@@ -278,13 +447,13 @@ class Database:
         if not record_ids:
             return
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            placeholders = ','.join('?' * len(record_ids))
-            cursor.execute(f"DELETE FROM delete_queue WHERE id IN ({placeholders})", record_ids)
+        # 固定语句配合 executemany：语句只编译一次，且不受 SQLite 参数个数上限影响
+        with self.write_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_SQL_REMOVE_DELETE_BY_ID, [(record_id,) for record_id in record_ids])
             conn.commit()
     
-    def get_all_delete_records(self, task_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_all_delete_records(self, task_id: Optional[str] = None) -> List[sqlite3.Row]:
         """
         获取所有删除记录
         
@@ -292,27 +461,49 @@ class Database:
             task_id: 可选的任务ID过滤
             
         Returns:
-            删除记录列表
+            删除记录列表（sqlite3.Row，支持按列名取值，delete_at 为毫秒时间戳）
         """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = _row_cursor(conn)
             
             if task_id:
-                cursor.execute("""
-                    SELECT id, task_id, source_path, delete_at, delete_parent, time_base
-                    FROM delete_queue
-                    WHERE task_id = ?
-                    ORDER BY delete_at ASC
-                """, (task_id,))
+                cursor.execute(_SQL_GET_ALL_FOR_TASK, (task_id,))
             else:
-                cursor.execute("""
-                    SELECT id, task_id, source_path, delete_at, delete_parent, time_base
-                    FROM delete_queue
-                    ORDER BY delete_at ASC
-                """)
+                cursor.execute(_SQL_GET_ALL)
             
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return cursor.fetchall()
+    
+    def iter_all_delete_records(self, task_id: Optional[str] = None,
+                                batch_size: int = 1000) -> Iterator[sqlite3.Row]:
+        """
+        逐批流式读取删除记录，内存占用与队列长度无关
+        
+        使用独立的只读连接而不是连接池：迭代期间连接一直被占用，
+        避免调用方在循环内再次查询时与连接池互相等待。
+        
+        Args:
+            task_id: 可选的任务ID过滤
+            batch_size: 每次从 SQLite 取回的行数
+            
+        Yields:
+            删除记录（sqlite3.Row，delete_at 为毫秒时间戳）
+        """
+        conn = self._open_connection(read_only=True)
+        try:
+            cursor = _row_cursor(conn)
+            cursor.arraysize = batch_size
+            if task_id:
+                cursor.execute(_SQL_GET_ALL_FOR_TASK, (task_id,))
+            else:
+                cursor.execute(_SQL_GET_ALL)
+            
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
     
     def get_delete_queue_count(self, task_id: Optional[str] = None) -> int:
         """
@@ -342,7 +533,7 @@ class Database:
                           deleted_at: Optional[str] = None, last_seen_at: Optional[str] = None,
                           last_error: Optional[str] = None, metadata: Optional[str] = None):
         """添加或更新文件缓存记录"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO file_cache (
@@ -365,12 +556,11 @@ class Database:
             """, (task_id, path, size, mtime, file_hash, hash_at, 
                   sync_status, synced_at, deleted_at, last_seen_at, 
                   last_error, metadata))
-            conn.commit()
     
     def get_file_cache(self, task_id: str, path: str) -> Optional[Dict[str, Any]]:
         """获取单个文件缓存记录"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = _row_cursor(conn)
             cursor.execute("""
                 SELECT * FROM file_cache WHERE task_id = ? AND path = ?
             """, (task_id, path))
@@ -381,7 +571,7 @@ class Database:
                            synced_at: Optional[str] = None, deleted_at: Optional[str] = None, 
                            error: Optional[str] = None):
         """更新同步或删除状态"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             updates = ["sync_status = ?", "last_error = ?"]
             params = [status, error]
@@ -396,7 +586,6 @@ class Database:
             params.extend([task_id, path])
             query = f"UPDATE file_cache SET {', '.join(updates)} WHERE task_id = ? AND path = ?"
             cursor.execute(query, params)
-            conn.commit()
 
     def is_file_synced(self, task_id: str, path: str) -> bool:
         """检查文件是否已同步或确认为跳过"""
@@ -407,7 +596,7 @@ class Database:
             """, (task_id, path))
             row = cursor.fetchone()
             if row:
-                return row['sync_status'] in ('SYNCED', 'SKIPPED')
+                return row[0] in ('SYNCED', 'SKIPPED')
             return False
 
     def get_cache_count(self) -> int:
@@ -426,18 +615,18 @@ class Database:
 
     def clear_task_cache(self, task_id: str):
         """清理指定任务的所有缓存"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM file_cache WHERE task_id = ?", (task_id,))
-            conn.commit()
 
     def batch_upsert_file_cache(self, records: List[Dict[str, Any]]):
         """批量添加或更新文件缓存记录"""
         if not records:
             return
             
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
             cursor.executemany("""
                 INSERT INTO file_cache (
                     task_id, path, size, mtime, hash, hash_at, 
@@ -471,8 +660,8 @@ class Database:
         如果同一个文件最后一次记录的状态与当前一致，则更新时间戳和计数，不再新增条目。
         """
         now = datetime.now().isoformat()
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        with self.write_connection() as conn:
+            cursor = _row_cursor(conn)
             
             # 查找该文件最后一条记录
             cursor.execute("""
@@ -497,13 +686,11 @@ class Database:
                     INSERT INTO sync_history (task_id, path, status, timestamp, details)
                     VALUES (?, ?, ?, ?, ?)
                 """, (task_id, path, status, now, details))
-            
-            conn.commit()
 
     def get_history(self, task_id: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """获取历史记录"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = _row_cursor(conn)
             if task_id:
                 cursor.execute("""
                     SELECT * FROM sync_history 
@@ -524,7 +711,7 @@ class Database:
     def get_file_history(self, task_id: str, path: str) -> List[Dict[str, Any]]:
         """获取单个文件的审计历史"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
+            cursor = _row_cursor(conn)
             cursor.execute("""
                 SELECT * FROM sync_history 
                 WHERE task_id = ? AND path = ? 
@@ -535,19 +722,18 @@ class Database:
 
     def clear_history(self, task_id: Optional[str] = None):
         """清理历史记录"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             if task_id:
                 cursor.execute("DELETE FROM sync_history WHERE task_id = ?", (task_id,))
             else:
                 cursor.execute("DELETE FROM sync_history")
-            conn.commit()
     
     # ==================== 配置操作 ====================
     
     def set_config(self, key: str, value: str):
         """设置配置项"""
-        with self.get_connection() as conn:
+        with self.write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO config (key, value, updated_at)
@@ -556,7 +742,6 @@ class Database:
                     value = excluded.value,
                     updated_at = CURRENT_TIMESTAMP
             """, (key, value))
-            conn.commit()
     
     def get_config(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """获取配置项"""
@@ -581,40 +766,44 @@ class Database:
         if not delete_queue:
             return 0
         
-        migrated_count = 0
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            for record in delete_queue:
-                try:
-                    task_id = record.get('task_id')
-                    source_path = record.get('source_path')
-                    delete_at = record.get('delete_at')
-                    delete_parent = record.get('delete_parent', False)
-                    time_base = record.get('time_base', 'SYNC_COMPLETE')
-                    
-                    if not all([task_id, source_path, delete_at]):
-                        continue
-                    
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO delete_queue 
-                        (task_id, source_path, delete_at, delete_parent, time_base)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (task_id, source_path, delete_at, int(delete_parent), time_base))
-                    
-                    if cursor.rowcount > 0:
-                        migrated_count += 1
-                
-                except Exception as e:
-                    print(f"迁移记录失败: {record.get('source_path')} - {e}")
-                    continue
-            
-            conn.commit()
+        # 先在 Python 侧筛出有效记录，再整批写入
+        rows = []
+        for record in delete_queue:
+            if not isinstance(record, dict):
+                continue
+            task_id = record.get('task_id')
+            source_path = record.get('source_path')
+            delete_at = record.get('delete_at')
+            if not (task_id and source_path and delete_at):
+                continue
+            try:
+                delete_at = _to_epoch_ms(delete_at)
+            except (TypeError, ValueError) as e:
+                print(f"迁移记录失败: {source_path} - {e}")
+                continue
+            rows.append((
+                task_id,
+                source_path,
+                delete_at,
+                int(bool(record.get('delete_parent', False))),
+                record.get('time_base', 'SYNC_COMPLETE'),
+            ))
+        if not rows:
+            return 0
         
-        return migrated_count
+        with self.write_connection() as conn:
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(_SQL_MIGRATE_DELETE, rows)
+            conn.commit()
+            return conn.total_changes - before
     
     def close(self):
-        """关闭数据库连接"""
-        if hasattr(self._local, 'conn'):
-            self._local.conn.close()
-            delattr(self._local, 'conn')
+        """关闭连接池中的只读连接与共享写连接"""
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            self._writer_conn.close()
@@ -2,9 +2,10 @@
 数据模型定义
 """
 
+import threading
 import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, FrozenSet
 from enum import Enum
 
 COPY_MODES = {"COPY", "HARDLINK", "SYMLINK"}
@@ -32,9 +33,103 @@ class StrmMode(Enum):
     ALIST_PATH = "AlistPath"    # Alist 路径
 
 
+# 枚举成员到取值的查找表：to_dict 中以一次字典查找代替 .value 描述符访问
+_ENUM_VALUES = {
+    member: member.value
+    for enum_cls in (ScheduleType, TaskStatus, StrmMode)
+    for member in enum_cls
+}
+
+
+# 名称到枚举成员的查找表：构造任务时直接查表，不经过 EnumMeta.__getitem__
+_SCHEDULE_TYPES = ScheduleType.__members__
+_TASK_STATUSES = TaskStatus.__members__
+# STRM 模式同时接受成员名（ALIST_URL）、取值（AlistURL）及取值的大写形式（ALISTURL）
+_STRM_MODES = {
+    key: member
+    for member in StrmMode
+    for key in (member.name, member.value, member.value.upper())
+}
+
+
+def parse_strm_mode(mode) -> StrmMode:
+    """解析 STRM 模式，接受 StrmMode、成员名或取值（大小写不敏感），无法识别时抛出 ValueError"""
+    if isinstance(mode, StrmMode):
+        return mode
+    if isinstance(mode, str):
+        member = _STRM_MODES.get(mode) or _STRM_MODES.get(mode.upper())
+        if member is not None:
+            return member
+    raise ValueError(f"未知的 STRM 模式: {mode}")
+
+
+def parse_schedule_type(schedule_type) -> ScheduleType:
+    """解析调度类型，接受 ScheduleType 或成员名，无法识别时抛出 ValueError"""
+    if isinstance(schedule_type, ScheduleType):
+        return schedule_type
+    member = _SCHEDULE_TYPES.get(schedule_type) if isinstance(schedule_type, str) else None
+    if member is None:
+        raise ValueError(f"未知的调度类型: {schedule_type}")
+    return member
+
+
+def normalize_suffix_list(suffix_list: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """将后缀列表规范化为小写、不带点的 frozenset，便于按文件 O(1) 判断；空列表返回 None"""
+    if not suffix_list:
+        return None
+    return frozenset(s.lower().lstrip(".") for s in suffix_list)
+
+
+# 任务状态比较并切换（try_transition）共用的锁；状态切换很少发生，不必每个任务一把锁
+_STATUS_LOCK = threading.Lock()
+
+
+# SyncTask 的全部字段（同时作为 __slots__ 与 to_dict 的输出顺序）
+_SYNC_TASK_FIELDS = (
+    "id", "name", "source_path", "target_path", "interval", "schedule_type",
+    "cron_expression", "status", "last_run_time", "enabled", "recursive",
+    "overwrite_existing", "thread_count", "rule_not_exists", "rule_size_diff",
+    "rule_mtime_newer", "is_slow_storage", "size_min_bytes", "size_max_bytes",
+    "suffix_mode", "suffix_list", "delete_source", "delete_delay_days",
+    "delete_time_base", "delete_parent", "delete_parent_levels",
+    "delete_parent_force", "copy_mode", "target_type",
+)
+
+# from_dict 使用的 (构造参数, 字典键, 默认值) 表；name/source_path/target_path 为必填字段
+_SYNC_TASK_SCHEMA = (
+    ("task_id", "id", None),
+    ("interval", "interval", 300),
+    ("schedule_type", "schedule_type", "INTERVAL"),
+    ("cron_expression", "cron_expression", None),
+    ("status", "status", "IDLE"),
+    ("last_run_time", "last_run_time", None),
+    ("enabled", "enabled", True),
+    ("overwrite_existing", "overwrite_existing", False),
+    ("thread_count", "thread_count", 1),
+    ("rule_not_exists", "rule_not_exists", False),
+    ("rule_size_diff", "rule_size_diff", False),
+    ("rule_mtime_newer", "rule_mtime_newer", False),
+    ("is_slow_storage", "is_slow_storage", False),
+    ("size_min_bytes", "size_min_bytes", None),
+    ("size_max_bytes", "size_max_bytes", None),
+    ("suffix_mode", "suffix_mode", "NONE"),
+    ("suffix_list", "suffix_list", None),
+    ("delete_source", "delete_source", False),
+    ("delete_delay_days", "delete_delay_days", None),
+    ("delete_time_base", "delete_time_base", "SYNC_COMPLETE"),
+    ("delete_parent", "delete_parent", False),
+    ("delete_parent_levels", "delete_parent_levels", 0),
+    ("delete_parent_force", "delete_parent_force", False),
+    ("copy_mode", "copy_mode", "COPY"),
+    ("target_type", "target_type", "LOCAL"),
+)
+
+
 class SyncTask:
     """同步任务数据模型"""
     
+    __slots__ = _SYNC_TASK_FIELDS
+    
     def __init__(
         self,
         name: str,
@@ -56,7 +151,7 @@ class SyncTask:
         size_min_bytes: Optional[int] = None,  # 最小文件大小（字节），None 表示不限制
         size_max_bytes: Optional[int] = None,  # 最大文件大小（字节），None 表示不限制
         suffix_mode: str = "NONE",  # 后缀过滤模式：NONE/INCLUDE/EXCLUDE
-        suffix_list: Optional[list[str]] = None,  # 后缀列表，小写且不带点，如 ["mp4", "mkv"]
+        suffix_list: Optional[Iterable[str]] = None,  # 后缀列表，规范化为小写且不带点的 frozenset，如 {"mp4", "mkv"}
         delete_source: bool = False,  # 是否删除源文件
         delete_delay_days: Optional[int] = None,  # 删除延迟天数，0 表示同步完成后立即删除
         delete_time_base: str = "SYNC_COMPLETE",  # 删除时间基准：SYNC_COMPLETE / FILE_CREATE
@@ -96,9 +191,9 @@ class SyncTask:
         self.source_path = source_path
         self.target_path = target_path
         self.interval = interval
-        self.schedule_type = ScheduleType[schedule_type] if isinstance(schedule_type, str) else schedule_type
+        self.schedule_type = _SCHEDULE_TYPES[schedule_type] if isinstance(schedule_type, str) else schedule_type
         self.cron_expression = cron_expression
-        self.status = TaskStatus[status] if isinstance(status, str) else status
+        self.status = _TASK_STATUSES[status] if isinstance(status, str) else status
         self.last_run_time = last_run_time
         self.enabled = enabled
         self.recursive = True  # 固定为递归模式
@@ -116,7 +211,7 @@ class SyncTask:
         self.size_max_bytes = size_max_bytes
         # 规范化后缀过滤配置
         self.suffix_mode = (suffix_mode or "NONE").upper()
-        self.suffix_list = [s.lower().lstrip(".") for s in suffix_list] if suffix_list else None
+        self.suffix_list = normalize_suffix_list(suffix_list)
         # 删除源文件配置
         self.delete_source = delete_source
         self.delete_delay_days = delete_delay_days
@@ -146,37 +241,13 @@ class SyncTask:
         Returns:
             包含任务所有字段的字典
         """
-        return {
-            "id": self.id,
-            "name": self.name,
-            "source_path": self.source_path,
-            "target_path": self.target_path,
-            "interval": self.interval,
-            "schedule_type": self.schedule_type.value,
-            "cron_expression": self.cron_expression,
-            "status": self.status.value,
-            "last_run_time": self.last_run_time,
-            "enabled": self.enabled,
-            "recursive": self.recursive,
-            "overwrite_existing": self.overwrite_existing,
-            "thread_count": self.thread_count,
-            "rule_not_exists": self.rule_not_exists,
-            "rule_size_diff": self.rule_size_diff,
-            "rule_mtime_newer": self.rule_mtime_newer,
-            "is_slow_storage": self.is_slow_storage,
-            "size_min_bytes": self.size_min_bytes,
-            "size_max_bytes": self.size_max_bytes,
-            "suffix_mode": self.suffix_mode,
-            "suffix_list": self.suffix_list,
-            "delete_source": self.delete_source,
-            "delete_delay_days": self.delete_delay_days,
-            "delete_time_base": self.delete_time_base,
-            "delete_parent": self.delete_parent,
-            "delete_parent_levels": self.delete_parent_levels,
-            "delete_parent_force": self.delete_parent_force,
-            "copy_mode": self.copy_mode,
-            "target_type": self.target_type
-        }
+        data = {key: getattr(self, key) for key in _SYNC_TASK_FIELDS}
+        data["schedule_type"] = _ENUM_VALUES[self.schedule_type]
+        data["status"] = _ENUM_VALUES[self.status]
+        # frozenset 无序，输出排序后的列表以保证 JSON 稳定
+        if self.suffix_list is not None:
+            data["suffix_list"] = sorted(self.suffix_list)
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'SyncTask':
@@ -189,35 +260,12 @@ class SyncTask:
         Returns:
             SyncTask 实例
         """
+        get = data.get
         return cls(
-            task_id=data.get("id"),
             name=data["name"],
             source_path=data["source_path"],
             target_path=data["target_path"],
-            interval=data.get("interval", 300),
-            schedule_type=data.get("schedule_type", "INTERVAL"),
-            cron_expression=data.get("cron_expression"),
-            status=data.get("status", "IDLE"),
-            last_run_time=data.get("last_run_time"),
-            enabled=data.get("enabled", True),
-            overwrite_existing=data.get("overwrite_existing", False),
-            thread_count=data.get("thread_count", 1),
-            rule_not_exists=data.get("rule_not_exists", False),
-            rule_size_diff=data.get("rule_size_diff", False),
-            rule_mtime_newer=data.get("rule_mtime_newer", False),
-            is_slow_storage=data.get("is_slow_storage", False),
-            size_min_bytes=data.get("size_min_bytes"),
-            size_max_bytes=data.get("size_max_bytes"),
-            suffix_mode=data.get("suffix_mode", "NONE"),
-            suffix_list=data.get("suffix_list"),
-            delete_source=data.get("delete_source", False),
-            delete_delay_days=data.get("delete_delay_days"),
-            delete_time_base=data.get("delete_time_base", "SYNC_COMPLETE"),
-            delete_parent=data.get("delete_parent", False),
-            delete_parent_levels=data.get("delete_parent_levels", 0),
-            delete_parent_force=data.get("delete_parent_force", False),
-            copy_mode=data.get("copy_mode", "COPY"),
-            target_type=data.get("target_type", "LOCAL")
+            **{param: get(key, default) for param, key, default in _SYNC_TASK_SCHEMA}
         )
     
     def update_status(self, new_status: TaskStatus):
@@ -229,6 +277,19 @@ class SyncTask:
         """
         self.status = new_status
     
+    def try_transition(self, from_status: TaskStatus, to_status: TaskStatus) -> bool:
+        """
+        原子地将状态从 from_status 切换为 to_status
+        
+        Returns:
+            当前状态为 from_status 并已切换时返回 True
+        """
+        with _STATUS_LOCK:
+            if self.status != from_status:
+                return False
+            self.status = to_status
+            return True
+    
     def update_last_run_time(self):
         """更新上次运行时间为当前时间"""
         self.last_run_time = datetime.now().isoformat()
@@ -321,13 +382,14 @@ class StrmTask:
             smart_protection: 智能删除保护配置，格式如 {"threshold": 100, "grace_scans": 3}
         """
         self.id = task_id if task_id else str(uuid.uuid4())
+        self.job_id = f"strm_{self.id}"  # APScheduler 中对应的 job id
         self.name = name
         self.source_dir = source_dir
         self.target_dir = target_dir
         self.interval = interval
-        self.schedule_type = ScheduleType[schedule_type] if isinstance(schedule_type, str) else schedule_type
+        self.schedule_type = _SCHEDULE_TYPES[schedule_type] if isinstance(schedule_type, str) else schedule_type
         self.cron_expression = cron_expression
-        self.status = TaskStatus[status] if isinstance(status, str) else status
+        self.status = _TASK_STATUSES[status] if isinstance(status, str) else status
         self.last_run_time = last_run_time
         self.enabled = enabled
         
@@ -339,7 +401,7 @@ class StrmTask:
         self.openlist_public_url = openlist_public_url
         
         # STRM 生成配置
-        self.mode = StrmMode[mode.upper().replace("ALIST", "ALIST_")] if isinstance(mode, str) else mode
+        self.mode = parse_strm_mode(mode)
         self.flatten_mode = flatten_mode
         self.subtitle = subtitle
         self.image = image
@@ -377,9 +439,9 @@ class StrmTask:
             "source_dir": self.source_dir,
             "target_dir": self.target_dir,
             "interval": self.interval,
-            "schedule_type": self.schedule_type.value,
+            "schedule_type": _ENUM_VALUES[self.schedule_type],
             "cron_expression": self.cron_expression,
-            "status": self.status.value,
+            "status": _ENUM_VALUES[self.status],
             "last_run_time": self.last_run_time,
             "enabled": self.enabled,
             "openlist_url": self.openlist_url,
@@ -387,7 +449,7 @@ class StrmTask:
             "openlist_password": self.openlist_password,
             "openlist_token": self.openlist_token,
             "openlist_public_url": self.openlist_public_url,
-            "mode": self.mode.value,
+            "mode": _ENUM_VALUES[self.mode],
             "flatten_mode": self.flatten_mode,
             "subtitle": self.subtitle,
             "image": self.image,
@@ -459,6 +521,19 @@ class StrmTask:
         """
         self.status = new_status
     
+    def try_transition(self, from_status: TaskStatus, to_status: TaskStatus) -> bool:
+        """
+        原子地将状态从 from_status 切换为 to_status
+        
+        Returns:
+            当前状态为 from_status 并已切换时返回 True
+        """
+        with _STATUS_LOCK:
+            if self.status != from_status:
+                return False
+            self.status = to_status
+            return True
+    
     def update_last_run_time(self):
         """更新上次运行时间为当前时间"""
         self.last_run_time = datetime.now().isoformat()
@@ -4,13 +4,85 @@ OpenList (原 AList) 客户端
 """
 
 import logging
+import os
+import queue
+import threading
+import time
+import orjson
 import requests
-from typing import Optional, Dict, Any, List, AsyncIterator
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional, Dict, Any, List, AsyncIterator, Collection, Tuple
+from dataclasses import dataclass, field
 
+# 文件类型编码，由 OpenListClient.file_type 按扩展名查表得到
+FILE_TYPE_OTHER = 0
+FILE_TYPE_VIDEO = 1
+FILE_TYPE_SUBTITLE = 2
+FILE_TYPE_IMAGE = 3
+FILE_TYPE_NFO = 4
 
-@dataclass
+# 登录 Token 缓存文件，进程重启后复用未过期的 Token，避免每次启动都重新登录
+TOKEN_CACHE_PATH = Path('config/openlist_token.json')
+# Token 缓存有效期（秒），小于 OpenList 默认的 48 小时过期时间
+TOKEN_CACHE_TTL = 24 * 3600
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+# 并行遍历目录时同时进行的 list 请求数（不超过连接池大小）
+TRAVERSAL_WORKERS = 8
+
+# 批量删除时单次请求的最大路径数，避免请求体过大或超时导致整批失败
+REMOVE_BATCH_SIZE = 500
+
+# 目录扫描线程发给遍历生成器的消息类型
+_MSG_FILES = 0     # 负载为一页中的 OpenListFile 列表
+_MSG_SUBDIRS = 1   # 负载为子目录路径列表，由生成器继续提交扫描
+_MSG_PAGES = 2     # 负载为 (目录路径, 剩余页码列表)，由生成器并行提交
+_MSG_DONE = 3      # 一个分页扫描结束
+
+
+def split_name(name: str) -> Tuple[str, str]:
+    """拆分为 (stem, suffix)，与 Path(name).stem / .suffix 语义一致，不构造 Path 对象"""
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ''
+
+
+def _token_cache_key(url: str, username: str) -> str:
+    return f"{username}@{url}"
+
+
+def _load_cached_token(url: str, username: str) -> Optional[str]:
+    """读取缓存的 Token，不存在或已过期时返回 None"""
+    try:
+        cache = orjson.loads(TOKEN_CACHE_PATH.read_bytes())
+        entry = cache.get(_token_cache_key(url, username)) or {}
+    except Exception:
+        return None
+    if time.time() - entry.get('issued_at', 0) >= TOKEN_CACHE_TTL:
+        return None
+    return entry.get('token') or None
+
+
+def _save_cached_token(url: str, username: str, token: str):
+    """写入 Token 缓存（先写临时文件再原子替换）"""
+    with _TOKEN_CACHE_LOCK:
+        try:
+            try:
+                cache = orjson.loads(TOKEN_CACHE_PATH.read_bytes())
+            except Exception:
+                cache = {}
+            cache[_token_cache_key(url, username)] = {'token': token, 'issued_at': time.time()}
+            TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = TOKEN_CACHE_PATH.with_suffix(TOKEN_CACHE_PATH.suffix + '.tmp')
+            tmp.write_bytes(orjson.dumps(cache))
+            os.replace(tmp, TOKEN_CACHE_PATH)
+        except Exception as e:
+            logging.warning(f"⚠️ 保存 OpenList Token 缓存失败: {e}")
+
+
+@dataclass(slots=True)
 class OpenListFile:
     """OpenList 文件信息"""
     name: str
@@ -22,16 +94,14 @@ class OpenListFile:
     sign: str = ""
     raw_url: str = ""
     download_url: str = ""
+    # 文件名（不含扩展名）与小写扩展名（含点，如 .mp4），构造时计算一次
+    stem: str = field(init=False, repr=False, compare=False)
+    suffix_lower: str = field(init=False, repr=False, compare=False)
     
-    @property
-    def suffix(self) -> str:
-        """获取文件扩展名（含点，如 .mp4）"""
-        return Path(self.name).suffix
-    
-    @property
-    def stem(self) -> str:
-        """获取文件名（不含扩展名）"""
-        return Path(self.name).stem
+    def __post_init__(self):
+        stem, suffix = split_name(self.name)
+        self.stem = stem
+        self.suffix_lower = suffix.lower()
 
 
 class OpenListClient:
@@ -85,10 +155,25 @@ class OpenListClient:
             nfo_extensions: 自定义 NFO 扩展名列表
         """
         self.url = url.rstrip('/')
+        # API 地址只拼接一次
+        self._ep_login = f"{self.url}/api/auth/login"
+        self._ep_me = f"{self.url}/api/me"
+        self._ep_list = f"{self.url}/api/fs/list"
+        self._ep_get = f"{self.url}/api/fs/get"
+        self._ep_remove = f"{self.url}/api/fs/remove"
         self.username = username
         self.password = password
+        # 未直接提供 Token 时，优先复用上次登录缓存的 Token
+        if not token and username and password:
+            token = _load_cached_token(self.url, username)
         self._token = token
+        # 已带 Token 的请求头，登录后失效重建
+        self._headers_cache: Optional[Tuple[str, Dict[str, str]]] = None
+        # 并行扫描时多个线程可能同时发现需要登录，只让一个线程真正登录
+        self._login_lock = threading.Lock()
         self.public_url = public_url.rstrip('/') if public_url else None
+        # 下载链接前缀：配置了公共地址时直接使用公共地址
+        self._download_prefix = f"{self.public_url or self.url}/d/"
         self.timeout = timeout
         self.max_retries = max_retries
         
@@ -99,6 +184,16 @@ class OpenListClient:
             self.IMAGE_EXTENSIONS = {ext.lower() if ext.startswith('.') else f'.{ext.lower()}' for ext in image_extensions}
         if nfo_extensions:
             self.NFO_EXTENSIONS = {ext.lower() if ext.startswith('.') else f'.{ext.lower()}' for ext in nfo_extensions}
+        
+        # 扩展名 -> 文件类型编码，一次查表完成分类；扩展名重复时按视频、字幕、图片、NFO 的顺序优先
+        self._type_table: Dict[str, int] = {}
+        for file_type, extensions in (
+            (FILE_TYPE_NFO, self.NFO_EXTENSIONS),
+            (FILE_TYPE_IMAGE, self.IMAGE_EXTENSIONS),
+            (FILE_TYPE_SUBTITLE, self.SUBTITLE_EXTENSIONS),
+            (FILE_TYPE_VIDEO, self.VIDEO_EXTENSIONS),
+        ):
+            self._type_table.update(dict.fromkeys(extensions, file_type))
             
         self._session = requests.Session()
         # 配置重试适配器
@@ -119,13 +214,29 @@ class OpenListClient:
         self._session.mount("http://", adapter)
         self._session.mount("https://", adapter)
     
-    @property
-    def token(self) -> Optional[str]:
-        """获取 Token，如果没有则尝试登录"""
-        if not self._token:
-            if self.username and self.password:
-                self.login()
-        return self._token
+    def _ensure_token(self, stale: Optional[str] = None) -> Optional[str]:
+        """
+        确保持有可用的 Token
+        
+        没有 Token，或当前 Token 就是刚被服务端拒绝的 stale 时登录；
+        其他线程已经换到新 Token 时直接返回，不重复登录。
+        
+        Args:
+            stale: 已失效的 Token
+            
+        Returns:
+            当前 Token，无法登录时为 None
+        """
+        token = self._token
+        if token and token != stale:
+            return token
+        if not (self.username and self.password):
+            return None if token == stale else token
+        with self._login_lock:
+            token = self._token
+            if token and token != stale:
+                return token
+            return self._token if self.login() else None
     
     def login(self) -> bool:
         """
@@ -136,7 +247,7 @@ class OpenListClient:
         """
         try:
             response = self._session.post(
-                f"{self.url}/api/auth/login",
+                self._ep_login,
                 json={
                     "username": self.username,
                     "password": self.password
@@ -145,10 +256,12 @@ class OpenListClient:
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 if data.get('code') == 200:
                     self._token = data.get('data', {}).get('token')
+                    self._headers_cache = None
                     if self._token:
+                        _save_cached_token(self.url, self.username, self._token)
                         logging.info(f"✅ OpenList 登录成功: {self.url}")
                         return True
                     else:
@@ -165,14 +278,74 @@ class OpenListClient:
             logging.error(f"❌ OpenList 登录异常: {e}")
             return False
     
-    def _get_headers(self) -> Dict[str, str]:
-        """获取请求头"""
+    def _get_headers(self) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        获取请求头及其携带的 Token
+        
+        拿到 Token 后缓存同一个字典复用（requests 不会修改传入的 headers）。
+        缓存与构建它的 Token 绑定，Token 变化后重建，并发登录时不会复用旧 Token 的请求头；
+        没有 Token 时不缓存，下次调用仍会尝试登录。
+        """
+        token = self._token
+        cached = self._headers_cache
+        if cached is not None and token and cached[0] == token:
+            return cached
         headers = {
             'Content-Type': 'application/json'
         }
-        if self.token:
-            headers['Authorization'] = f'Bearer {self.token}'
-        return headers
+        token = token or self._ensure_token()
+        if not token:
+            return None, headers
+        headers['Authorization'] = f'Bearer {token}'
+        cached = (token, headers)
+        # 构建期间其他线程已重新登录时不写入缓存
+        if self._token == token:
+            self._headers_cache = cached
+        return cached
+    
+    @staticmethod
+    def _is_unauthorized(status_code: int, data: Optional[dict]) -> bool:
+        """Token 失效：HTTP 401，或 HTTP 200 但响应体 code 为 401"""
+        return status_code == 401 or (data is not None and data.get('code') == 401)
+    
+    def _post(self, endpoint: str, payload: Dict[str, Any]) -> Tuple[int, Optional[dict]]:
+        """POST 调用 API，见 _request"""
+        return self._request('POST', endpoint, payload)
+    
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Tuple[int, Optional[dict]]:
+        """
+        调用 API，Token 失效时重新登录并重试一次
+        
+        Args:
+            method: HTTP 方法（GET / POST）
+            endpoint: 完整的 API 地址（self._ep_*）
+            payload: 请求体，GET 请求为 None
+        
+        Returns:
+            (HTTP 状态码, 解析后的响应体)，非 200 时响应体为 None
+        """
+        for attempt in range(2):
+            # 失效判断以本次实际发送的 Token 为准，其他线程已换到新 Token 时不会重复登录
+            used_token, headers = self._get_headers()
+            response = self._session.request(
+                method,
+                endpoint,
+                json=payload,
+                headers=headers,
+                timeout=self.timeout
+            )
+            data = orjson.loads(response.content) if response.status_code == 200 else None
+            if attempt or not self._is_unauthorized(response.status_code, data):
+                break
+            if not self._ensure_token(stale=used_token):
+                break
+            logging.info(f"🔑 OpenList Token 已失效，重新登录后重试: {endpoint}")
+        return response.status_code, data
     
     def list_dir(
         self, 
@@ -199,27 +372,21 @@ class OpenListClient:
             }
         """
         try:
-            response = self._session.post(
-                f"{self.url}/api/fs/list",
-                json={
-                    "path": path,
-                    "page": page,
-                    "per_page": per_page,
-                    "refresh": refresh
-                },
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+            status_code, data = self._post(self._ep_list, {
+                "path": path,
+                "page": page,
+                "per_page": per_page,
+                "refresh": refresh
+            })
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 if data.get('code') == 200:
                     return data.get('data', {})
                 else:
                     logging.warning(f"⚠️ 列目录失败: {path} - {data.get('message', '未知错误')}")
                     return {}
             else:
-                logging.warning(f"⚠️ 列目录失败: {path} - HTTP {response.status_code}")
+                logging.warning(f"⚠️ 列目录失败: {path} - HTTP {status_code}")
                 return {}
                 
         except Exception as e:
@@ -237,22 +404,16 @@ class OpenListClient:
             文件信息字典或 None
         """
         try:
-            response = self._session.post(
-                f"{self.url}/api/fs/get",
-                json={"path": path},
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+            status_code, data = self._post(self._ep_get, {"path": path})
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 if data.get('code') == 200:
                     return data.get('data', {})
                 else:
                     logging.warning(f"⚠️ 获取文件信息失败: {path} - {data.get('message')}")
                     return None
             else:
-                logging.warning(f"⚠️ 获取文件信息失败: {path} - HTTP {response.status_code}")
+                logging.warning(f"⚠️ 获取文件信息失败: {path} - HTTP {status_code}")
                 return None
                 
         except Exception as e:
@@ -262,86 +423,181 @@ class OpenListClient:
     def iter_all_files(
         self,
         root_path: str,
-        per_page: int = 100
+        per_page: int = 100,
+        max_workers: int = TRAVERSAL_WORKERS
     ) -> AsyncIterator[OpenListFile]:
         """
         递归遍历目录下的所有文件（同步生成器）
         
+        各目录的 list 请求由线程池并行发出，结果经队列交给生成器依次产出；
+        文件产出顺序与目录结构无关。
+        
         Args:
             root_path: 根目录路径
             per_page: 每页数量
+            max_workers: 并行扫描的目录数
             
         Yields:
             OpenListFile 对象
         """
-        def _iter_recursive(path: str):
-            page = 1
-            while True:
-                result = self.list_dir(path, page=page, per_page=per_page)
+        return self._iter_files(root_path, per_page, max_workers, None)
+    
+    def iter_files_of_types(
+        self,
+        root_path: str,
+        file_types: Collection[int],
+        per_page: int = 100,
+        max_workers: int = TRAVERSAL_WORKERS
+    ) -> AsyncIterator[OpenListFile]:
+        """
+        递归遍历目录下指定类型的文件
+        
+        与 iter_all_files 相同，但在扫描线程中先按扩展名过滤，
+        不需要的文件不会构造 OpenListFile。
+        
+        Args:
+            root_path: 根目录路径
+            file_types: 需要的文件类型编码（FILE_TYPE_*）
+            per_page: 每页数量
+            max_workers: 并行扫描的目录数
+            
+        Yields:
+            OpenListFile 对象
+        """
+        allowed = frozenset(
+            suffix for suffix, file_type in self._type_table.items() if file_type in file_types
+        )
+        return self._iter_files(root_path, per_page, max_workers, allowed)
+    
+    def _iter_files(
+        self,
+        root_path: str,
+        per_page: int,
+        max_workers: int,
+        allowed: Optional[frozenset]
+    ) -> AsyncIterator[OpenListFile]:
+        """遍历生成器，allowed 为允许的小写扩展名集合，None 表示不过滤"""
+        messages: "queue.Queue[tuple]" = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="OpenListScan")
+        # 已提交但尚未完成的分页扫描数，只在生成器所在线程中修改
+        pending = 1
+        try:
+            executor.submit(self._scan_page, root_path, 1, per_page, messages, allowed)
+            while pending:
+                kind, payload = messages.get()
+                if kind == _MSG_FILES:
+                    yield from payload
+                elif kind == _MSG_SUBDIRS:
+                    pending += len(payload)
+                    for sub_path in payload:
+                        executor.submit(self._scan_page, sub_path, 1, per_page, messages, allowed)
+                elif kind == _MSG_PAGES:
+                    path, pages = payload
+                    pending += len(pages)
+                    for page in pages:
+                        executor.submit(self._scan_page, path, page, per_page, messages, allowed)
+                else:
+                    pending -= 1
+        finally:
+            # 调用方提前结束迭代时，丢弃尚未开始的扫描
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _scan_page(
+        self,
+        path: str,
+        page: int,
+        per_page: int,
+        messages: "queue.Queue[tuple]",
+        allowed: Optional[frozenset] = None
+    ):
+        """
+        扫描目录的一页，文件与子目录通过消息队列交给遍历生成器
+        
+        第一页返回后即可由 total 得知总页数，剩余分页交回生成器并行提交，
+        不必等前一页处理完再请求下一页。
+        """
+        try:
+            result = self.list_dir(path, page=page, per_page=per_page)
+            content = result.get('content') if result else None
+            if not content:
+                return
+            
+            if page == 1:
+                total = result.get('total', 0) or 0
+                last_page = -(-total // per_page)
+                if last_page > 1:
+                    messages.put((_MSG_PAGES, (path, range(2, last_page + 1))))
+            
+            # 根目录或带尾部斜杠的路径直接拼接，避免出现双斜杠
+            prefix = path if path.endswith('/') else f"{path}/"
+            download_prefix = self._download_prefix
+            sub_dirs = []
+            files = []
+            for item in content:
+                name = item.get('name', '')
+                is_dir = item.get('is_dir', False)
                 
-                if not result or 'content' not in result:
-                    break
+                # 构建完整路径
+                full_path = prefix + name
                 
-                content = result['content']
-                if not content:
-                    break
+                if is_dir:
+                    sub_dirs.append(full_path)
+                    continue
                 
-                for item in content:
-                    name = item.get('name', '')
-                    is_dir = item.get('is_dir', False)
-                    
-                    # 构建完整路径
-                    full_path = f"{path}/{name}".replace('//', '/')
-                    
-                    if is_dir:
-                        # 递归处理子目录
-                        yield from _iter_recursive(full_path)
-                    else:
-                        # 返回文件信息
-                        file_obj = OpenListFile(
-                            name=name,
-                            path=path,
-                            full_path=full_path,
-                            is_dir=False,
-                            size=item.get('size', 0),
-                            modified=item.get('modified', ''),
-                            sign=item.get('sign', ''),
-                            raw_url=item.get('raw_url', '')
-                        )
-                        
-                        # 构建下载链接
-                        if file_obj.sign:
-                            download_url = f"{self.url}/d/{file_obj.sign}/{file_obj.name}"
-                            if self.public_url:
-                                download_url = download_url.replace(self.url, self.public_url)
-                            file_obj.download_url = download_url
-                        
-                        yield file_obj
+                if allowed is not None and split_name(name)[1].lower() not in allowed:
+                    continue
+                
+                file_obj = OpenListFile(
+                    name=name,
+                    path=path,
+                    full_path=full_path,
+                    is_dir=False,
+                    size=item.get('size', 0),
+                    modified=item.get('modified', ''),
+                    sign=item.get('sign', ''),
+                    raw_url=item.get('raw_url', '')
+                )
                 
-                # 检查是否还有下一页
-                total = result.get('total', 0)
-                if page * per_page >= total:
-                    break
+                # 构建下载链接
+                if file_obj.sign:
+                    file_obj.download_url = f"{download_prefix}{file_obj.sign}/{name}"
                 
-                page += 1
+                files.append(file_obj)
+            
+            # 整页一次入队，避免每个文件一次队列加锁与唤醒
+            if files:
+                messages.put((_MSG_FILES, files))
+            if sub_dirs:
+                messages.put((_MSG_SUBDIRS, sub_dirs))
+        except Exception as e:
+            logging.error(f"❌ 扫描目录异常: {path} (第 {page} 页) - {e}")
+        finally:
+            messages.put((_MSG_DONE, None))
+    
+    def file_type(self, suffix_lower: str) -> int:
+        """
+        按小写扩展名（含点）返回文件类型编码（FILE_TYPE_*）
         
-        yield from _iter_recursive(root_path)
+        Args:
+            suffix_lower: 小写扩展名，如 OpenListFile.suffix_lower
+        """
+        return self._type_table.get(suffix_lower, FILE_TYPE_OTHER)
     
     def is_video_file(self, file: OpenListFile) -> bool:
         """判断是否为视频文件"""
-        return file.suffix.lower() in self.VIDEO_EXTENSIONS
+        return file.suffix_lower in self.VIDEO_EXTENSIONS
     
     def is_subtitle_file(self, file: OpenListFile) -> bool:
         """判断是否为字幕文件"""
-        return file.suffix.lower() in self.SUBTITLE_EXTENSIONS
+        return file.suffix_lower in self.SUBTITLE_EXTENSIONS
     
     def is_image_file(self, file: OpenListFile) -> bool:
         """判断是否为图片文件"""
-        return file.suffix.lower() in self.IMAGE_EXTENSIONS
+        return file.suffix_lower in self.IMAGE_EXTENSIONS
     
     def is_nfo_file(self, file: OpenListFile) -> bool:
         """判断是否为 NFO 文件"""
-        return file.suffix.lower() in self.NFO_EXTENSIONS
+        return file.suffix_lower in self.NFO_EXTENSIONS
     
     def test_connection(self) -> bool:
         """
@@ -351,15 +607,10 @@ class OpenListClient:
             是否连接成功
         """
         try:
-            # 尝试获取用户信息
-            response = self._session.get(
-                f"{self.url}/api/me",
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+            # 尝试获取用户信息（Token 失效时会重新登录并重试）
+            status_code, data = self._request('GET', self._ep_me)
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 if data.get('code') == 200:
                     logging.info(f"✅ OpenList 连接测试成功: {self.url}")
                     return True
@@ -374,29 +625,60 @@ class OpenListClient:
             logging.error(f"❌ OpenList 连接测试失败: {e}")
             return False
 
-    def remove_files(self, paths: List[str]) -> bool:
+    def remove_files(self, paths: List[str], batch_size: int = REMOVE_BATCH_SIZE) -> bool:
         """
         删除 OpenList 上的文件或目录
         
         Args:
             paths: 要删除的路径列表
+            batch_size: 单次请求的最大路径数
             
         Returns:
-            是否删除成功
+            是否全部删除成功
         """
-        if not paths:
-            return True
+        return not self.remove_files_batched(paths, batch_size)
+    
+    def remove_files_batched(
+        self,
+        paths: List[str],
+        batch_size: int = REMOVE_BATCH_SIZE,
+        max_workers: int = TRAVERSAL_WORKERS
+    ) -> List[str]:
+        """
+        分批删除 OpenList 上的文件或目录，多批并行发出
+        
+        单批失败只影响该批路径，其余批次照常删除。
+        
+        Args:
+            paths: 要删除的路径列表
+            batch_size: 单次请求的最大路径数
+            max_workers: 并行请求数
             
+        Returns:
+            删除失败的路径列表（全部成功时为空）
+        """
+        if not paths:
+            return []
+        batch_size = max(1, batch_size)
+        if len(paths) <= batch_size:
+            return [] if self._remove_chunk(paths) else list(paths)
+        
+        chunks = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        
+        failed: List[str] = []
+        with ThreadPoolExecutor(max_workers=min(max(1, max_workers), len(chunks)),
+                                thread_name_prefix="OpenListRemove") as executor:
+            for chunk, ok in zip(chunks, executor.map(self._remove_chunk, chunks)):
+                if not ok:
+                    failed.extend(chunk)
+        return failed
+    
+    def _remove_chunk(self, paths: List[str]) -> bool:
+        """发送一次删除请求"""
         try:
-            response = self._session.post(
-                f"{self.url}/api/fs/remove",
-                json={"paths": paths},
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+            status_code, data = self._post(self._ep_remove, {"paths": paths})
             
-            if response.status_code == 200:
-                data = response.json()
+            if status_code == 200:
                 if data.get('code') == 200:
                     logging.info(f"✅ OpenList 删除成功: {len(paths)} 个文件")
                     return True
@@ -404,7 +686,7 @@ class OpenListClient:
                     logging.warning(f"⚠️ OpenList 删除失败: {data.get('message', '未知错误')}")
                     return False
             else:
-                logging.warning(f"⚠️ OpenList 删除失败: HTTP {response.status_code}")
+                logging.warning(f"⚠️ OpenList 删除失败: HTTP {status_code}")
                 return False
                 
         except Exception as e:
@@ -3,16 +3,18 @@
 使用 APScheduler 进行定时调度，通过队列解耦调度和执行
 """
 
-import json
-import queue
 import threading
 import time
 import os
 import shutil
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Set
+from typing import Dict, List, Optional, Callable, Set, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
 
+import orjson
+from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
@@ -24,6 +26,47 @@ from core.database import Database
 # 配置文件 Schema 版本号，用于兼容旧版配置并做迁移
 CONFIG_SCHEMA_VERSION = 1
 
+# 影响路径检查结果的任务字段
+_PATH_VALIDATION_FIELDS = frozenset(
+    ('source_path', 'target_path', 'copy_mode', 'delete_source', 'target_type')
+)
+
+# 同步任务配置的合并窗口（秒）：首次修改后等待该时长，窗口内的多次修改合并为一次写入
+SAVE_INTERVAL = 0.5
+
+
+@lru_cache(maxsize=512)
+def build_cron_trigger(expression: str) -> CronTrigger:
+    """解析 5 段式 Cron 表达式（分 时 日 月 星期）并构造 CronTrigger（按表达式缓存），格式错误时抛出 ValueError"""
+    parts = expression.split()
+    if len(parts) != 5:
+        raise ValueError('Cron 表达式应包含 5 个字段：分 时 日 月 星期')
+    minute, hour, day, month, day_of_week = parts
+    return CronTrigger(
+        minute=minute,
+        hour=hour,
+        day=day,
+        month=month,
+        day_of_week=day_of_week
+    )
+
+
+@lru_cache(maxsize=512)
+def validate_cron(expression: str) -> Optional[str]:
+    """
+    校验 Cron 表达式，与调度时构造 trigger 的规则一致
+    
+    Returns:
+        错误信息，合法时返回 None（结果按表达式缓存，包括非法表达式）
+    """
+    if len(expression.split()) != 5:
+        return 'Cron 表达式应包含 5 个字段：分 时 日 月 星期'
+    try:
+        build_cron_trigger(expression)
+    except ValueError as e:
+        return f'验证失败: {str(e)}'
+    return None
+
 
 class TaskScheduler:
     """任务调度管理器（支持多任务系统）"""
@@ -43,14 +86,34 @@ class TaskScheduler:
         self.tasks: Dict[str, SyncTask] = {}  # task_id -> SyncTask
         self.strm_tasks: Dict[str, StrmTask] = {}  # task_id -> StrmTask
         
-        self.task_queue = queue.Queue()  # 任务执行队列（元组：(system_key, task_id)）
-        self.scheduler = BackgroundScheduler()  # APScheduler 后台调度器
+        # 任务执行队列（元组：(system_key, task_id)）。只有一个消费线程，
+        # deque 的 append/popleft 本身是原子的，配合 Event 唤醒消费者即可
+        self.task_queue: deque = deque()
+        self._queue_event = threading.Event()
+        # APScheduler 后台调度器：触发回调只是入队，单个工作线程足够；
+        # 错过的多次触发合并为一次，同一任务不会并发触发
+        self.scheduler = BackgroundScheduler(
+            executors={'default': APSThreadPoolExecutor(1)},
+            job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': None}
+        )
         self.consumer_thread: Optional[threading.Thread] = None
         self.is_running = False
         self.log_callback: Optional[Callable[[str], None]] = None
         self.task_context_callback: Optional[Callable[[Optional[str]], None]] = None  # 任务上下文回调
         self.task_progress: Dict[str, dict] = {}  # 任务进度缓存: task_id -> progress_info
         self.task_stats: Dict[str, dict] = {}  # 任务最终统计信息: task_id -> stats
+        self._completion_callbacks: Dict[str, List[Callable[[], None]]] = {}  # 同步任务执行结束后的一次性回调
+        self._completion_lock = threading.Lock()
+        # 路径检查通过的缓存：task_id -> 检查时的路径状态键，键不变时跳过重复检查
+        self._path_validation_cache: Dict[str, tuple] = {}
+        
+        # 任务配置延迟保存：修改时只置对应的脏标记并唤醒保存线程，由保存线程合并后落盘
+        self._tasks_dirty = threading.Event()
+        self._strm_tasks_dirty = threading.Event()
+        self._save_requested = threading.Event()
+        self._saver_wake = threading.Event()
+        self._saver_thread: Optional[threading.Thread] = None
+        self._save_lock = threading.Lock()
         
         # 初始化数据库（SQLite）
         db_path = self.config_path.parent / "cloudgather.db"
@@ -108,8 +171,16 @@ class TaskScheduler:
         if self.log_callback:
             self.log_callback(message)
     
-    def _schedule_file_deletion(self, task: SyncTask, source_file: Path):
-        """根据任务配置为单个文件计算删除时间并加入队列"""
+    def _schedule_file_deletion(self, task: SyncTask, source_file: Path,
+                                pending_deletes: Optional[List[Tuple]] = None):
+        """
+        根据任务配置为单个文件计算删除时间并加入队列
+        
+        Args:
+            task: 同步任务
+            source_file: 源文件路径
+            pending_deletes: 提供时只暂存记录，由调用方在同步结束后统一写入数据库
+        """
         # 未开启删除则直接返回
         if not getattr(task, "delete_source", False):
             return
@@ -141,27 +212,35 @@ class TaskScheduler:
 
         delete_at = base_time + timedelta(days=delay_days)
 
-        record = {
-            "task_id": task.id,
-            "source_path": str(source_file),
-            "delete_at": delete_at.isoformat(),
-            "delete_parent": bool(getattr(task, "delete_parent", False)),
-            "time_base": base_type,
-        }
+        record = (
+            task.id,
+            str(source_file),
+            delete_at,
+            bool(getattr(task, "delete_parent", False)),
+            base_type,
+        )
+        if pending_deletes is not None:
+            pending_deletes.append(record)
+            return
 
         # 写入数据库（替代内存队列）
         try:
-            self.db.add_delete_record(
-                task_id=task.id,
-                source_path=str(source_file),
-                delete_at=delete_at.isoformat(),
-                delete_parent=bool(getattr(task, "delete_parent", False)),
-                time_base=base_type
-            )
+            self.db.add_delete_records([record])
         except Exception as e:
             self._log(f"⚠ 添加删除记录失败: {source_file} - {e}")
 
-    def _on_file_synced(self, task: SyncTask, source_file: Path, result: str):
+    def _flush_pending_deletes(self, pending_deletes: List[Tuple]):
+        """将同步过程中暂存的删除记录在一个事务内写入数据库"""
+        if not pending_deletes:
+            return
+        try:
+            self.db.add_delete_records(pending_deletes)
+        except Exception as e:
+            self._log(f"⚠ 批量添加删除记录失败（{len(pending_deletes)} 条）: {e}")
+        pending_deletes.clear()
+
+    def _on_file_synced(self, task: SyncTask, source_file: Path, result: str,
+                        pending_deletes: Optional[List[Tuple]] = None):
         """单个文件同步完成回调，用于调度删除和更新缓存"""
         # 更新缓存状态
         status_map = {
@@ -200,7 +279,7 @@ class TaskScheduler:
 
         # 调度删除
         if result in ("Success", "Skipped (Unchanged)"):
-            self._schedule_file_deletion(task, source_file)
+            self._schedule_file_deletion(task, source_file, pending_deletes)
 
     def _process_delete_queue_for_task(self, task: SyncTask):
         """扫描删除队列中属于指定任务且到期的记录，并执行删除"""
@@ -208,9 +287,9 @@ class TaskScheduler:
         task_id = task.id
         task_source_root = Path(task.source_path)
 
-        # 从数据库获取到期记录
+        # 从数据库获取到期记录；记录逐条处理成功后才移除，未处理的记录始终留在队列中
         try:
-            expired_records = self.db.get_expired_records(task_id, now.isoformat())
+            expired_records = self.db.get_expired_records(task_id, now)
         except Exception as e:
             self._log(f"⚠ 获取删除队列失败: {e}")
             return
@@ -224,12 +303,11 @@ class TaskScheduler:
         }
         # 本轮成功删除的源文件路径列表（用于后续目录清理）
         deleted_files: List[Path] = []
-        deleted_record_ids: List[int] = []  # 已处理的记录ID
         
         for record in expired_records:
-            record_id = record.get("id")
-            source_path = record.get("source_path")
-            delete_parent = bool(record.get("delete_parent", False))
+            record_id = record["id"]
+            source_path = record["source_path"]
+            delete_parent = bool(record["delete_parent"])
 
             if not source_path:
                 continue
@@ -246,9 +324,9 @@ class TaskScheduler:
                 if path.exists():
                     try:
                         path.unlink()
+                        self.db.remove_delete_records_by_id([record_id])
                         delete_stats["files_deleted"] += 1
                         deleted_files.append(path)
-                        deleted_record_ids.append(record_id)
                         
                         # 更新缓存树中的删除时间
                         self.db.update_sync_status(
@@ -270,25 +348,19 @@ class TaskScheduler:
                         # 极端情况：记录的是目录
                         if path.is_dir():
                             shutil.rmtree(path, ignore_errors=False)
+                            self.db.remove_delete_records_by_id([record_id])
                             delete_stats["dirs_deleted"] += 1
                             deleted_files.append(path)
-                            deleted_record_ids.append(record_id)
                             self._log(f"🗑 已删除目录: {path}")
                 else:
+                    self.db.remove_delete_records_by_id([record_id])  # 文件不存在也从队列中移除
                     delete_stats["files_not_exist"] += 1
-                    deleted_record_ids.append(record_id)  # 文件不存在也从队列中移除
                     self._log(f"ℹ 源文件已不存在，跳过: {path}")
             except Exception as e:
                 delete_stats["files_failed"] += 1
                 self._log(f"⚠ 删除源文件失败: {path} - {e}")
                 # 删除失败不移除记录，下次重试
                 continue
-
-        # 从数据库中移除已处理的记录
-        try:
-            self.db.remove_delete_records_by_id(deleted_record_ids)
-        except Exception as e:
-            self._log(f"⚠ 清理删除记录失败: {e}")
         
         # 基于本轮成功删除的文件，按任务配置清理上级目录
         try:
@@ -412,7 +484,7 @@ class TaskScheduler:
         try:
             pending_records = self.db.get_pending_records(
                 task_id=task_id,
-                current_time=now.isoformat(),
+                current_time=now,
                 base_dir=str(base_dir)
             )
             return len(pending_records) > 0
@@ -502,10 +574,7 @@ class TaskScheduler:
                     "last_saved": datetime.now().isoformat(),
                     "delete_queue": []
                 }
-                self.config_path.write_text(
-                    json.dumps(data, indent=2, ensure_ascii=False),
-                    encoding='utf-8'
-                )
+                self.config_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         except Exception as e:
             # 使用 print 保证启动阶段也能看到
             print(f"⚠️ 无法创建配置文件 {self.config_path}: {e}")
@@ -522,16 +591,48 @@ class TaskScheduler:
                     "tasks": [],
                     "last_saved": datetime.now().isoformat()
                 }
-                self.strm_config_path.write_text(
-                    json.dumps(data, indent=2, ensure_ascii=False),
-                    encoding='utf-8'
-                )
+                self.strm_config_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         except Exception as e:
             print(f"⚠️ 无法创建 STRM 配置文件 {self.strm_config_path}: {e}")
             if self.log_callback:
                 self.log_callback(f"⚠️ 无法创建 STRM 配置文件: {self.strm_config_path} - {e}")
     
+    def _path_validation_key(self, task: SyncTask) -> Optional[tuple]:
+        """
+        路径检查缓存键：任务配置加上源/目标目录的 st_mode 与 st_ctime_ns
+        
+        目录被替换、权限被修改或内容变化都会改变 ctime，从而使缓存失效。
+        WebDAV 目标或路径无法 stat 时返回 None，不使用缓存。
+        """
+        if getattr(task, "target_type", "LOCAL") == "WEBDAV":
+            return None
+        try:
+            source_st = os.stat(task.source_path)
+            target_st = os.stat(task.target_path)
+        except (OSError, ValueError):
+            return None
+        return (
+            task.source_path, task.target_path,
+            getattr(task, "copy_mode", "COPY"), getattr(task, "delete_source", False),
+            source_st.st_mode, source_st.st_ctime_ns,
+            target_st.st_mode, target_st.st_ctime_ns,
+        )
+    
     def _validate_task_paths(self, task: SyncTask) -> bool:
+        """检查任务的源/目标目录可用性，并在需要时创建目标目录（通过的结果按路径状态缓存）"""
+        key = self._path_validation_key(task)
+        if key is not None and self._path_validation_cache.get(task.id) == key:
+            return True
+        self._path_validation_cache.pop(task.id, None)
+        if self._check_task_paths(task):
+            # 检查中可能刚创建了目标目录，重新取键
+            key = self._path_validation_key(task)
+            if key is not None:
+                self._path_validation_cache[task.id] = key
+            return True
+        return False
+    
+    def _check_task_paths(self, task: SyncTask) -> bool:
         """检查任务的源/目标目录可用性，并在需要时创建目标目录"""
         try:
             if getattr(task, "copy_mode", "COPY") == "SYMLINK" and getattr(task, "delete_source", False):
@@ -607,7 +708,7 @@ class TaskScheduler:
                 self._schedule_task(task)
             
             # 保存配置
-            self.save_tasks()
+            self._request_save_tasks()
             
             self._log(f"✓ 任务添加完成: {task.name}")
             return True
@@ -636,14 +737,16 @@ class TaskScheduler:
             task = self.tasks[task_id]
             
             # 从调度器中移除
-            if self.scheduler.get_job(task_id):
-                self.scheduler.remove_job(task_id)
+            job_id = f"sync_{task_id}"
+            if self.scheduler.get_job(job_id):
+                self.scheduler.remove_job(job_id)
             
             # 从任务字典中移除
             del self.tasks[task_id]
+            self._path_validation_cache.pop(task_id, None)
             
             # 保存配置
-            self.save_tasks()
+            self._request_save_tasks()
             
             self._log(f"✓ 任务已移除: {task.name}")
             return True
@@ -677,16 +780,21 @@ class TaskScheduler:
                 if hasattr(task, key):
                     setattr(task, key, value)
             
+            # 路径相关配置变化时丢弃路径检查缓存
+            if _PATH_VALIDATION_FIELDS.intersection(kwargs):
+                self._path_validation_cache.pop(task_id, None)
+            
             # 如果间隔或启用状态改变，重新调度
             if (task.interval != old_interval or task.enabled != old_enabled) and self.is_running:
-                if self.scheduler.get_job(task_id):
-                    self.scheduler.remove_job(task_id)
+                job_id = f"sync_{task_id}"
+                if self.scheduler.get_job(job_id):
+                    self.scheduler.remove_job(job_id)
                 
                 if task.enabled:
                     self._schedule_task(task)
             
             # 保存配置
-            self.save_tasks()
+            self._request_save_tasks()
             
             self._log(f"✓ 任务已更新: {task.name}")
             return True
@@ -716,48 +824,54 @@ class TaskScheduler:
         """
         return list(self.tasks.values())
     
-    def _schedule_task(self, task, system_key='sync'):
+    def _build_trigger(self, task):
         """
-        将任务添加到 APScheduler（支持多任务系统）
+        根据任务的调度配置构造 APScheduler trigger
         
         Args:
             task: 任务对象（SyncTask 或 StrmTask）
-            system_key: 系统标识（'sync' 或 'strm'）
+            
+        Returns:
+            CronTrigger / IntervalTrigger，配置无效时返回 None
         """
-        # 根据调度类型选择不同的 trigger
         if task.schedule_type == ScheduleType.CRON:
             # Cron 表达式调度
             if not task.cron_expression:
                 self._log(f"⚠ 任务 {task.name} 的 Cron 表达式为空，跳过调度")
-                return
-            try:
-                # 解析 cron 表达式：分 时 日 月 星期
-                parts = task.cron_expression.strip().split()
-                if len(parts) == 5:
-                    minute, hour, day, month, day_of_week = parts
-                    trigger = CronTrigger(
-                        minute=minute,
-                        hour=hour,
-                        day=day,
-                        month=month,
-                        day_of_week=day_of_week
-                    )
-                    self._log(f"任务已调度 (Cron): {task.name} ({task.cron_expression})")
-                else:
-                    self._log(f"⚠ 任务 {task.name} 的 Cron 表达式格式错误: {task.cron_expression}")
-                    return
-            except Exception as e:
-                self._log(f"⚠ 解析 Cron 表达式失败: {task.name} - {str(e)}")
-                return
+                return None
+            error = validate_cron(task.cron_expression)
+            if error:
+                self._log(f"⚠ 任务 {task.name} 的 Cron 表达式无效: {task.cron_expression} - {error}")
+                return None
+            return build_cron_trigger(task.cron_expression)
+        
+        # 间隔调度（默认）
+        return IntervalTrigger(seconds=task.interval)
+    
+    def _schedule_task(self, task, system_key='sync'):
+        """
+        将任务添加到 APScheduler（支持多任务系统）
+        
+        Args:
+            task: 任务对象（SyncTask 或 StrmTask）
+            system_key: 系统标识（'sync' 或 'strm'）
+            
+        Returns:
+            新建的 APScheduler Job，调度配置无效时返回 None
+        """
+        trigger = self._build_trigger(task)
+        if trigger is None:
+            return None
+        
+        if task.schedule_type == ScheduleType.CRON:
+            self._log(f"任务已调度 (Cron): {task.name} ({task.cron_expression})")
         else:
-            # 间隔调度（默认）
-            trigger = IntervalTrigger(seconds=task.interval)
             self._log(f"任务已调度 (Interval): {task.name} (间隔: {task.interval}s)")
         
         # 关键改造：使用 system_key 前缀
         job_id = f"{system_key}_{task.id}"
         
-        self.scheduler.add_job(
+        return self.scheduler.add_job(
             func=self._on_task_triggered,
             trigger=trigger,
             id=job_id,  # 使用前缀后的 job_id
@@ -772,31 +886,34 @@ class TaskScheduler:
         Args:
             task_id: 任务ID
             system_key: 系统标识（'sync' 或 'strm'）
+            
+        Returns:
+            是否成功加入队列
         """
         # 根据 system_key 路由到不同的任务字典
         if system_key == 'sync':
             if task_id not in self.tasks:
-                return
+                return False
             task = self.tasks[task_id]
         elif system_key == 'strm':
             if task_id not in self.strm_tasks:
-                return
+                return False
             task = self.strm_tasks[task_id]
         else:
             self._log(f"⚠ 未知的任务系统: {system_key}")
-            return
+            return False
         
-        # 检查任务状态，避免重复入队
-        if task.status == TaskStatus.IDLE:
-            # 更新状态为 QUEUED
-            task.update_status(TaskStatus.QUEUED)
-            
+        # 仅当任务空闲时切换为 QUEUED，检查与切换是原子的，并发触发不会重复入队
+        if task.try_transition(TaskStatus.IDLE, TaskStatus.QUEUED):
             # 将任务信息放入队列（元组：(system_key, task_id)）
-            self.task_queue.put((system_key, task_id))
+            self.task_queue.append((system_key, task_id))
+            self._queue_event.set()
             
             self._log(f"⏱ 任务已加入队列: {task.name} [{system_key}]")
-        else:
-            self._log(f"⚠ 任务仍在执行中，跳过本次调度: {task.name} (状态: {task.status.value})")
+            return True
+        
+        self._log(f"⚠ 任务仍在执行中，跳过本次调度: {task.name} (状态: {task.status.value})")
+        return False
     
     def _task_consumer(self):
         """
@@ -806,10 +923,14 @@ class TaskScheduler:
         
         while self.is_running:
             try:
-                # 从队列取出任务信息（超时1秒，避免阻塞关闭）
+                # 从队列取出任务信息；队列为空时阻塞等待入队或 stop() 唤醒，不轮询
                 try:
-                    queue_item = self.task_queue.get(timeout=1)
-                except queue.Empty:
+                    queue_item = self.task_queue.popleft()
+                except IndexError:
+                    self._queue_event.clear()
+                    # 清除事件后再检查一次队列和运行标志，避免错过清除前刚发生的入队或停止
+                    if not self.task_queue and self.is_running:
+                        self._queue_event.wait()
                     continue
                 
                 # 解析队列项：(system_key, task_id)
@@ -824,22 +945,23 @@ class TaskScheduler:
                 if system_key == 'sync':
                     if task_id not in self.tasks:
                         self._log(f"⚠ 同步任务不存在，跳过: {task_id}")
-                        self.task_queue.task_done()
+                        self.run_completion_callbacks(task_id)
                         continue
                     task = self.tasks[task_id]
-                    self._execute_sync_task(task)
+                    try:
+                        self._execute_sync_task(task)
+                    finally:
+                        self.run_completion_callbacks(task_id)
                     
                 elif system_key == 'strm':
                     if task_id not in self.strm_tasks:
                         self._log(f"⚠ STRM 任务不存在，跳过: {task_id}")
-                        self.task_queue.task_done()
                         continue
                     task = self.strm_tasks[task_id]
                     self._execute_strm_task(task)
                     
                 else:
                     self._log(f"⚠ 未知的任务系统: {system_key}")
-                    self.task_queue.task_done()
                     continue
                 
             except Exception as e:
@@ -873,8 +995,7 @@ class TaskScheduler:
             self._log(f"✗ 路径检查失败，任务终止: {task.name}")
             if self.task_context_callback:
                 self.task_context_callback(None)
-            self.task_queue.task_done()
-            self.save_tasks()
+            self._request_save_tasks()
             return
         
         # 执行同步
@@ -901,23 +1022,28 @@ class TaskScheduler:
                 )
                 thread_count = task.thread_count
             
-            stats = syncer.sync_directory(
-                overwrite_existing=task.overwrite_existing,
-                rule_not_exists=task.rule_not_exists,
-                rule_size_diff=task.rule_size_diff,
-                rule_mtime_newer=task.rule_mtime_newer,
-                thread_count=thread_count,
-                log_callback=self._log,
-                progress_callback=lambda s: self._update_progress(task_id, s),
-                is_slow_storage=task.is_slow_storage,
-                size_min_bytes=task.size_min_bytes,
-                size_max_bytes=task.size_max_bytes,
-                suffix_mode=task.suffix_mode,
-                suffix_list=task.suffix_list,
-                file_result_callback=lambda src, dst, result: self._on_file_synced(task, src, result),
-                retry_count=retry_count,
-                copy_mode=getattr(task, "copy_mode", "COPY")
-            )
+            # 同步过程中产生的删除记录先暂存，结束后在一个事务内写入
+            pending_deletes: List[Tuple] = []
+            try:
+                stats = syncer.sync_directory(
+                    overwrite_existing=task.overwrite_existing,
+                    rule_not_exists=task.rule_not_exists,
+                    rule_size_diff=task.rule_size_diff,
+                    rule_mtime_newer=task.rule_mtime_newer,
+                    thread_count=thread_count,
+                    log_callback=self._log,
+                    progress_callback=lambda s: self._update_progress(task_id, s),
+                    is_slow_storage=task.is_slow_storage,
+                    size_min_bytes=task.size_min_bytes,
+                    size_max_bytes=task.size_max_bytes,
+                    suffix_mode=task.suffix_mode,
+                    suffix_list=task.suffix_list,
+                    file_result_callback=lambda src, dst, result: self._on_file_synced(task, src, result, pending_deletes),
+                    retry_count=retry_count,
+                    copy_mode=getattr(task, "copy_mode", "COPY")
+                )
+            finally:
+                self._flush_pending_deletes(pending_deletes)
             
             # 同步完成后再次处理该任务删除队列（确保延迟为 0 的记录立即执行）
             try:
@@ -962,11 +1088,8 @@ class TaskScheduler:
             if self.task_context_callback:
                 self.task_context_callback(None)
             
-            # 标记任务完成
-            self.task_queue.task_done()
-            
             # 保存任务状态
-            self.save_tasks()
+            self._request_save_tasks()
     
     def _execute_strm_task(self, task: StrmTask):
         """执行 STRM 任务"""
@@ -1024,11 +1147,8 @@ class TaskScheduler:
             if self.task_context_callback:
                 self.task_context_callback(None)
             
-            # 标记任务完成
-            self.task_queue.task_done()
-            
             # 保存任务状态
-            self.save_strm_tasks()
+            self._request_save_strm_tasks()
     
     def start(self):
         """启动调度器和任务线程（支持多任务系统）"""
@@ -1059,6 +1179,15 @@ class TaskScheduler:
         )
         self.consumer_thread.start()
         
+        # 启动配置保存线程
+        self._saver_wake.clear()
+        self._saver_thread = threading.Thread(
+            target=self._task_saver,
+            daemon=True,
+            name="TaskSaver"
+        )
+        self._saver_thread.start()
+        
         total_tasks = len(self.tasks) + len(self.strm_tasks)
         self._log(f"✓ 调度器已启动 (同步任务: {len(self.tasks)}, STRM 任务: {len(self.strm_tasks)}, 总计: {total_tasks})")
     
@@ -1070,8 +1199,9 @@ class TaskScheduler:
         
         self._log("正在停止调度器...")
         
-        # 停止标志
+        # 停止标志，并唤醒可能正在等待队列的任务线程
         self.is_running = False
+        self._queue_event.set()
         
         # 停止 APScheduler
         self.scheduler.shutdown(wait=False)
@@ -1080,7 +1210,16 @@ class TaskScheduler:
         if self.consumer_thread and self.consumer_thread.is_alive():
             self.consumer_thread.join(timeout=5)
         
+        # 停止保存线程（置保存请求以唤醒空闲等待），随后统一写入最终状态
+        self._saver_wake.set()
+        self._save_requested.set()
+        if self._saver_thread and self._saver_thread.is_alive():
+            self._saver_thread.join(timeout=5)
+        
         # 保存任务状态
+        self._save_requested.clear()
+        self._tasks_dirty.clear()
+        self._strm_tasks_dirty.clear()
         self.save_tasks()
         self.save_strm_tasks()
         
@@ -1125,8 +1264,7 @@ class TaskScheduler:
                 self._log(f"ℹ️ 配置文件不存在，使用空任务列表")
                 return
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = orjson.loads(self.config_path.read_bytes())
 
             # 根据 schema_version 对配置进行迁移，兼容旧版本
             data = self._migrate_config(data)
@@ -1185,8 +1323,7 @@ class TaskScheduler:
                 self._log(f"ℹ️ STRM 配置文件不存在，使用空任务列表")
                 return
             
-            with open(self.strm_config_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = orjson.loads(self.strm_config_path.read_bytes())
             
             # 根据 schema_version 对配置进行迁移
             data = self._migrate_config(data)
@@ -1218,22 +1355,66 @@ class TaskScheduler:
             import traceback
             self._log(f"错误详情: {traceback.format_exc()}")
     
+    def _request_save_tasks(self):
+        """标记同步任务配置待保存；调度器未运行（无保存线程）时直接写入"""
+        if self._saver_thread is not None and self._saver_thread.is_alive():
+            self._tasks_dirty.set()
+            self._save_requested.set()
+        else:
+            self.save_tasks()
+    
+    def _request_save_strm_tasks(self):
+        """标记 STRM 任务配置待保存；调度器未运行（无保存线程）时直接写入"""
+        if self._saver_thread is not None and self._saver_thread.is_alive():
+            self._strm_tasks_dirty.set()
+            self._save_requested.set()
+        else:
+            self.save_strm_tasks()
+    
+    def _task_saver(self):
+        """
+        后台保存线程：空闲时阻塞等待修改，收到修改后再等 SAVE_INTERVAL 秒合并后续修改，
+        然后只写入有修改的配置文件；停止时由 stop() 负责最终写入
+        """
+        while True:
+            self._save_requested.wait()
+            if not self.is_running:
+                break
+            self._saver_wake.wait(SAVE_INTERVAL)
+            if not self.is_running:
+                break
+            # 先清标记再写入，写入期间的新修改会在下一轮保存
+            self._save_requested.clear()
+            if self._tasks_dirty.is_set():
+                self._tasks_dirty.clear()
+                self.save_tasks()
+            if self._strm_tasks_dirty.is_set():
+                self._strm_tasks_dirty.clear()
+                self.save_strm_tasks()
+    
+    def _write_config(self, path: Path, data: dict):
+        """写入配置文件：先写临时文件再原子替换，避免中途失败留下半个文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with self._save_lock:
+            with open(tmp, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+    
     def save_tasks(self):
         """保存同步任务到配置文件（删除队列已迁移到数据库，不再保存到 JSON）"""
         try:
-            # 确保配置目录存在
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
-
             data = {
                 "schema_version": CONFIG_SCHEMA_VERSION,
-                "tasks": [task.to_dict() for task in self.tasks.values()],
+                "tasks": [task.to_dict() for task in list(self.tasks.values())],
                 "last_saved": datetime.now().isoformat(),
                 # 删除队列已迁移到数据库，JSON 中只保留空数组（向后兼容）
                 "delete_queue": []
             }
-
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._write_config(self.config_path, data)
             
             # self._log(f"💾 同步任务配置已保存")
             
@@ -1245,17 +1426,12 @@ class TaskScheduler:
     def save_strm_tasks(self):
         """保存 STRM 任务到配置文件"""
         try:
-            # 确保配置目录存在
-            self.strm_config_path.parent.mkdir(parents=True, exist_ok=True)
-            
             data = {
                 "schema_version": CONFIG_SCHEMA_VERSION,
-                "tasks": [task.to_dict() for task in self.strm_tasks.values()],
+                "tasks": [task.to_dict() for task in list(self.strm_tasks.values())],
                 "last_saved": datetime.now().isoformat()
             }
-            
-            with open(self.strm_config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._write_config(self.strm_config_path, data)
             
             # self._log(f"💾 STRM 任务配置已保存")
             
@@ -1264,6 +1440,31 @@ class TaskScheduler:
             import traceback
             self._log(f"错误详情: {traceback.format_exc()}")
     
+    def on_task_complete(self, task_id: str, callback: Callable[[], None]):
+        """
+        注册一次性回调：同步任务下一次执行结束（无论成功与否）后调用
+        
+        Args:
+            task_id: 任务ID
+            callback: 无参回调
+        """
+        with self._completion_lock:
+            self._completion_callbacks.setdefault(task_id, []).append(callback)
+    
+    def run_completion_callbacks(self, task_id: str):
+        """
+        取出并执行任务的一次性完成回调
+        
+        任务执行结束后由任务线程调用；任务未能入队时，调用方也可立即调用以撤销注册的回调。
+        """
+        with self._completion_lock:
+            callbacks = self._completion_callbacks.pop(task_id, None)
+        for callback in callbacks or ():
+            try:
+                callback()
+            except Exception as e:
+                self._log(f"⚠ 任务完成回调执行失败: {e}")
+    
     def trigger_task_now(self, task_id: str) -> bool:
         """
         立即触发任务执行（手动触发）
@@ -1280,12 +1481,9 @@ class TaskScheduler:
         
         task = self.tasks[task_id]
         
-        if task.status != TaskStatus.IDLE:
-            self._log(f"⚠ 任务状态非空闲，无法立即执行: {task.name} (状态: {task.status.value})")
+        # 手动触发：入队结果以原子状态切换为准，与定时触发竞争失败时返回 False
+        if not self._on_task_triggered(task_id):
             return False
-        
-        # 手动触发
-        self._on_task_triggered(task_id)
         self._log(f"⚡ 手动触发任务: {task.name}")
         return True
     
@@ -1296,29 +1494,30 @@ class TaskScheduler:
         Returns:
             队列大小
         """
-        return self.task_queue.qsize()
+        return len(self.task_queue)
     
-    def get_next_run_time(self, task_id: str):
+    def get_next_run_time(self, task_id: str, system_key: str = 'sync'):
         """
         获取任务的下次执行时间
         
         Args:
             task_id: 任务ID
+            system_key: 系统标识（'sync' 或 'strm'）
             
         Returns:
             datetime 对象，如果任务未启用或不存在则返回 None
         """
-        if task_id not in self.tasks:
+        tasks = self.strm_tasks if system_key == 'strm' else self.tasks
+        task = tasks.get(task_id)
+        if task is None:
             return None
         
-        task = self.tasks[task_id]
-        
         # 如果任务未启用，返回 None
         if not task.enabled:
             return None
         
-        # 从 APScheduler 获取下次执行时间
-        job = self.scheduler.get_job(task_id)
+        # 从 APScheduler 获取下次执行时间（job_id 带 system_key 前缀）
+        job = self.scheduler.get_job(f"{system_key}_{task_id}")
         if job and job.next_run_time:
             return job.next_run_time
         
@@ -13,7 +13,9 @@ from typing import Optional, Callable, Dict, Any, Set, List
 from collections import defaultdict
 
 from core.models import StrmTask, StrmMode
-from core.openlist_client import OpenListClient, OpenListFile
+from core.openlist_client import (
+    FILE_TYPE_IMAGE, FILE_TYPE_NFO, FILE_TYPE_SUBTITLE, FILE_TYPE_VIDEO, OpenListClient, OpenListFile, split_name
+)
 from core.strm_protection import StrmProtectionManager
 
 
@@ -97,10 +99,9 @@ class StrmGenerator:
             self.log("🔍 开始扫描文件...")
             
             # 收集所有视频文件
-            video_files: List[OpenListFile] = []
-            for file in client.iter_all_files(self.task.source_dir):
-                if client.is_video_file(file):
-                    video_files.append(file)
+            video_files: List[OpenListFile] = list(
+                client.iter_files_of_types(self.task.source_dir, (FILE_TYPE_VIDEO,))
+            )
             
             self.stats['total'] = len(video_files)
             self.log(f"📊 发现 {self.stats['total']} 个视频文件")
@@ -220,7 +221,7 @@ class StrmGenerator:
         non_bdmv_files = []
         
         for file in files:
-            if '/BDMV/STREAM/' in file.full_path and file.suffix.lower() == '.m2ts':
+            if '/BDMV/STREAM/' in file.full_path and file.suffix_lower == '.m2ts':
                 bdmv_files.append(file)
             else:
                 non_bdmv_files.append(file)
@@ -349,28 +350,27 @@ class StrmGenerator:
             return
         
         video_stem = video_file.stem
+        # 需要同步的额外文件类型
+        wanted_types = set()
+        if self.task.subtitle:
+            wanted_types.add(FILE_TYPE_SUBTITLE)
+        if self.task.image:
+            wanted_types.add(FILE_TYPE_IMAGE)
+        if self.task.nfo:
+            wanted_types.add(FILE_TYPE_NFO)
         
         for item in result['content']:
             if item.get('is_dir'):
                 continue
             
             file_name = item.get('name', '')
-            file_path = Path(file_name)
-            suffix = file_path.suffix.lower()
+            stem, suffix = split_name(file_name)
             
             # 检查是否为同名文件（去除扩展名比较）
-            if file_path.stem != video_stem:
+            if stem != video_stem:
                 continue
             
-            should_sync = False
-            if self.task.subtitle and suffix in client.SUBTITLE_EXTENSIONS:
-                should_sync = True
-            elif self.task.image and suffix in client.IMAGE_EXTENSIONS:
-                should_sync = True
-            elif self.task.nfo and suffix in client.NFO_EXTENSIONS:
-                should_sync = True
-            
-            if should_sync:
+            if client.file_type(suffix.lower()) in wanted_types:
                 target_file = target_dir / file_name
                 if not target_file.exists() or self.task.overwrite:
                     # 这里简化处理，实际应该下载文件
@@ -546,7 +546,7 @@ class StrmGenerator:
             if not strm_path.exists():
                 # 检查是否匹配忽略规则 (suffix_mode 和 suffix_list)
                 # 如果 mode 为 EXCLUDE 且后缀在列表中，则跳过删除（即忽略）
-                suffix = file.suffix.lower().lstrip('.')
+                suffix = file.suffix_lower.lstrip('.')
                 if suffix_mode == 'EXCLUDE' and suffix in suffix_list:
                     continue
                 # 如果 mode 为 INCLUDE 且后缀不在列表中，也相当于忽略
@@ -569,14 +569,14 @@ class StrmGenerator:
             self.log(f"⚠️ 待删除数量 ({len(server_files_to_delete)}) 超过阈值 ({threshold})，智能保护已拦截服务器删除操作。")
             return
             
-        # 执行服务器删除
-        success_count = 0
+        # 执行服务器删除（分批请求，单批失败不影响其他路径）
+        failed = set(client.remove_files_batched(server_files_to_delete))
         for path in server_files_to_delete:
-            if client.remove_files([path]):
-                self.log(f"  🗑️ 已从服务器删除: {path}")
-                success_count += 1
-            else:
+            if path in failed:
                 self.log(f"  ❌ 服务器删除失败: {path}")
+            else:
+                self.log(f"  🗑️ 已从服务器删除: {path}")
+        success_count = len(server_files_to_delete) - len(failed)
         
         if success_count > 0:
             self.log(f"✅ 已完成服务器同步删除，共删除 {success_count} 个文件")
@@ -11,13 +11,20 @@ import hashlib
 import posixpath
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional, Tuple, Any
+from typing import Callable, Collection, Optional, Tuple, Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from core.models import COPY_MODES
+from core.models import COPY_MODES, normalize_suffix_list
 from core.webdav_client import WebDavClient
 
 
+def _suffix_set(suffix_list: Optional[Collection[str]]) -> Collection[str]:
+    """返回可 O(1) 判断的后缀集合；SyncTask 已规范化为 frozenset 时直接复用"""
+    if isinstance(suffix_list, frozenset):
+        return suffix_list
+    return normalize_suffix_list(suffix_list) or frozenset()
+
+
 class FileSyncer:
     """文件同步核心类"""
     
@@ -263,7 +270,7 @@ class FileSyncer:
         size_min_bytes: Optional[int] = None,
         size_max_bytes: Optional[int] = None,
         suffix_mode: str = "NONE",
-        suffix_list: Optional[list[str]] = None,
+        suffix_list: Optional[Collection[str]] = None,
         retry_count: int = 0,
         copy_mode: str = "COPY"
     ) -> str:
@@ -307,7 +314,7 @@ class FileSyncer:
                 mode = (suffix_mode or "NONE").upper()
                 if mode != "NONE":
                     ext = source_file.suffix.lower().lstrip(".")
-                    suffixes = [s.lower().lstrip(".") for s in suffix_list] if suffix_list else []
+                    suffixes = _suffix_set(suffix_list)
                     if mode == "INCLUDE":
                         if not ext or ext not in suffixes:
                             if log_callback:
@@ -428,7 +435,7 @@ class FileSyncer:
         size_min_bytes: Optional[int] = None,
         size_max_bytes: Optional[int] = None,
         suffix_mode: str = "NONE",
-        suffix_list: Optional[list[str]] = None,
+        suffix_list: Optional[Collection[str]] = None,
         file_result_callback: Optional[Callable[[Path, Path, str], None]] = None,
         retry_count: int = 0,
         copy_mode: str = "COPY"
@@ -448,7 +455,7 @@ class FileSyncer:
             size_min_bytes: 最小文件大小（字节），None 表示不限制
             size_max_bytes: 最大文件大小（字节），None 表示不限制
             suffix_mode: 后缀过滤模式：NONE/INCLUDE/EXCLUDE
-            suffix_list: 后缀列表，小写且不带点，如 ["mp4", "mkv"]
+            suffix_list: 后缀集合，小写且不带点，如 {"mp4", "mkv"}
             file_result_callback: 单文件处理结果回调，参数为 (source_file, target_file, result)
             retry_count: 失败重试次数
             copy_mode: 写入方式：COPY/HARDLINK/SYMLINK
@@ -751,7 +758,7 @@ class WebDavSyncer:
         size_min_bytes: Optional[int] = None,
         size_max_bytes: Optional[int] = None,
         suffix_mode: str = "NONE",
-        suffix_list: Optional[list[str]] = None,
+        suffix_list: Optional[Collection[str]] = None,
         file_result_callback: Optional[Callable[[Path, Path, str], None]] = None,
         retry_count: int = 0,
     ) -> dict:
@@ -814,7 +821,7 @@ class WebDavSyncer:
         size_min_bytes: Optional[int] = None,
         size_max_bytes: Optional[int] = None,
         suffix_mode: str = "NONE",
-        suffix_list: Optional[list[str]] = None,
+        suffix_list: Optional[Collection[str]] = None,
         retry_count: int = 0,
     ) -> str:
         """同步单个文件到 WebDAV"""
@@ -910,7 +917,7 @@ class WebDavSyncer:
         size_min_bytes: Optional[int],
         size_max_bytes: Optional[int],
         suffix_mode: str,
-        suffix_list: Optional[list[str]],
+        suffix_list: Optional[Collection[str]],
     ) -> Optional[str]:
         """复用本地同步的过滤规则"""
         if FileSyncer.should_ignore(self, source_file):
@@ -921,7 +928,7 @@ class WebDavSyncer:
         mode = (suffix_mode or "NONE").upper()
         if mode != "NONE":
             ext = source_file.suffix.lower().lstrip(".")
-            suffixes = [s.lower().lstrip(".") for s in suffix_list] if suffix_list else []
+            suffixes = _suffix_set(suffix_list)
             if mode == "INCLUDE" and (not ext or ext not in suffixes):
                 if log_callback:
                     log_callback(f"已过滤: {source_file.name} (mode=INCLUDE, ext={ext or '-'})")
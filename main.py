@@ -7,14 +7,14 @@ import atexit
 import os
 import sys
 import psutil
-import threading
 import logging
 from logging.handlers import RotatingFileHandler
 import requests
 import glob
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Deque, Dict, Optional
 from pathlib import Path
 
 from flask import Flask, jsonify, render_template, request
@@ -132,10 +132,9 @@ CONFIG_PATH = '/app/config/tasks.json' if IS_DOCKER else 'config/tasks.json'
 # 全局调度器实例
 scheduler = TaskScheduler(config_path=CONFIG_PATH)
 
-# 日志存储
-log_lock = threading.Lock()
+# 日志存储：deque 的 append/clear 本身线程安全，并按 maxlen 自动丢弃旧日志，读写均无需加锁
 MAX_LOGS = 500
-_task_logs: Dict[str, List[str]] = {"general": []}  # task_id -> logs
+_task_logs: Dict[str, Deque[str]] = {"general": deque(maxlen=MAX_LOGS)}  # task_id -> logs
 _current_task_id: Optional[str] = None  # 当前正在执行的任务ID
 
 
@@ -155,19 +154,16 @@ def log_handler(message: str):
         exc_info=None
     ))
     
-    with log_lock:
-        # 添加到全局日志
-        logs = _task_logs.setdefault('general', [])
-        logs.append(entry)
-        if len(logs) > MAX_LOGS:
-            _task_logs['general'] = logs[-MAX_LOGS:]
-        
-        # 如果有当前任务，也添加到任务专属日志
-        if _current_task_id:
-            task_logs = _task_logs.setdefault(_current_task_id, [])
-            task_logs.append(entry)
-            if len(task_logs) > MAX_LOGS:
-                _task_logs[_current_task_id] = task_logs[-MAX_LOGS:]
+    # 添加到全局日志
+    _task_logs['general'].append(entry)
+    
+    # 如果有当前任务，也添加到任务专属日志
+    task_id = _current_task_id
+    if task_id:
+        task_logs = _task_logs.get(task_id)
+        if task_logs is None:
+            task_logs = _task_logs.setdefault(task_id, deque(maxlen=MAX_LOGS))
+        task_logs.append(entry)
 
 
 def set_current_task(task_id: Optional[str]):
@@ -197,13 +193,14 @@ werkzeug_logger.setLevel(logging.WARNING)  # 只显示警告和错误
 werkzeug_logger.propagate = True  # 传递到 root logger，确保警告/错误会被记录到文件
 
 # 注册 API 蓝图
+from api import OrjsonProvider
 from api.status import status_bp, init_status_bp
 from api.tasks import tasks_bp, init_tasks_bp
 from api.settings import settings_bp, init_settings_bp
 from api.strm import strm_bp, init_strm_bp
 
 init_status_bp(scheduler, CONFIG_PATH, IS_DOCKER, VERSION)
-init_tasks_bp(scheduler, log_handler, IS_DOCKER, _task_logs, log_lock)
+init_tasks_bp(scheduler, log_handler, IS_DOCKER, _task_logs)
 init_settings_bp(IS_DOCKER)
 init_strm_bp(scheduler, log_handler)
 
@@ -212,6 +209,9 @@ app.register_blueprint(tasks_bp, url_prefix='/api')
 app.register_blueprint(settings_bp, url_prefix='/api')
 app.register_blueprint(strm_bp, url_prefix='/api')
 
+# 使用 orjson 解析请求体、序列化响应
+app.json = OrjsonProvider(app)
+
 
 @app.route('/')
 def index():
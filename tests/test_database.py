@@ -0,0 +1,123 @@
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.database import Database
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        db = Database(str(Path(temp_dir_name) / "test.db"))
+
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            # 读连接为只读，写入必须走 write_connection
+            try:
+                conn.execute("DELETE FROM config")
+            except sqlite3.OperationalError:
+                pass
+            else:
+                raise AssertionError("read connection should be read-only")
+
+        assert db.add_delete_records([
+            ("t1", "/src/a.mkv", "2024-01-01T00:00:00", False, "SYNC_COMPLETE"),
+            ("t1", "/src/b.mkv", datetime(2024, 1, 3), True, "SYNC_COMPLETE"),
+        ]) == 2
+        db.add_delete_record("t2", "/src/c.mkv", "2024-01-01T00:00:00")
+
+        expired = db.get_expired_records("t1", "2024-01-02T00:00:00")
+        assert [r["source_path"] for r in expired] == ["/src/a.mkv"]
+
+        pending = db.get_pending_records("t1", "2024-01-02T00:00:00", base_dir="/src")
+        assert [r["source_path"] for r in pending] == ["/src/b.mkv"]
+        assert pending[0]["delete_parent"] == 1
+        assert pending[0]["delete_at"] == int(datetime(2024, 1, 3).timestamp() * 1000)
+        assert db.get_pending_records("t1", "2024-01-02T00:00:00", base_dir="/src/b") != []
+        assert db.get_pending_records("t1", "2024-01-02T00:00:00", base_dir="/sr_") == []
+
+        # 目录名中的 % / _ / \ 按字面匹配，不当作通配符
+        db.add_delete_records([
+            ("t4", "/media/100%/a.mkv", "2024-01-03T00:00:00", False, "SYNC_COMPLETE"),
+            ("t4", "/media/100x/b.mkv", "2024-01-03T00:00:00", False, "SYNC_COMPLETE"),
+            ("t4", "/media/a_b\\c/d.mkv", "2024-01-03T00:00:00", False, "SYNC_COMPLETE"),
+        ])
+        pending = db.get_pending_records("t4", "2024-01-02T00:00:00", base_dir="/media/100%")
+        assert [r["source_path"] for r in pending] == ["/media/100%/a.mkv"]
+        pending = db.get_pending_records("t4", "2024-01-02T00:00:00", base_dir="/media/a_b\\")
+        assert [r["source_path"] for r in pending] == ["/media/a_b\\c/d.mkv"]
+        assert db.get_pending_records("t4", "2024-01-02T00:00:00", base_dir="/media/a%b") == []
+
+        assert db.get_delete_queue_count("t4") == 3
+        db.remove_delete_records_by_id([r["id"] for r in db.get_expired_records("t4", "2024-01-04T00:00:00")])
+        assert db.get_delete_queue_count() == 3
+        assert db.get_delete_queue_count("t1") == 2
+
+        db.remove_delete_records_by_id([r["id"] for r in expired] + list(range(10_000, 12_000)))
+        db.remove_delete_record("/src/c.mkv")
+        assert [r["source_path"] for r in db.get_all_delete_records()] == ["/src/b.mkv"]
+        assert [r["source_path"] for r in db.iter_all_delete_records(batch_size=1)] == ["/src/b.mkv"]
+        assert list(db.iter_all_delete_records("missing")) == []
+
+
+        migrated = db.migrate_from_json([
+            {"task_id": "t3", "source_path": "/src/d.mkv", "delete_at": "2024-01-05T00:00:00"},
+            {"task_id": "t3", "source_path": "/src/b.mkv", "delete_at": "2024-01-05T00:00:00"},
+            {"task_id": "t3", "source_path": "", "delete_at": "2024-01-05T00:00:00"},
+        ])
+        assert migrated == 1
+        assert db.get_delete_queue_count("t3") == 1
+
+        db.upsert_file_cache("t1", "/src/b.mkv", 10, 1.0, sync_status="SYNCED")
+        assert db.get_file_cache("t1", "/src/b.mkv")["size"] == 10
+        assert db.is_file_synced("t1", "/src/b.mkv")
+        db.add_history_record("t1", "/src/b.mkv", "SYNCED")
+        db.add_history_record("t1", "/src/b.mkv", "SYNCED")
+        assert [h["count"] for h in db.get_file_history("t1", "/src/b.mkv")] == [2]
+
+        writer = threading.Thread(target=db.set_config, args=("from_thread", "1"))
+        writer.start()
+        writer.join()
+        assert db.get_config("from_thread") == "1"
+
+        db.set_config("delete_queue_migrated", "true")
+        assert db.get_config("delete_queue_migrated") == "true"
+        assert db.get_config("missing", "x") == "x"
+        db.close()
+
+        # 旧版本以 ISO 文本存储 delete_at，打开时自动转换为毫秒时间戳
+        legacy_path = Path(temp_dir_name) / "legacy.db"
+        conn = sqlite3.connect(str(legacy_path))
+        conn.execute("""
+            CREATE TABLE delete_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL,
+                source_path TEXT NOT NULL UNIQUE,
+                delete_at TEXT NOT NULL,
+                delete_parent INTEGER DEFAULT 0,
+                time_base TEXT DEFAULT 'SYNC_COMPLETE',
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("CREATE INDEX idx_delete_queue_task_id ON delete_queue(task_id)")
+        conn.execute(
+            "INSERT INTO delete_queue (task_id, source_path, delete_at) VALUES (?, ?, ?)",
+            ("t1", "/src/old.mkv", "2024-01-01T00:00:00"),
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(str(legacy_path))
+        records = db.get_all_delete_records()
+        assert [r["delete_at"] for r in records] == [int(datetime(2024, 1, 1).timestamp() * 1000)]
+        assert [r["source_path"] for r in db.get_expired_records("t1", datetime(2024, 1, 2))] == ["/src/old.mkv"]
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
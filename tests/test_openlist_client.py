@@ -0,0 +1,181 @@
+import json
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.openlist_client as openlist_client
+from core.openlist_client import FILE_TYPE_NFO, FILE_TYPE_OTHER, FILE_TYPE_SUBTITLE, FILE_TYPE_VIDEO, OpenListClient, split_name
+
+TREE = {
+    "/": [
+        {"name": "Movies", "is_dir": True},
+        {"name": "root.mkv", "is_dir": False, "size": 1, "sign": "s0"},
+    ],
+    "/Movies": [
+        {"name": "A", "is_dir": True},
+        {"name": "b.mkv", "is_dir": False, "size": 2, "sign": "s1"},
+        {"name": "b.srt", "is_dir": False, "size": 3},
+        {"name": "c.mp4", "is_dir": False, "size": 4},
+    ],
+    "/Movies/A": [
+        {"name": "a.MKV", "is_dir": False, "size": 5, "sign": "s2"},
+    ],
+}
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(payload).encode()
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.token = "tok"
+
+    def request(self, method, url, json=None, headers=None, timeout=None):
+        return self.post(url, json=json, headers=headers, timeout=timeout)
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        with self.lock:
+            self.calls.append((url, json, headers))
+        if url.endswith("/api/auth/login"):
+            return FakeResponse({"code": 200, "data": {"token": self.token}})
+        if headers.get("Authorization") != f"Bearer {self.token}":
+            return FakeResponse({"code": 401, "message": "token is expired"})
+        if url.endswith("/api/fs/list"):
+            items = TREE.get(json["path"].rstrip("/") or "/", [])
+            start = (json["page"] - 1) * json["per_page"]
+            page = items[start:start + json["per_page"]]
+            return FakeResponse({"code": 200, "data": {"content": page, "total": len(items)}})
+        if url.endswith("/api/me"):
+            return FakeResponse({"code": 200, "data": {"username": "u"}})
+        if url.endswith("/api/fs/remove"):
+            if "/bad" in json["paths"]:
+                return FakeResponse({"code": 500, "message": "failed"})
+            return FakeResponse({"code": 200, "data": None})
+        return FakeResponse({"code": 404, "message": "not found"})
+
+    def close(self):
+        pass
+
+
+def make_client(**kwargs):
+    client = OpenListClient("http://alist:5244/", username="u", password="p", **kwargs)
+    client._session = FakeSession()
+    return client
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        openlist_client.TOKEN_CACHE_PATH = Path(temp_dir_name) / "openlist_token.json"
+        run_checks()
+
+
+def login_count(session):
+    return sum(1 for url, _, _ in session.calls if url.endswith("/api/auth/login"))
+
+
+def run_checks():
+    client = make_client(public_url="https://media.example.com")
+    files = {f.full_path: f for f in client.iter_all_files("/", per_page=2)}
+    assert set(files) == {"/root.mkv", "/Movies/b.mkv", "/Movies/b.srt", "/Movies/c.mp4", "/Movies/A/a.MKV"}
+    assert files["/Movies/A/a.MKV"].path == "/Movies/A"
+    assert files["/Movies/A/a.MKV"].download_url == "https://media.example.com/d/s2/a.MKV"
+    assert files["/Movies/b.srt"].download_url == ""
+    videos = {f.full_path for f in client.iter_files_of_types("/", (FILE_TYPE_VIDEO,))}
+    assert videos == {"/root.mkv", "/Movies/b.mkv", "/Movies/c.mp4", "/Movies/A/a.MKV"}
+    private = {f.full_path: f for f in make_client().iter_all_files("/Movies/A")}
+    assert private["/Movies/A/a.MKV"].download_url == "http://alist:5244/d/s2/a.MKV"
+    assert client.is_video_file(files["/Movies/A/a.MKV"])
+    assert client.is_subtitle_file(files["/Movies/b.srt"])
+    assert not client.is_video_file(files["/Movies/b.srt"])
+    for name in ("a.MKV", "a.b.mp4", ".hidden", "noext", "trailing.", "..", ""):
+        assert split_name(name) == (Path(name).stem, Path(name).suffix), name
+    assert client.file_type(files["/Movies/A/a.MKV"].suffix_lower) == FILE_TYPE_VIDEO
+    assert client.file_type(".srt") == FILE_TYPE_SUBTITLE
+    assert client.file_type(".iso") == FILE_TYPE_OTHER
+    assert make_client(nfo_extensions=["xml"]).file_type(".xml") == FILE_TYPE_NFO
+    assert files["/Movies/A/a.MKV"].stem == "a"
+    assert not hasattr(files["/Movies/A/a.MKV"], "__dict__")
+
+    # 根路径带尾部斜杠时不产生双斜杠
+    assert {f.full_path for f in client.iter_all_files("/Movies/")} == {"/Movies/b.mkv", "/Movies/b.srt", "/Movies/c.mp4", "/Movies/A/a.MKV"}
+
+    # 提前结束迭代不会挂起
+    iterator = client.iter_all_files("/", per_page=1)
+    next(iterator)
+    iterator.close()
+
+    assert client.remove_files(["/Movies/b.mkv"])
+    assert client.remove_files([])
+    # 分批删除：失败只影响所在批次
+    paths = [f"/p{i}" for i in range(5)] + ["/bad"]
+    assert client.remove_files_batched(paths, batch_size=2) == ["/p4", "/bad"]
+    assert not client.remove_files(paths, batch_size=2)
+    removes = [body["paths"] for url, body, _ in client._session.calls if url.endswith("/api/fs/remove")]
+    assert max(len(batch) for batch in removes) == 2
+
+    # 请求头在登录后复用同一个字典，只登录一次
+    assert login_count(client._session) == 1
+    token, headers = client._get_headers()
+    assert token == "tok" and headers["Authorization"] == "Bearer tok"
+    assert client._get_headers()[1] is headers
+    assert client.login()
+    assert client._get_headers()[1] is not headers
+    # 缓存中旧 Token 的请求头不会被复用
+    client._headers_cache = ("old", {"Authorization": "Bearer old"})
+    assert client._get_headers() == ("tok", {"Content-Type": "application/json", "Authorization": "Bearer tok"})
+
+    # 新客户端复用缓存的 Token，不再登录
+    cached = make_client()
+    assert cached.list_dir("/")["total"] == 2
+    assert login_count(cached._session) == 0
+
+    # Token 失效时重新登录并重试一次
+    cached._session.token = "tok2"
+    assert cached.list_dir("/")["total"] == 2
+    assert login_count(cached._session) == 1
+    assert make_client()._token == "tok2"
+
+    # 缓存的 Token 被撤销时，连接测试重新登录而不是直接失败
+    revoked = make_client()
+    assert revoked._token == "tok2"
+    revoked._session.token = "tok-new"
+    assert revoked.test_connection()
+    assert login_count(revoked._session) == 1
+    assert revoked._token == "tok-new"
+
+    # 请求发出后其他线程已重新登录：按实际发送的旧 Token 判断，直接用新 Token 重试
+    raced = make_client()
+    raced._session.token = "tok-raced"
+    raced_request = raced._session.request
+
+    def request_after_relogin(method, url, **kwargs):
+        raced._session.request = raced_request
+        assert raced.login()
+        return raced_request(method, url, **kwargs)
+
+    raced._session.request = request_after_relogin
+    assert raced.list_dir("/")["total"] == 2
+    assert login_count(raced._session) == 1
+
+    # 并发请求同时遇到 Token 失效时只重新登录一次
+    cached._session.token = "tok3"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached.list_dir("/")["total"])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [2] * 8
+    assert login_count(cached._session) == 2
+
+
+if __name__ == "__main__":
+    main()
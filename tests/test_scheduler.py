@@ -0,0 +1,155 @@
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import core.scheduler as scheduler_module
+from core.models import ScheduleType, StrmTask, SyncTask, TaskStatus
+from core.scheduler import TaskScheduler, validate_cron
+
+
+def saved_names(path):
+    return [t["name"] for t in json.loads(path.read_text(encoding="utf-8"))["tasks"]]
+
+
+def main():
+    scheduler_module.SAVE_INTERVAL = 0.2
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        temp_dir = Path(temp_dir_name)
+        config_path = temp_dir / "tasks.json"
+        scheduler = TaskScheduler(str(config_path), str(temp_dir / "strm_tasks.json"))
+
+        # 未启动时直接写入
+        first = SyncTask(name="first", source_path=str(temp_dir), target_path=str(temp_dir / "t1"), enabled=False)
+        assert scheduler.add_task(first)
+        assert saved_names(config_path) == ["first"]
+
+        # 运行中的多次修改合并为一次延迟写入
+        scheduler.start()
+        try:
+            second = SyncTask(name="second", source_path=str(temp_dir), target_path=str(temp_dir / "t2"), enabled=False)
+            assert scheduler.add_task(second)
+            assert scheduler.update_task(second.id, name="renamed")
+            assert saved_names(config_path) == ["first"]
+            deadline = time.monotonic() + 5
+            while saved_names(config_path) != ["first", "renamed"]:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+            # STRM 任务按 strm_ 前缀查找下次执行时间
+            strm_task = StrmTask(name="strm", source_dir="/Movies", target_dir=str(temp_dir / "strm"))
+            scheduler.strm_tasks[strm_task.id] = strm_task
+            scheduler._schedule_task(strm_task, system_key="strm")
+            assert scheduler.get_next_run_time(strm_task.id, "strm") is not None
+            assert scheduler.get_next_run_time(strm_task.id) is None
+            # 非法 Cron 表达式不会被调度
+            strm_task.schedule_type = ScheduleType.CRON
+            strm_task.cron_expression = "61 * * * *"
+            assert scheduler._build_trigger(strm_task) is None
+            assert validate_cron("61 * * * *") and validate_cron("* * *")
+            assert validate_cron("*/30\t3 * * 1-5") is None
+            strm_task.schedule_type = ScheduleType.INTERVAL
+
+            # STRM 任务配置同样由保存线程延迟写入
+            strm_config_path = temp_dir / "strm_tasks.json"
+            scheduler._request_save_strm_tasks()
+            deadline = time.monotonic() + 5
+            while not strm_config_path.exists() or saved_names(strm_config_path) != ["strm"]:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
+
+            # 禁用/移除时按 sync_ 前缀取消调度
+            scheduled = SyncTask(name="scheduled", source_path=str(temp_dir), target_path=str(temp_dir / "t3"), enabled=False)
+            assert scheduler.add_task(scheduled)
+            assert scheduler.update_task(scheduled.id, enabled=True)
+            assert scheduler.scheduler.get_job(f"sync_{scheduled.id}")
+            assert scheduler.update_task(scheduled.id, enabled=False)
+            assert scheduler.scheduler.get_job(f"sync_{scheduled.id}") is None
+            assert scheduler.update_task(scheduled.id, enabled=True)
+            assert scheduler.remove_task(scheduled.id)
+            assert scheduler.scheduler.get_job(f"sync_{scheduled.id}") is None
+
+            assert scheduler.remove_task(first.id)
+        finally:
+            stop_started = time.monotonic()
+            scheduler.stop()
+        # 空闲的任务线程被立即唤醒退出
+        assert not scheduler.consumer_thread.is_alive()
+        assert time.monotonic() - stop_started < 1
+        # 停止时写入最终状态
+        assert saved_names(config_path) == ["renamed"]
+        assert not (temp_dir / "tasks.json.tmp").exists()
+
+        # 路径检查通过后按目录状态缓存，目录变化时重新检查
+        checks = []
+        check_task_paths = scheduler._check_task_paths
+        scheduler._check_task_paths = lambda task: checks.append(task.id) or check_task_paths(task)
+        assert scheduler._validate_task_paths(second)
+        assert scheduler._validate_task_paths(second)
+        assert checks == [second.id]
+        (temp_dir / "t2").rmdir()
+        assert scheduler._validate_task_paths(second)
+        assert (temp_dir / "t2").is_dir()
+        assert checks == [second.id, second.id]
+        assert scheduler.update_task(second.id, source_path=str(temp_dir / "missing"))
+        assert not scheduler._validate_task_paths(second)
+        assert scheduler.update_task(second.id, source_path=str(temp_dir))
+
+        # 删除队列：记录逐条处理成功后才移除，被拦截或出错的记录留在队列中
+        source_dir = temp_dir / "src"
+        source_dir.mkdir()
+        synced, blocked, broken = (source_dir / name for name in ("synced.mkv", "blocked.mkv", "broken.mkv"))
+        for path in (synced, blocked, broken):
+            path.write_bytes(b"x")
+        deleter = SyncTask(name="deleter", source_path=str(source_dir), target_path=str(temp_dir / "t4"), enabled=False)
+        for path in (synced, broken):
+            scheduler.db.upsert_file_cache(deleter.id, str(path), 1, 0.0, sync_status="SYNCED")
+        scheduler.db.add_delete_records([
+            (deleter.id, str(path), "2024-01-01T00:00:00", False, "SYNC_COMPLETE")
+            for path in (synced, blocked, broken)
+        ])
+        remove_records = scheduler.db.remove_delete_records_by_id
+        broken_id = next(r["id"] for r in scheduler.db.get_all_delete_records(deleter.id) if r["source_path"] == str(broken))
+
+        def failing_remove(record_ids):
+            if broken_id in record_ids:
+                raise RuntimeError("db down")
+            remove_records(record_ids)
+
+        scheduler.db.remove_delete_records_by_id = failing_remove
+        scheduler._process_delete_queue_for_task(deleter)
+        scheduler.db.remove_delete_records_by_id = remove_records
+        assert not synced.exists() and blocked.exists()
+        remaining = sorted(r["source_path"] for r in scheduler.db.get_all_delete_records(deleter.id))
+        assert remaining == sorted([str(blocked), str(broken)])
+        scheduler._process_delete_queue_for_task(deleter)
+        assert [r["source_path"] for r in scheduler.db.get_all_delete_records(deleter.id)] == [str(blocked)]
+
+        # 并发触发同一空闲任务只入队一次
+        barrier = threading.Barrier(8)
+        results = []
+
+        def trigger():
+            barrier.wait()
+            results.append(scheduler._on_task_triggered(second.id))
+
+        threads = [threading.Thread(target=trigger) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(results) == [False] * 7 + [True]
+        assert list(scheduler.task_queue) == [("sync", second.id)]
+        assert second.status == TaskStatus.QUEUED
+        # 已被定时触发抢先入队时，手动触发如实返回失败
+        assert not scheduler.trigger_task_now(second.id)
+        assert list(scheduler.task_queue) == [("sync", second.id)]
+        assert not second.try_transition(TaskStatus.IDLE, TaskStatus.QUEUED)
+
+
+if __name__ == "__main__":
+    main()
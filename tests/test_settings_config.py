@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from flask import Flask
+
+import api.settings as settings_api
+from api import OrjsonProvider
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        temp_dir = Path(temp_dir_name)
+        settings_api.SYSTEM_CONFIG_PATH = temp_dir / "system.json"
+        settings_api.EXTENSIONS_CONFIG_PATH = temp_dir / "extensions.json"
+
+        assert settings_api.load_system_config() == {"sync_retry_count": 3}
+        assert settings_api.load_extensions_config()["nfo"] == ".nfo"
+
+        assert settings_api.save_system_config({"sync_retry_count": 5})
+        first = settings_api.load_system_config()
+        assert first == {"sync_retry_count": 5}
+        assert settings_api.load_system_config() is first
+
+        # 外部修改文件后应重新解析
+        path = settings_api.SYSTEM_CONFIG_PATH
+        path.write_text(json.dumps({"sync_retry_count": 7}), encoding="utf-8")
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert settings_api.load_system_config() == {"sync_retry_count": 7}
+
+        # 损坏的文件回退到默认配置
+        path.write_text("{", encoding="utf-8")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000))
+        assert settings_api.load_system_config() == {"sync_retry_count": 3}
+
+        app = Flask(__name__)
+        app.json = OrjsonProvider(app)
+        app.register_blueprint(settings_api.settings_bp, url_prefix="/api")
+        client = app.test_client()
+
+        response = client.post("/api/settings/extensions", json={
+            "subtitle": " .srt , .ass ,",
+            "image": ".jpg",
+            "nfo": ".nfo",
+            "other": "iso",
+        })
+        assert response.status_code == 200, response.get_json()
+
+        response = client.post("/api/settings/extensions", json={
+            "subtitle": ".srt,,ass ",
+            "image": ".jpg",
+            "nfo": ".nfo",
+        })
+        assert response.status_code == 400
+        assert '"ass"' in response.get_json()["error"]
+
+
+if __name__ == "__main__":
+    main()
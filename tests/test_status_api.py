@@ -0,0 +1,90 @@
+import sys
+import tempfile
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from flask import Flask
+
+from api import OrjsonProvider
+from api.status import init_status_bp, status_bp
+from core.models import StrmTask, SyncTask, TaskStatus
+
+NEXT_RUN = datetime(2024, 1, 1, 12, 30, 0)
+
+
+class FakeScheduler:
+    def __init__(self, tasks):
+        self.tasks = {task.id: task for task in tasks}
+        self.strm_tasks = {}
+        self.task_queue = deque()
+        self.is_running = True
+
+    def get_queue_size(self):
+        return len(self.task_queue)
+
+    def get_task(self, task_id):
+        return self.tasks.get(task_id)
+
+    def get_next_run_time(self, task_id, system_key="sync"):
+        if system_key == "strm" and task_id in self.strm_tasks:
+            return NEXT_RUN
+        return None
+
+
+def make_task(name, status, enabled=True, last_run_time=None):
+    task = SyncTask(name=name, source_path="/src", target_path="/dst", enabled=enabled)
+    task.update_status(status)
+    task.last_run_time = last_run_time
+    return task
+
+
+def main():
+    tasks = [
+        make_task("a", TaskStatus.IDLE, last_run_time="2024-01-01T00:00:00"),
+        make_task("b", TaskStatus.RUNNING, last_run_time="2024-01-03T00:00:00"),
+        make_task("c", TaskStatus.QUEUED, enabled=False),
+        make_task("d", TaskStatus.ERROR, last_run_time="2024-01-02T00:00:00"),
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        config_path = Path(temp_dir_name) / "tasks.json"
+        config_path.write_text("{}", encoding="utf-8")
+
+        app = Flask(__name__)
+        app.json = OrjsonProvider(app)
+        scheduler = FakeScheduler(tasks)
+        init_status_bp(scheduler, str(config_path), False, "test")
+        app.register_blueprint(status_bp, url_prefix="/api")
+        client = app.test_client()
+
+        data = client.get("/api/status").get_json()
+        assert data["version"] == "test"
+        assert data["task_stats"] == {
+            "total": 4,
+            "enabled": 3,
+            "disabled": 1,
+            "idle": 1,
+            "running": 1,
+            "queued": 1,
+            "error": 1,
+        }
+        assert [t["name"] for t in data["recent_tasks"]] == ["b", "d", "a"]
+        assert data["config_health"]["exists"] is True
+        assert data["config_health"]["file_stat"]["size"] == 2
+        assert "cpu_percent" in data["system"]
+
+        scheduler.task_queue.append(("sync", tasks[2].id))
+        scheduler.task_queue.append(("sync", "missing"))
+        strm_task = StrmTask(name="s", source_dir="/Movies", target_dir="/strm")
+        scheduler.strm_tasks[strm_task.id] = strm_task
+        scheduler.task_queue.append(("strm", strm_task.id))
+        data = client.get("/api/queue").get_json()
+        assert [t["name"] for t in data["queue"]] == ["c", "s"]
+        assert data["queue"][0]["next_run_time"] is None
+        assert data["queue"][1]["next_run_time"] == NEXT_RUN.isoformat()
+
+
+if __name__ == "__main__":
+    main()
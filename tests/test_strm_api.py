@@ -0,0 +1,141 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from flask import Flask
+
+from api import OrjsonProvider
+from api.strm import init_strm_bp, strm_bp
+from core.scheduler import validate_cron
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.scheduler = BackgroundScheduler()
+        self.scheduler.start(paused=True)
+        self.strm_tasks = {}
+        self.task_progress = {}
+        self.task_stats = {}
+        self.is_running = True
+        self.save_count = 0
+
+    def _build_trigger(self, task):
+        return IntervalTrigger(seconds=task.interval)
+
+    def _schedule_task(self, task, system_key="sync"):
+        return self.scheduler.add_job(
+            func=print,
+            trigger=self._build_trigger(task),
+            id=f"{system_key}_{task.id}",
+            replace_existing=True,
+        )
+
+    def _request_save_strm_tasks(self):
+        self.save_count += 1
+
+
+def main():
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    scheduler = FakeScheduler()
+    init_strm_bp(scheduler, None)
+    app.register_blueprint(strm_bp, url_prefix="/api")
+    client = app.test_client()
+
+    response = client.post("/api/strm/tasks", json={
+        "name": "movies",
+        "source_dir": "/Movies",
+        "target_dir": "/strm/movies",
+        "interval": 600,
+        "subtitle": "true",
+    })
+    assert response.status_code == 200, response.get_json()
+    created = response.get_json()["task"]
+    assert created["subtitle"] is True
+    assert created["interval"] == 600
+    assert created["next_run_time"] is not None
+
+    response = client.post("/api/strm/tasks", json={
+        "name": "shows",
+        "source_dir": "/Shows",
+        "target_dir": "/strm/shows",
+        "enabled": False,
+        "mode": "RawURL",
+    })
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["task"]["mode"] == "RawURL"
+
+    response = client.post("/api/strm/tasks", json={
+        "name": "bad",
+        "source_dir": "/Bad",
+        "target_dir": "/strm/bad",
+        "interval": 10,
+    })
+    assert response.status_code == 400
+
+    for expression, status in (("61 * * * *", 400), ("* * *", 400), ("*/30 3 * * 1-5", 200)):
+        response = client.post("/api/strm/tasks", json={
+            "name": "cron",
+            "source_dir": "/Cron",
+            "target_dir": "/strm/cron",
+            "schedule_type": "CRON",
+            "cron_expression": expression,
+            "enabled": False,
+        })
+        assert response.status_code == status, (expression, response.get_json())
+        if status == 400:
+            # 与调度器共用同一套 Cron 校验规则
+            assert response.get_json()["error"] == validate_cron(expression)
+
+    tasks = {t["name"]: t for t in client.get("/api/strm/tasks").get_json()["tasks"]}
+    assert set(tasks) == {"movies", "shows", "cron"}
+    assert tasks["movies"]["next_run_time"] is not None
+    assert tasks["shows"]["next_run_time"] is None
+
+    task_id = tasks["movies"]["id"]
+    response = client.put(f"/api/strm/tasks/{task_id}", json={
+        "name": "films",
+        "nfo": "yes",
+        "mode": "RawURL",
+        "suffix_list": [".MKV"],
+    })
+    assert response.status_code == 200, response.get_json()
+    updated = response.get_json()["task"]
+    assert updated["name"] == "films"
+    assert updated["nfo"] is True
+    assert updated["mode"] == "RawURL"
+    assert updated["suffix_list"] == ["mkv"]
+    listed = client.get(f"/api/strm/tasks/{task_id}").get_json()["task"]
+    assert listed["name"] == "films"
+
+    # 非法字段返回 400，且不会部分修改任务
+    response = client.put(f"/api/strm/tasks/{task_id}", json={"name": "partial", "schedule_type": "HOURLY"})
+    assert response.status_code == 400
+    response = client.put(f"/api/strm/tasks/{task_id}", json={"name": "partial", "mode": "bogus"})
+    assert response.status_code == 400
+    assert client.get(f"/api/strm/tasks/{task_id}").get_json()["task"]["name"] == "films"
+    # PUT 与创建接受相同的模式写法
+    response = client.put(f"/api/strm/tasks/{task_id}", json={"mode": "ALIST_URL"})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["task"]["mode"] == "AlistURL"
+
+    response = client.put(f"/api/strm/tasks/{task_id}", json={"interval": 7200})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()["task"]["next_run_time"] is not None
+    # 保持启用时原地替换 trigger
+    assert scheduler.scheduler.get_job(f"strm_{task_id}").trigger.interval.total_seconds() == 7200
+
+    response = client.delete(f"/api/strm/tasks/{task_id}")
+    assert response.status_code == 200
+    assert task_id not in scheduler.strm_tasks
+    assert scheduler.scheduler.get_job(f"strm_{task_id}") is None
+    # 配置修改交给调度器的保存线程合并落盘
+    assert scheduler.save_count > 0
+    scheduler.scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import sys
+import tempfile
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from flask import Flask
+
+from api import OrjsonProvider
+from api.tasks import init_tasks_bp, tasks_bp
+from core.scheduler import validate_cron
+
+NEXT_RUN = datetime(2024, 1, 1, 12, 30, 0)
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.tasks = {}
+        self.task_progress = {}
+        self.task_stats = {}
+        self.callbacks = {}
+        self.trigger_result = True
+
+    def add_task(self, task):
+        self.tasks[task.id] = task
+        return True
+
+    def get_task(self, task_id):
+        return self.tasks.get(task_id)
+
+    def get_all_tasks(self):
+        return list(self.tasks.values())
+
+    def update_task(self, task_id, **kwargs):
+        task = self.tasks[task_id]
+        for key, value in kwargs.items():
+            setattr(task, key, value)
+        return True
+
+    def get_next_run_time(self, task_id):
+        return NEXT_RUN
+
+    def on_task_complete(self, task_id, callback):
+        self.callbacks.setdefault(task_id, []).append(callback)
+
+    def run_completion_callbacks(self, task_id):
+        for callback in self.callbacks.pop(task_id, ()):
+            callback()
+
+    def trigger_task_now(self, task_id):
+        return self.trigger_result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir_name:
+        temp_dir = Path(temp_dir_name)
+        source = temp_dir / "source"
+        source.mkdir()
+        (source / "b").mkdir()
+        (source / "a").mkdir()
+        (source / "file.txt").write_text("x", encoding="utf-8")
+
+        app = Flask(__name__)
+        app.json = OrjsonProvider(app)
+        scheduler = FakeScheduler()
+        task_logs = {"general": deque(["a", "b", "c"], maxlen=2)}
+        init_tasks_bp(scheduler, lambda message: None, False, task_logs)
+        app.register_blueprint(tasks_bp, url_prefix="/api")
+        client = app.test_client()
+
+        response = client.post("/api/tasks", json={
+            "name": "sync",
+            "source_path": str(source),
+            "target_path": str(temp_dir / "target"),
+            "interval": 60,
+            "rule_size_diff": "on",
+        })
+        assert response.status_code == 200, response.get_json()
+        task = response.get_json()["task"]
+        assert task["rule_size_diff"] is True
+        assert task["next_run_time"] == NEXT_RUN.isoformat()
+        assert (temp_dir / "target").is_dir()
+
+        response = client.put(f"/api/tasks/{task['id']}", json={"thread_count": "x"})
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "线程数必须是数字"
+        response = client.put(f"/api/tasks/{task['id']}", json={
+            "thread_count": 0,
+            "delete_parent_levels": "",
+            "is_slow_storage": "yes",
+            "suffix_list": [".MP4", "mkv"],
+        })
+        assert response.status_code == 200, response.get_json()
+        updated = response.get_json()["task"]
+        assert updated["thread_count"] == 1
+        assert updated["delete_parent_levels"] == 0
+        assert updated["is_slow_storage"] is True
+        assert updated["suffix_list"] == ["mkv", "mp4"]
+
+        # 全量覆盖：触发失败时立即恢复原设置
+        scheduler.trigger_result = False
+        assert client.post(f"/api/tasks/{task['id']}/full-overwrite").status_code == 500
+        assert scheduler.tasks[task["id"]].overwrite_existing is False
+        # 执行期间用户修改的设置不会在执行结束时被回滚
+        scheduler.trigger_result = True
+        assert client.put(f"/api/tasks/{task['id']}", json={"overwrite_existing": True}).status_code == 200
+        assert client.post(f"/api/tasks/{task['id']}/full-overwrite").status_code == 200
+        assert client.put(f"/api/tasks/{task['id']}", json={"overwrite_existing": False}).status_code == 200
+        scheduler.run_completion_callbacks(task["id"])
+        assert scheduler.tasks[task["id"]].overwrite_existing is False
+
+        tasks = client.get("/api/tasks").get_json()["tasks"]
+        assert [t["name"] for t in tasks] == ["sync"]
+
+        presets = client.get("/api/cron/presets").get_json()["presets"]
+        assert presets[0]["expression"] == "*/5 * * * *"
+
+        response = client.post("/api/cron/validate", json={"expression": "*/5 * * * *"})
+        data = response.get_json()
+        assert data["valid"] is True
+        assert datetime.fromisoformat(data["next_run"])
+
+        response = client.post("/api/cron/validate", json={"expression": "*/5\t*\t*\t*\t*"})
+        assert response.get_json()["valid"] is True
+
+        response = client.post("/api/cron/validate", json=["*/5 * * * *"])
+        assert response.get_json()["valid"] is False
+
+        response = client.post("/api/cron/validate", json={"expression": "61 * * * *"})
+        assert response.get_json()["valid"] is False
+        assert response.get_json()["error"] == validate_cron("61 * * * *")
+
+        assert client.get("/api/logs").get_json()["logs"] == ["b", "c"]
+        assert client.get("/api/logs", query_string={"task_id": "missing"}).get_json()["logs"] == []
+        client.post("/api/logs/clear")
+        assert client.get("/api/logs").get_json()["logs"] == []
+
+        data = client.get("/api/directories", query_string={"path": str(source)}).get_json()
+        assert data["success"] is True
+        assert [d["name"] for d in data["directories"]] == ["a", "b"]
+
+        data = client.get("/api/directories", query_string={"path": str(source / "missing")}).get_json()
+        assert data["success"] is True
+        assert data["fallback"] is True
+        assert data["current_path"] == str(source)
+
+
+if __name__ == "__main__":
+    main()
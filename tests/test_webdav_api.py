@@ -47,7 +47,7 @@ def create_app(temp_dir: Path):
     app.register_blueprint(settings_api.settings_bp, url_prefix="/api")
 
     scheduler = FakeScheduler()
-    init_tasks_bp(scheduler, lambda message: None, False, {}, None)
+    init_tasks_bp(scheduler, lambda message: None, False, {})
     app.register_blueprint(tasks_bp, url_prefix="/api")
     return app, scheduler
 